@@ -0,0 +1,1047 @@
+# Copyright 2025, Battelle Energy Alliance, LLC, ALL RIGHTS RESERVED
+"""
+Batched Monte Carlo cost engine.
+
+The per-sample engine in cost_estimation.py builds and mutates a full cost
+DataFrame for every Monte Carlo sample. This module runs the same pipeline
+(scaling → FOAK to NOAK → roll-ups → indirect costs → financing → TCI → LCOE)
+once, on (samples × accounts) NumPy arrays: every uncertain input is drawn up
+front and each stage is an array operation over the sample axis.
+
+The result is the same mean/std table returned by the per-sample engine.
+"""
+
+import functools
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from cost.sampling import sampling_strategy, uniform_design, shared_design_columns, CostDistributions
+from cost.code_of_account_processing import compile_account_hierarchy
+from cost.sample_statistics import SampleStatistics, new_cost_statistics, cost_summary_table
+from cost.cost_scaling import (non_standard_cost_equation, redundant_BOP_and_primary_loop_multiplier,
+                               calculate_learning_multipliers)
+from cost.non_direct_cost import (_crf, calculate_interest_cost, calculate_interest_cost_central,
+                                  ITC_reduction_factor, levelized_energy_costs)
+from cost.sample_export import SampleExport
+from cost import instrumentation
+
+
+# Summary rows a run can add to a cost table (the reactor rows; the central
+# facility adds a subset). BatchedCostTable pre-allocates one slot per row.
+SUMMARY_ROWS = ('OCC', 'OCC per kW', 'OCC excl. fuel', 'OCC excl. fuel per kW',
+                'TCI', 'TCI per kW', 'OCC (ITC-adjusted)', 'OCC (ITC-adjusted) per kW',
+                'TCI (ITC-adjusted)', 'TCI (ITC-adjusted) per kW',
+                'AC', 'AC per MWh', 'LCOE', 'LCOE with PTC', 'LCOE (ITC-adjusted)', 'LCOH')
+
+
+class BatchedCostTable:
+    """
+    FOAK/NOAK costs of every sample, stored in one (samples, 2, columns) array.
+
+    values[:, 0] holds the FOAK and values[:, 1] the NOAK costs. The first columns
+    are the rows of the cost database, in their order (foak and noak are views of
+    them); the next ones are pre-allocated slots for the summary rows (OCC, TCI,
+    LCOE, ...), taken in the order the per-sample engine appends the rows. Rows
+    are located through the account → row map of the compiled AccountHierarchy,
+    so the stages index arrays instead of searching the accounts, and a table is
+    only turned into a DataFrame by the summary statistics at the output.
+    """
+
+    def __init__(self, database, foak):
+        self.database = database
+        self.accounts = database['Account'].to_numpy()
+        self.hierarchy = compile_account_hierarchy(database)
+        n_samples, self.n_rows = foak.shape
+        self.values = np.full((n_samples, 2, self.n_rows + len(SUMMARY_ROWS)), np.nan)
+        self.foak[:] = foak
+        self.derived = {}   # account → (title, column of its slot in values)
+        self.report_warnings = True   # print roll-up warnings (first sample only)
+        # NOAK unit number of every sample, when the units of a learning curve or
+        # fleet are stacked along the sample axis (None: params['NOAK Unit Number'])
+        self.noak_unit_numbers = None
+
+    @property
+    def n_samples(self):
+        return self.values.shape[0]
+
+    @property
+    def foak(self):
+        return self.values[:, 0, :self.n_rows]
+
+    @property
+    def noak(self):
+        return self.values[:, 1, :self.n_rows]
+
+    def columns(self, FOAK_or_NOAK):
+        return self.foak if FOAK_or_NOAK == 'F' else self.noak
+
+    def rows(self, account):
+        return self.hierarchy.account_rows(account)
+
+    def first(self, arr, account):
+        # Equivalent of df.loc[df['Account'] == account, col].values[0]
+        return arr[:, self.rows(account)[0]]
+
+    def assign(self, arr, account, value):
+        # Equivalent of df.loc[df['Account'] == account, col] = value
+        rows = self.rows(account)
+        if rows.size:
+            arr[:, rows] = np.asarray(value, dtype=float).reshape(-1, 1)
+
+    def nansum(self, arr, accounts):
+        # Equivalent of df[df['Account'].isin(accounts)][col].sum() (NaN skipped)
+        return np.nansum(arr[:, self.hierarchy.rows_in(accounts)], axis=1)
+
+    def add_row(self, account, title):
+        # Takes the next free slot; adding a row again (a stage that reruns) resets it
+        if account in self.derived:
+            column = self.derived[account][1]
+        else:
+            column = self.n_rows + len(self.derived)
+            if column == self.values.shape[2]:
+                self.values = np.concatenate([self.values, np.full((self.n_samples, 2, 1), np.nan)], axis=2)
+        self.derived[account] = (title, column)
+        self.values[:, :, column] = np.nan
+
+    def set_derived(self, account, FOAK_or_NOAK, value):
+        # Assignments to rows that were never added are ignored, as with df.loc on a missing account
+        if account in self.derived:
+            self.values[:, 0 if FOAK_or_NOAK == 'F' else 1, self.derived[account][1]] = value
+
+    def derived_value(self, account, FOAK_or_NOAK):
+        # A view of the row's slot: it changes if the row is set again
+        return self.values[:, 0 if FOAK_or_NOAK == 'F' else 1, self.derived[account][1]]
+
+    def samples(self):
+        # (samples, 2 × columns in use) FOAK|NOAK matrix of the database and summary rows
+        n_columns = self.n_rows + len(self.derived)
+        return self.values[:, :, :n_columns].reshape(self.n_samples, 2 * n_columns)
+
+    def snapshot(self):
+        # Copy of the costs and summary rows, to restore the table to this state later
+        return self.values.copy(), dict(self.derived)
+
+    def restore(self, snapshot):
+        values, derived = snapshot
+        if values.shape == self.values.shape:
+            self.values[...] = values
+        else:
+            self.values = values.copy()
+        self.derived = dict(derived)
+        return self
+
+    @classmethod
+    def from_snapshot(cls, database, snapshot):
+        table = cls(database, snapshot[0][:, 0, :len(database)])
+        return table.restore(snapshot)
+
+
+# **************************************************************************************************************************
+#                                                Sec. 1 : Sampling and scaling
+# **************************************************************************************************************************
+
+def sample_design(distributions, params, n_samples, rng=None):
+    # Uniform design of the uncertain inputs of n_samples samples (None for the
+    # class 3 values of a single-sample run)
+    if params['Number of Samples'] <= 1:
+        return None
+    return uniform_design(sampling_strategy(params), n_samples, distributions.dimension, rng=rng)
+
+
+def scale_cost_samples(database, params, n_samples, central=False, rng=None, distributions=None):
+    """
+    Vectorized equivalent of scale_cost (or scale_central_facility_cost when
+    central=True) for n_samples samples at once. distributions (the
+    CostDistributions of database) can be passed in to reuse them across blocks.
+
+    Returns the FOAK estimated costs as a (n_samples, n_rows) array.
+    """
+    if central:
+        params['Constant'] = 1
+
+    if distributions is None:
+        distributions = CostDistributions(database)
+
+    # One draw (or quasi-random design) across every uncertain fixed cost, unit cost and exponent
+    fixed_cost, unit_cost, exponent = distributions.values(sample_design(distributions, params, n_samples, rng=rng),
+                                                           n_samples)
+    return cost_equation_samples(database, params, fixed_cost, unit_cost, exponent, distributions, central=central)
+
+
+class CostEquations:
+    """
+    The cost equation of every row of a cost database, compiled into index
+    arrays so that all rows of all samples are evaluated with a few array
+    operations (cost_equation_samples):
+
+      - standard rows with and without a reference value, and the scaling
+        variable each costed row reads from the params;
+      - central facility count scaling (standard rows with a count variable);
+      - nonstandard rows, grouped by account, whose multiplier and scaling term
+        come from cost_scaling.NON_STANDARD_COST_EQUATIONS;
+      - the rows that keep the exponent or the estimate of a previous row, as
+        (target, source) gathers.
+    """
+
+    def __init__(self, database, distributions):
+        active = distributions.active
+        equation = database['Standard Cost Equation?'].to_numpy()
+        has_scaling_variable = database['Scaling Variable'].notna().to_numpy()
+        ref_value = database['Scaling Variable Ref Value'].to_numpy(dtype=float)
+
+        # Scaling variable of every costed row (value 0 for the other rows)
+        self.variable_rows = np.flatnonzero(active & has_scaling_variable)
+        self.variable_names = database['Scaling Variable'].to_numpy()[self.variable_rows].tolist()
+        self.has_scaling_variable = has_scaling_variable
+
+        standard = active & (equation == 'standard')
+        self.with_ref = np.flatnonzero(standard & (ref_value > 0))
+        self.ref_value = ref_value[self.with_ref]
+        self.without_ref = np.flatnonzero(standard & ~(ref_value > 0))
+        self.standard_with_variable = standard & has_scaling_variable
+
+        # Count scaling (central facility): standard rows with a count variable
+        if 'Count Scaling Variable' in database.columns:
+            self.count_rows = np.flatnonzero(standard & database['Count Scaling Variable'].notna().to_numpy())
+            self.count_names = database['Count Scaling Variable'].to_numpy()[self.count_rows].tolist()
+            self.count_per_variable = database['Count per Variable'].to_numpy(dtype=float)[self.count_rows]
+        else:
+            self.count_rows, self.count_names, self.count_per_variable = np.array([], dtype=int), [], np.array([])
+
+        self.nonstandard_rows = np.flatnonzero(active & (equation == 'nonstandard'))
+        self.nonstandard_accounts = database['Account'].to_numpy()[self.nonstandard_rows]
+
+        # scale_cost keeps the exponent of the previous costed row when a row has
+        # none of its own (e.g. vessel structures scaled with a reference value).
+        exponent_targets, exponent_sources = [], []
+        last = None
+        for j in np.flatnonzero(active):
+            if distributions.exponent_present[j]:
+                last = j
+            elif last is not None:
+                exponent_targets.append(j)
+                exponent_sources.append(last)
+        self.exponent_targets = np.array(exponent_targets, dtype=int)
+        self.exponent_sources = np.array(exponent_sources, dtype=int)
+
+        # Costed rows without a cost equation keep the estimate of the previous
+        # costed row, which is what the row loop in scale_cost ends up doing.
+        # Chains of such rows all copy the estimate of the row the chain starts from.
+        cost_targets, cost_sources = [], []
+        root = None
+        for j in np.flatnonzero(active):
+            if equation[j] in ('standard', 'nonstandard') or root is None:
+                root = j
+            else:
+                cost_targets.append(j)
+                cost_sources.append(root)
+        self.cost_targets = np.array(cost_targets, dtype=int)
+        self.cost_sources = np.array(cost_sources, dtype=int)
+
+
+_EQUATIONS_CACHE = {}
+
+
+def compile_cost_equations(database, distributions):
+    # Returns the CostEquations of a cost database, compiled once per distinct
+    # layout of its cost equation columns and shared by every block and estimate.
+    columns = ['Account', 'Scaling Variable', 'Standard Cost Equation?', 'Count Scaling Variable']
+    key = (tuple(tuple(database[column].fillna('').tolist()) for column in columns if column in database.columns),
+           database['Scaling Variable Ref Value'].to_numpy(dtype=float).tobytes(),
+           database['Count per Variable'].to_numpy(dtype=float).tobytes() if 'Count per Variable' in database.columns else None,
+           distributions.active.tobytes(), distributions.exponent_present.tobytes())
+    equations = _EQUATIONS_CACHE.get(key)
+    if equations is None:
+        equations = CostEquations(database, distributions)
+        _EQUATIONS_CACHE[key] = equations
+    return equations
+
+
+def _non_standard_cost_samples(rows, accounts, params, unit_cost, scaling_variable_value, exponent):
+    # The nonstandard rows at once: multiplier * unit cost * scaling term, with the
+    # rows grouped by the form of their scaling term
+    multipliers, forms = zip(*(non_standard_cost_equation(account, params) for account in accounts))
+    multipliers, forms = np.array(multipliers, dtype=float), np.array(forms)
+    cost = multipliers * unit_cost[:, rows]
+    s, e = scaling_variable_value[rows], exponent[:, rows]
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for form, term in (('power', lambda k: np.power(s[k], e[:, k])),
+                           ('inverse power', lambda k: np.power(1 / s[k], e[:, k])),
+                           ('linear', lambda k: s[k])):
+            k = np.flatnonzero(forms == form)
+            if k.size:
+                cost[:, k] = cost[:, k] * term(k)
+    return cost
+
+
+def cost_equation_samples(database, params, fixed_cost, unit_cost, exponent, distributions, central=False):
+    """
+    FOAK estimated costs of given (n_samples, n_rows) fixed costs, unit costs
+    and exponents (as drawn by distributions, the CostDistributions of database),
+    from the cost equation of every row, evaluated for all rows and samples at
+    once (see CostEquations).
+    """
+    n_samples, n_rows = fixed_cost.shape
+    equations = compile_cost_equations(database, distributions)
+    exponent[:, equations.exponent_targets] = exponent[:, equations.exponent_sources]
+
+    scaling_variable_value = np.zeros(n_rows)
+    scaling_variable_value[equations.variable_rows] = [params[name] for name in equations.variable_names]
+    is_zero = equations.has_scaling_variable & (scaling_variable_value == 0)
+
+    estimated_cost = np.full((n_samples, n_rows), 0.0 if central else np.nan)
+
+    # Standard cost equation
+    with_ref, ref_value = equations.with_ref, equations.ref_value
+    with np.errstate(divide='ignore', invalid='ignore'):
+        estimated_cost[:, with_ref] = (fixed_cost[:, with_ref]
+                                       + unit_cost[:, with_ref] * np.power(scaling_variable_value[with_ref], exponent[:, with_ref])
+                                       / np.power(ref_value, exponent[:, with_ref] - 1))
+    without_ref = equations.without_ref
+    estimated_cost[:, without_ref] = fixed_cost[:, without_ref] + unit_cost[:, without_ref] * scaling_variable_value[without_ref]
+    estimated_cost[:, equations.standard_with_variable & is_zero] = 0
+
+    if central and equations.count_rows.size:
+        # Count scaling (e.g. number of production lines) on top of the standard equation
+        count_rows = equations.count_rows
+        count_variable_value = np.array([params[name] for name in equations.count_names], dtype=float) * equations.count_per_variable
+        estimated_cost[:, count_rows] = estimated_cost[:, count_rows] * count_variable_value
+        estimated_cost[:, count_rows[count_variable_value == 0]] = 0
+
+    # Nonstandard cost equations (rows whose scaling variable is 0 cost nothing,
+    # and their equation, which may need params the design does not have, is skipped)
+    nonzero = ~is_zero[equations.nonstandard_rows]
+    estimated_cost[:, equations.nonstandard_rows[~nonzero]] = 0
+    if nonzero.any():
+        rows = equations.nonstandard_rows[nonzero]
+        estimated_cost[:, rows] = _non_standard_cost_samples(rows, equations.nonstandard_accounts[nonzero], params,
+                                                             unit_cost, scaling_variable_value, exponent)
+
+    estimated_cost[:, equations.cost_targets] = estimated_cost[:, equations.cost_sources]
+    return estimated_cost
+
+
+def _unit_params(params, unit_number):
+    # A shallow copy of params for one NOAK unit number; the learning multipliers
+    # of that unit are stored in the copy, not in params
+    unit_params = dict(params)
+    unit_params['NOAK Unit Number'] = unit_number
+    return unit_params
+
+
+def FOAK_to_NOAK_samples(table, params):
+    multiplier_types = table.database['FOAK to NOAK Multiplier Type']
+
+    def row_multipliers(multipliers):
+        return multiplier_types.map(lambda multiplier_type: multipliers.get(multiplier_type, np.nan)).to_numpy(dtype=float)
+
+    if table.noak_unit_numbers is None:
+        row_multiplier = row_multipliers(calculate_learning_multipliers(params))
+    else:
+        # One row of multipliers per distinct unit number, gathered for every sample
+        units, positions = np.unique(table.noak_unit_numbers, return_inverse=True)
+        row_multiplier = np.stack([row_multipliers(calculate_learning_multipliers(_unit_params(params, int(unit))))
+                                   for unit in units])[positions]
+    np.multiply(table.foak, row_multiplier, out=table.noak)
+    return table
+
+
+# **************************************************************************************************************************
+#                                                Sec. 2 : Roll-ups
+# **************************************************************************************************************************
+
+def update_high_level_costs_samples(table, option):
+    """
+    Vectorized equivalent of update_high_level_costs: fills in parent accounts
+    that have no cost of their own with the sum of their children, from level 4
+    up to level 0, for FOAK and NOAK and all samples at once.
+    """
+    no_subaccounts_list = table.hierarchy.roll_up(table.foak, table.noak, option)
+    # Warnings are reported for the first sample only, as in the per-sample engine
+    if table.report_warnings and no_subaccounts_list:
+        instrumentation.message(f"Warning: The following accounts do not have any subaccounts: {', '.join(map(str, set(no_subaccounts_list))) }")
+    return table
+
+
+# **************************************************************************************************************************
+#                                                Sec. 3 : Indirect, financing and annualized costs
+# **************************************************************************************************************************
+
+def calculate_accounts_31_32_75_82_cost_samples(table, params):
+    refueling_period = params['Fuel Lifetime'] + params['Refueling Period'] + params['Startup Duration after Refueling']
+    refueling_period_yr = refueling_period / 365
+    has_replacement = any('replacement' in str(key).lower() for key in params.keys())
+
+    for FOAK_or_NOAK in ['F', 'N']:
+        arr = table.columns(FOAK_or_NOAK)
+        tot_field_direct_cost = table.nansum(arr, [21, 22, 23])
+        table.assign(arr, 31, params['indirect to direct field-related cost'] * tot_field_direct_cost)
+        table.assign(arr, 32, table.first(arr, 21) * (table.first(arr, 31) / table.first(arr, 22)))
+
+        if has_replacement:
+            A20_replacement_period = refueling_period_yr * np.array([params['A75: Vessel Replacement Period (cycles)'],
+                                                                     params['A75: Core Barrel Replacement Period (cycles)'],
+                                                                     1,
+                                                                     params['A75: Reflector Replacement Period (cycles)'],
+                                                                     params['A75: Drum Replacement Period (cycles)'],
+                                                                     params.get('A75: Integrated HX Replacement Period (cycles)', 0),])
+            # NaN propagates here (plain sum), as with .values.sum() in the per-sample engine
+            A20_capital_cost = np.stack([arr[:, np.isin(table.accounts, accounts)].sum(axis=1) for accounts in
+                                         ([221.12], [221.13], [221.33], [221.31], [221.2], [222.1, 222.2, 222.3, 222.61])],
+                                        axis=1)
+            annualized_replacement_cost = A20_capital_cost * _crf(params['Discount Rate'], A20_replacement_period)
+            A20_other_cost = table.first(arr, 20) - A20_capital_cost.sum(axis=1)
+            annualized_other_cost = A20_other_cost * params['Maintenance to Direct Cost Ratio']
+            for k, account in enumerate([751, 752, 753, 754, 755, 756]):
+                table.assign(arr, account, annualized_replacement_cost[:, k])
+            table.assign(arr, 759, annualized_other_cost)
+        else:
+            table.assign(arr, 75, table.first(arr, 20) * params['Maintenance to Direct Cost Ratio'])
+
+        lump_fuel_cost = table.first(arr, 25)
+        table.assign(arr, 82, lump_fuel_cost * _crf(params['Discount Rate'], refueling_period_yr))
+    return table
+
+
+def calculate_accounts_31_32_75_central_facility_cost_samples(table, params):
+    for FOAK_or_NOAK in ['F', 'N']:
+        arr = table.columns(FOAK_or_NOAK)
+        tot_field_direct_cost = table.nansum(arr, [21, 22, 23, 24, 25, 27])
+        table.assign(arr, 31, params['indirect to direct field-related cost'] * tot_field_direct_cost)
+        reactor_systems = arr[:, np.flatnonzero(np.isin(table.accounts, [22, 23, 24, 25]))[0]]
+        # Facilities without reactor systems divide 0 by 0 (NaN, as in the per-sample engine)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            table.assign(arr, 32, table.first(arr, 21) * (table.first(arr, 31) / reactor_systems))
+        table.assign(arr, 75, table.first(arr, 20) * params['Maintenance to Direct Cost Ratio'])
+    return table
+
+
+def calculate_decommissioning_cost_samples(table, params):
+    if 'A78: CAPEX to Decommissioning Cost Ratio' not in params.keys():
+        params['A78: CAPEX to Decommissioning Cost Ratio'] = 0.15
+    AR = params['Annual Return']
+    LP = params['Levelization Period']
+    fv_to_pv_of_annuity = -AR/(1- pow(1+AR, LP))
+
+    for FOAK_or_NOAK in ['F', 'N']:
+        arr = table.columns(FOAK_or_NOAK)
+        capex = table.nansum(arr, [10, 20])
+        decommissioning_fv_cost = capex * params['A78: CAPEX to Decommissioning Cost Ratio']
+        table.assign(arr, 78, decommissioning_fv_cost * fv_to_pv_of_annuity)
+    return table
+
+
+def calculate_high_level_capital_costs_samples(table, params, central=False):
+    accounts_to_sum = [10, 20, 30, 40, 50]
+    table.add_row('OCC', 'Overnight Capital Cost')
+    if central:
+        # The central facility table only carries OCC (no per-kW or excl. fuel rows)
+        interest = calculate_interest_cost_central
+    else:
+        power_kWe = 1000 * params['Power MWe']
+        interest = calculate_interest_cost
+        table.add_row('OCC per kW', 'Overnight Capital Cost per kW')
+        table.add_row('OCC excl. fuel', 'Overnight Capital Cost Excluding Fuel')
+        table.add_row('OCC excl. fuel per kW', 'Overnight Capital Cost Excluding Fuel per kW')
+
+    for FOAK_or_NOAK in ['F', 'N']:
+        arr = table.columns(FOAK_or_NOAK)
+        occ_cost = table.nansum(arr, accounts_to_sum)
+        table.set_derived('OCC', FOAK_or_NOAK, occ_cost)
+        if not central:
+            occ_excl_fuel = occ_cost - table.first(arr, 25)
+            table.set_derived('OCC per kW', FOAK_or_NOAK, occ_cost / power_kWe)
+            table.set_derived('OCC excl. fuel', FOAK_or_NOAK, occ_excl_fuel)
+            table.set_derived('OCC excl. fuel per kW', FOAK_or_NOAK, occ_excl_fuel / power_kWe)
+        table.assign(arr, 62, interest(params, occ_cost))
+    return table
+
+
+def _tax_credit_eligibility(params, table):
+    # FOAK column = unit 1; NOAK column = unit 'NOAK Unit Number' (or the unit of
+    # every sample, see BatchedCostTable.noak_unit_numbers). A unit qualifies
+    # only if its position is <= 'Number of Units Claiming ITC/PTC'.
+    n_credit = params.get('Number of Units Claiming ITC/PTC', 10**9)
+    noak_unit = params.get('NOAK Unit Number', 10) if table.noak_unit_numbers is None else table.noak_unit_numbers
+    return {'F': 1 <= n_credit, 'N': noak_unit <= n_credit}
+
+
+def calculate_TCI_samples(table, params, central=False):
+    power_kWe = 1000 * params['Power MWe']
+    if central:
+        power_kWe *= params['Maximum Number of Operating Reactors']
+    has_itc = not central and 'ITC credit level' in params.keys()
+
+    table.add_row('TCI', 'Total Capital Investment')
+    table.add_row('TCI per kW', 'Total Capital Investment per kW')
+    if has_itc:
+        table.add_row('OCC (ITC-adjusted)', 'Overnight Capital Cost Adjusted for the Investment Tax Credit')
+        table.add_row('OCC (ITC-adjusted) per kW', 'Overnight Capital Cost Adjusted for the Investment Tax Credit per kW')
+        table.add_row('TCI (ITC-adjusted)', 'Total Capital Investment Adjusted for the Investment Tax Credit')
+        table.add_row('TCI (ITC-adjusted) per kW', 'Total Capital Investment Adjusted for the Investment Tax Credit per kW')
+    eligible = _tax_credit_eligibility(params, table)
+
+    for FOAK_or_NOAK in ['F', 'N']:
+        arr = table.columns(FOAK_or_NOAK)
+        occ = table.derived_value('OCC', FOAK_or_NOAK)
+        tci_cost = np.nansum(np.column_stack([occ, table.nansum(arr, [60])]), axis=1)
+        table.set_derived('TCI', FOAK_or_NOAK, tci_cost)
+        table.set_derived('TCI per kW', FOAK_or_NOAK, tci_cost / power_kWe)
+
+        if has_itc:
+            # Units past the cutoff keep the unadjusted OCC and TCI
+            OCC_after_ITC = np.where(eligible[FOAK_or_NOAK], occ * ITC_reduction_factor(params['ITC credit level']), occ)
+            tci_cost_with_itc = np.where(eligible[FOAK_or_NOAK], table.first(arr, 60) + OCC_after_ITC, tci_cost)
+            table.set_derived('OCC (ITC-adjusted)', FOAK_or_NOAK, OCC_after_ITC)
+            table.set_derived('OCC (ITC-adjusted) per kW', FOAK_or_NOAK, OCC_after_ITC / power_kWe)
+            table.set_derived('TCI (ITC-adjusted)', FOAK_or_NOAK, tci_cost_with_itc)
+            table.set_derived('TCI (ITC-adjusted) per kW', FOAK_or_NOAK, tci_cost_with_itc / power_kWe)
+    return table
+
+
+def energy_cost_levelized_samples(params, table):
+    # Same rows as energy_cost_levelized, with the levelized costs of all samples
+    # from the shared kernel (levelized_energy_costs)
+    table.add_row('AC', 'Annualized Cost')
+    table.add_row('AC per MWh', 'Annualized Cost per MWh')
+    table.add_row('LCOE', 'Levelized Cost Of Energy ($/MWh)')
+    if 'PTC credit value' in params.keys():
+        table.add_row('LCOE with PTC', 'Levelized Cost Of Energy with PTC ($/MWh)')
+    if 'ITC credit level' in params.keys():
+        assert 'PTC credit value' not in params.keys(), '--error: Only PTC or ITC or None must be selected not both.'
+        table.add_row('LCOE (ITC-adjusted)', 'Levelized Cost Of Energy Adjusted for the Investment Tax Credit ($/MWh)')
+    table.add_row('LCOH', 'Levelized Cost Of Heat ($/MWth)')
+
+    eligible = _tax_credit_eligibility(params, table)
+    for FOAK_or_NOAK in ['F', 'N']:
+        arr = table.columns(FOAK_or_NOAK)
+        ann_cost = table.first(arr, 70) + table.first(arr, 80)
+        table.set_derived('AC', FOAK_or_NOAK, ann_cost)
+        table.set_derived('AC per MWh', FOAK_or_NOAK, ann_cost / params['Annual Electricity Production'])
+
+        TCI_ITC = table.derived_value('TCI (ITC-adjusted)', FOAK_or_NOAK) if 'ITC credit level' in params.keys() else None
+        levelized_costs = levelized_energy_costs(params, table.derived_value('TCI', FOAK_or_NOAK), ann_cost,
+                                                 table.derived_value('OCC', FOAK_or_NOAK), TCI_ITC,
+                                                 eligible=eligible[FOAK_or_NOAK])
+        for account, cost in levelized_costs.items():
+            table.set_derived(account, FOAK_or_NOAK, cost)
+    return table
+
+
+# **************************************************************************************************************************
+#                                                Sec. 4 : Pipeline
+# **************************************************************************************************************************
+
+def table_samples(table):
+    """
+    Accounts, titles and the (samples, 2 × rows) FOAK|NOAK matrix of every
+    row of a BatchedCostTable, summary rows included.
+    """
+    accounts = list(table.accounts) + list(table.derived.keys())
+    titles = list(table.database['Account Title']) + [title for title, _ in table.derived.values()]
+    return accounts, titles, table.samples()
+
+
+def summarize_samples(table, params):
+    """Collapse a BatchedCostTable into the mean/std table of the per-sample engine."""
+    accounts, titles, samples = table_samples(table)
+    statistics = new_cost_statistics(len(accounts), params).update(samples)
+    return cost_summary_table(accounts, titles, statistics, params)
+
+
+def scale_foak_samples(database, params, n_samples, central=False, rng=None, distributions=None):
+    # FOAK costs of every sample: scaled costs, with the redundant BOP / primary loop multiplier for reactors
+    if distributions is None:
+        distributions = CostDistributions(database)
+    foak, _ = _foak_block(database, params, distributions, sample_design(distributions, params, n_samples, rng=rng),
+                          n_samples, central=central)
+    return foak
+
+
+def _foak_block(database, params, distributions, points, n_samples, central=False, with_inputs=False):
+    # FOAK costs of the samples of a uniform design (see scale_foak_samples), and, with_inputs,
+    # the (samples, uncertain inputs) values of the design for a sample export (else None)
+    if central:
+        params['Constant'] = 1
+    with _stage('Scaling', central):
+        fixed_cost, unit_cost, exponent = distributions.values(points, n_samples)
+        inputs = distributions.input_values(fixed_cost, unit_cost, exponent) if with_inputs else None
+        foak = cost_equation_samples(database, params, fixed_cost, unit_cost, exponent, distributions, central=central)
+        if not central:
+            foak *= redundant_BOP_and_primary_loop_multiplier(database['Account'], params)
+    return foak, inputs
+
+
+def _stage(name, central=False):
+    # Instrumentation stage (see instrumentation.py) of the reactor or of the central facility pipeline
+    return instrumentation.stage(f'Central facility: {name}' if central else name)
+
+
+def cost_stages(central=False):
+    """
+    The stages downstream of the FOAK costs, in order, as (name, stage) pairs.
+    stage(table, params) updates a BatchedCostTable in place.
+    """
+    if central:
+        indirect_costs = calculate_accounts_31_32_75_central_facility_cost_samples
+    else:
+        indirect_costs = calculate_accounts_31_32_75_82_cost_samples
+    stages = [('FOAK to NOAK', FOAK_to_NOAK_samples),
+              ('Roll-up base', lambda table, params: update_high_level_costs_samples(table, 'base')),
+              ('Indirect and annualized costs', indirect_costs),
+              ('Decommissioning', calculate_decommissioning_cost_samples),
+              ('Roll-up other', lambda table, params: update_high_level_costs_samples(table, 'other')),
+              ('Capital costs', lambda table, params: calculate_high_level_capital_costs_samples(table, params, central)),
+              ('Roll-up finance', lambda table, params: update_high_level_costs_samples(table, 'finance')),
+              ('TCI', lambda table, params: calculate_TCI_samples(table, params, central)),
+              ('Roll-up annual', lambda table, params: update_high_level_costs_samples(table, 'annual'))]
+    if not central:
+        stages.append(('LCOE', lambda table, params: energy_cost_levelized_samples(params, table)))
+    return stages
+
+
+def run_cost_stages(table, params, central=False):
+    """
+    Everything downstream of the FOAK costs (FOAK to NOAK, roll-ups, indirect
+    and financing costs, TCI, LCOE), applied to a BatchedCostTable in place.
+    """
+    for name, stage in cost_stages(central):
+        with _stage(name, central):
+            stage(table, params)
+    return table
+
+
+# **************************************************************************************************************************
+#                                                Sec. 5 : Seeding and parallel sample blocks
+# **************************************************************************************************************************
+
+# Samples are drawn in blocks of SAMPLE_BLOCK_SIZE, each from its own Generator
+# spawned from the run's SeedSequence. The blocks do not depend on how they are
+# split between workers, so a seeded run gives bit-identical results for any
+# number of workers. A power of 2, so that every block of a 'Sobol' run is a
+# complete (balanced) scrambled Sobol net.
+SAMPLE_BLOCK_SIZE = 128
+
+
+def sample_block_sizes(n_samples):
+    n_full, remainder = divmod(n_samples, SAMPLE_BLOCK_SIZE)
+    return [SAMPLE_BLOCK_SIZE] * n_full + ([remainder] if remainder else [])
+
+
+def _sample_export(database, params, central=False):
+    # SampleExport of a run when params['Sample Export'] names a folder (see sample_export.py)
+    directory = params.get('Sample Export')
+    if not directory:
+        return None
+    return SampleExport(directory, 'central_facility' if central else 'reactor', params['Number of Samples'],
+                        len(database) + len(SUMMARY_ROWS), CostDistributions(database).input_keys(database))
+
+
+def _run_sample_blocks(database, params, block_sizes, seed_sequences, central=False, report_warnings=True,
+                       first_sample=0, export=None):
+    """
+    Runs consecutive sample blocks. Only the statistics of each block are kept,
+    so memory does not grow with the number of samples (a SampleExport writes
+    the samples of each block to its files, first_sample being the index of
+    the first sample of the blocks in the run). Returns the accounts, titles
+    and the list of per-block SampleStatistics.
+    """
+    distributions = CostDistributions(database)
+    block_statistics = []
+    for k, (block_size, seed_sequence) in enumerate(zip(block_sizes, seed_sequences)):
+        rng = np.random.default_rng(seed_sequence)
+        foak, inputs = _foak_block(database, params, distributions, sample_design(distributions, params, block_size, rng=rng),
+                                   block_size, central=central, with_inputs=export is not None)
+        table = BatchedCostTable(database, foak)
+        table.report_warnings = report_warnings and k == 0
+        accounts, titles, samples = table_samples(run_cost_stages(table, params, central=central))
+        with _stage('Statistics', central):
+            block_statistics.append(new_cost_statistics(len(accounts), params).update(samples, rng=rng))
+        if export is not None:
+            with _stage('Sample export', central):
+                export.write_block(first_sample, table, inputs)
+        first_sample += block_size
+    return accounts, titles, block_statistics
+
+
+def _shard_blocks(run_blocks, n_samples, seed=None, n_workers=1):
+    """
+    Calls run_blocks(block_sizes=..., seed_sequences=..., report_warnings=...,
+    first_sample=...) on contiguous, nearly equal shares of the SAMPLE_BLOCK_SIZE
+    blocks of n_samples samples, one share per worker. The first share runs in this
+    process (so params updates and warnings behave as in a serial run); the rest
+    run in a process pool. Returns the results of the shares, in block order.
+    During an instrumented run, the workers record their stages in reports of
+    their own, merged into the run's report.
+    """
+    block_sizes = sample_block_sizes(n_samples)
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(block_sizes))
+    n_workers = max(1, min(int(n_workers or 1), len(block_sizes)))
+
+    bounds = np.linspace(0, len(block_sizes), n_workers + 1).round().astype(int)
+    shares = [(bounds[k], bounds[k + 1]) for k in range(n_workers)]
+    first_samples = np.concatenate([[0], np.cumsum(block_sizes)]).astype(int).tolist()
+
+    start, stop = shares[0]
+    if n_workers == 1:
+        return [run_blocks(block_sizes=block_sizes, seed_sequences=seed_sequences, report_warnings=True, first_sample=0)]
+    report = instrumentation.active_report()
+    with ProcessPoolExecutor(max_workers=n_workers - 1) as executor:
+        if report is None:
+            submit = functools.partial(executor.submit, run_blocks)
+        else:
+            submit = functools.partial(executor.submit, instrumentation.run_instrumented, report.track_allocations,
+                                       run_blocks)
+        futures = [submit(block_sizes=block_sizes[first:last], seed_sequences=seed_sequences[first:last],
+                          report_warnings=False, first_sample=first_samples[first])
+                   for first, last in shares[1:]]
+        results = [run_blocks(block_sizes=block_sizes[start:stop], seed_sequences=seed_sequences[start:stop],
+                              report_warnings=True, first_sample=0)]
+        for future in futures:
+            result = future.result()
+            if report is not None:
+                result, worker_report = result
+                report.merge(worker_report)
+            results.append(result)
+        return results
+
+
+def _merge_block_statistics(shares):
+    # Accounts, titles and merged SampleStatistics of the (accounts, titles,
+    # block statistics) of several shares, in block order
+    accounts, titles, _ = shares[0]
+    block_statistics = [block for _, _, blocks in shares for block in blocks]
+    statistics = block_statistics[0]
+    for block in block_statistics[1:]:
+        statistics.merge(block)
+    return accounts, titles, statistics
+
+
+def run_sharded_samples(database, params, n_samples, central=False, seed=None, n_workers=1, export=None):
+    """
+    Run n_samples samples in SAMPLE_BLOCK_SIZE blocks, split over n_workers
+    processes (see _shard_blocks), optionally writing them to a SampleExport.
+
+    Returns the accounts, titles and SampleStatistics of all samples. Block
+    statistics are merged in block order, whatever the number of workers.
+    """
+    run_blocks = functools.partial(_run_sample_blocks, database, params, central=central, export=export)
+    return _merge_block_statistics(_shard_blocks(run_blocks, n_samples, seed=seed, n_workers=n_workers))
+
+
+def _run_joint_sample_blocks(database, central_database, params, block_sizes, seed_sequences, report_warnings,
+                             first_sample=0, exports=(None, None)):
+    """
+    Runs consecutive sample blocks of a reactor and its central facility.
+
+    The reactor blocks are those of _run_sample_blocks (same Generators, same
+    samples). Each central facility block draws its design from a child of the
+    block's SeedSequence, except for the uncertain inputs it shares with the
+    reactor sheet (same account and distribution, e.g. land and building unit
+    costs): these take the reactor's design columns, so they have the same
+    sampled value in both estimates. exports are the SampleExports (or None)
+    of the reactor and of the central facility. Returns the (accounts, titles,
+    block statistics) of the reactor and of the central facility blocks.
+    """
+    distributions = CostDistributions(database)
+    central_distributions = CostDistributions(central_database)
+    shared, central_shared = shared_design_columns(distributions.input_keys(database),
+                                                   central_distributions.input_keys(central_database))
+    block_statistics, central_block_statistics = [], []
+    for k, (block_size, seed_sequence) in enumerate(zip(block_sizes, seed_sequences)):
+        rng = np.random.default_rng(seed_sequence)
+        central_rng = np.random.default_rng(seed_sequence.spawn(1)[0])
+        points = sample_design(distributions, params, block_size, rng=rng)
+        central_points = sample_design(central_distributions, params, block_size, rng=central_rng)
+        if points is not None:
+            central_points[:, central_shared] = points[:, shared]
+
+        foak, inputs = _foak_block(database, params, distributions, points, block_size, with_inputs=exports[0] is not None)
+        table = BatchedCostTable(database, foak)
+        table.report_warnings = report_warnings and k == 0
+        accounts, titles, samples = table_samples(run_cost_stages(table, params))
+        with _stage('Statistics'):
+            block_statistics.append(new_cost_statistics(len(accounts), params).update(samples, rng=rng))
+
+        central_foak, central_inputs = _foak_block(central_database, params, central_distributions, central_points,
+                                                   block_size, central=True, with_inputs=exports[1] is not None)
+        central_table = BatchedCostTable(central_database, central_foak)
+        central_table.report_warnings = report_warnings and k == 0
+        central_accounts, central_titles, samples = table_samples(run_cost_stages(central_table, params, central=True))
+        with _stage('Statistics', central=True):
+            central_block_statistics.append(new_cost_statistics(len(central_accounts), params).update(samples, rng=central_rng))
+
+        for export, block_table, block_inputs in zip(exports, (table, central_table), (inputs, central_inputs)):
+            if export is not None:
+                with _stage('Sample export'):
+                    export.write_block(first_sample, block_table, block_inputs)
+        first_sample += block_size
+    return (accounts, titles, block_statistics), (central_accounts, central_titles, central_block_statistics)
+
+
+def joint_cost_estimate(database, central_database, params, seed=None, n_workers=1):
+    """
+    Batched estimates of a reactor (database) and its central facility
+    (central_database) in one pass over the sample blocks.
+
+    Every block runs both pipelines on the same params (see
+    _run_joint_sample_blocks for how their samples are shared), and the shares
+    of blocks of the n_workers processes hold both estimates, so the central
+    facility samples run alongside the reactor samples rather than after them.
+    The reactor table is the one batched_cost_estimate returns with the same
+    seed. With an adaptive number of samples, the two estimates run one after
+    the other.
+
+    Returns the reactor and the central facility summary tables.
+    """
+    if adaptive_sampling_settings(params) is not None:
+        return (batched_cost_estimate(database, params, seed=seed, n_workers=n_workers),
+                batched_cost_estimate(central_database, params, central=True, seed=seed, n_workers=n_workers))
+
+    exports = (_sample_export(database, params), _sample_export(central_database, params, central=True))
+    run_blocks = functools.partial(_run_joint_sample_blocks, database, central_database, params, exports=exports)
+    shares = _shard_blocks(run_blocks, params['Number of Samples'], seed=seed, n_workers=n_workers)
+    accounts, titles, statistics = _merge_block_statistics([reactor for reactor, _ in shares])
+    central_accounts, central_titles, central_statistics = _merge_block_statistics([central for _, central in shares])
+    if exports[0] is not None:
+        exports[0].finish(accounts, titles, params, seed)
+        exports[1].finish(central_accounts, central_titles, params, seed)
+    return (cost_summary_table(accounts, titles, statistics, params),
+            cost_summary_table(central_accounts, central_titles, central_statistics, params))
+
+
+# **************************************************************************************************************************
+#                                                Sec. 6 : Learning curves
+# **************************************************************************************************************************
+
+# Summary rows reported by learning_curve_estimate (the ones that exist for the run's tax credit)
+LEARNING_CURVE_ACCOUNTS = ['OCC', 'OCC (ITC-adjusted)', 'TCI', 'TCI (ITC-adjusted)',
+                           'LCOE', 'LCOE with PTC', 'LCOE (ITC-adjusted)', 'LCOH']
+
+
+def _unit_samples(database, params, unit_numbers, seed=None):
+    """
+    NOAK costs of several unit numbers from one shared set of FOAK samples.
+
+    The FOAK samples are drawn once, in the seeded blocks of a regular run. The
+    unit numbers are stacked along the sample axis of one BatchedCostTable, so
+    every unit only differs by its learning multipliers (an elementwise scaling
+    of the FOAK costs) and its ITC/PTC eligibility, and all units run through
+    the cost stages at once.
+
+    Yields, for every block, the LEARNING_CURVE_ACCOUNTS rows of the run, their
+    FOAK samples (samples × accounts) and their NOAK samples of every unit
+    (units × samples × accounts).
+    """
+    unit_numbers = np.asarray(unit_numbers, dtype=int)
+    block_sizes = sample_block_sizes(params['Number of Samples'])
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(block_sizes))
+    distributions = CostDistributions(database)
+
+    for block_size, seed_sequence in zip(block_sizes, seed_sequences):
+        rng = np.random.default_rng(seed_sequence)
+        foak = scale_foak_samples(database, params, block_size, rng=rng, distributions=distributions)
+        table = BatchedCostTable(database, np.tile(foak, (len(unit_numbers), 1)))
+        table.noak_unit_numbers = np.repeat(unit_numbers, block_size)
+        table.report_warnings = False
+        run_cost_stages(table, dict(params))
+
+        accounts = [account for account in LEARNING_CURVE_ACCOUNTS if account in table.derived]
+        foak_samples = np.column_stack([table.derived_value(account, 'F')[:block_size] for account in accounts])
+        noak_samples = np.column_stack([table.derived_value(account, 'N') for account in accounts])
+        yield accounts, foak_samples, noak_samples.reshape(len(unit_numbers), block_size, len(accounts))
+
+
+def learning_curve_estimate(database, params, unit_numbers, seed=None):
+    """
+    NOAK costs of several unit numbers from one shared set of FOAK samples (see
+    _unit_samples). The NOAK columns of a regular run with the same seed are
+    reproduced for its 'NOAK Unit Number'.
+
+    Returns a DataFrame with one row per unit number: 'NOAK Unit Number' and the
+    mean and std of every LEARNING_CURVE_ACCOUNTS row of the run.
+    """
+    unit_numbers = [int(unit_number) for unit_number in unit_numbers]
+    statistics = None
+    for accounts, _, noak_samples in _unit_samples(database, params, unit_numbers, seed):
+        if statistics is None:
+            statistics = [SampleStatistics(len(accounts)) for _ in unit_numbers]
+        for unit_statistics, samples in zip(statistics, noak_samples):
+            unit_statistics.update(samples)
+
+    ddof = 1 if params['Number of Samples'] > 1 else 0
+    rows = []
+    for unit_number, unit_statistics in zip(unit_numbers, statistics):
+        row = {'NOAK Unit Number': unit_number}
+        std = unit_statistics.std(ddof)
+        for k, account in enumerate(accounts):
+            row[account] = unit_statistics.mean[k]
+            row[f'{account} std'] = std[k]
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def fleet_estimate(database, params, n_units, seed=None):
+    """
+    Costs of a fleet of units 1..n_units, built in order, from one shared set of
+    FOAK samples (see _unit_samples).
+
+    Unit 1 is the FOAK unit (the FOAK column of a regular run), unit n >= 2 is
+    the NOAK column of a run with 'NOAK Unit Number' = n. Only the first
+    'Number of Units Claiming ITC/PTC' units claim the ITC/PTC. The cumulative
+    average of unit n is the mean cost of units 1..n of the same sample (the
+    fleet-average LCOE, since all units have the same power and capacity factor).
+
+    Returns a DataFrame with one row per unit: 'Unit Number', and the mean and
+    std of every LEARNING_CURVE_ACCOUNTS row of the run, per unit and as
+    'Cumulative Average {account}'.
+    """
+    n_units = int(n_units)
+    if n_units < 1:
+        raise ValueError(f"The fleet needs at least one unit, got {n_units}.")
+    units = np.arange(1, n_units + 1)
+
+    statistics = None
+    for accounts, foak_samples, noak_samples in _unit_samples(database, params, units, seed):
+        if statistics is None:
+            statistics = [SampleStatistics(2 * len(accounts)) for _ in units]
+        # Units × samples × accounts: the FOAK unit, then the NOAK costs of units 2..n_units
+        per_unit = np.concatenate([foak_samples[np.newaxis], noak_samples[1:]])
+        cumulative_average = np.cumsum(per_unit, axis=0) / units[:, np.newaxis, np.newaxis]
+        for k, unit_statistics in enumerate(statistics):
+            unit_statistics.update(np.hstack([per_unit[k], cumulative_average[k]]))
+
+    ddof = 1 if params['Number of Samples'] > 1 else 0
+    rows = []
+    for unit_number, unit_statistics in zip(units, statistics):
+        row = {'Unit Number': int(unit_number)}
+        std = unit_statistics.std(ddof)
+        for k, account in enumerate(accounts):
+            row[account] = unit_statistics.mean[k]
+            row[f'{account} std'] = std[k]
+        for k, account in enumerate(accounts, start=len(accounts)):
+            row[f'Cumulative Average {account}'] = unit_statistics.mean[k]
+            row[f'Cumulative Average {account} std'] = std[k]
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+# **************************************************************************************************************************
+#                                                Sec. 7 : Adaptive number of samples
+# **************************************************************************************************************************
+
+# Summary rows whose standard error decides when an adaptive run has converged
+# (FOAK and NOAK columns; the central facility has no LCOE rows)
+CONVERGENCE_ACCOUNTS = ['LCOE', 'TCI']
+
+
+def adaptive_sampling_settings(params):
+    """
+    (relative tolerance, time budget in s) of an adaptive run, or None when the
+    sample count is fixed. Either setting switches adaptive sampling on, and
+    params['Number of Samples'] becomes the maximum number of samples.
+    """
+    tolerance = params.get('Sample Relative Tolerance')
+    time_budget = params.get('Sample Time Budget')
+    if tolerance is None and time_budget is None:
+        return None
+    return tolerance, time_budget
+
+
+def relative_standard_error(accounts, statistics):
+    # Largest standard error / |mean| over the FOAK and NOAK columns of CONVERGENCE_ACCOUNTS
+    n_rows = len(accounts)
+    rows = [j for j, account in enumerate(accounts) if account in CONVERGENCE_ACCOUNTS]
+    columns = rows + [n_rows + j for j in rows]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.nanmax(statistics.standard_error()[columns] / np.abs(statistics.mean[columns]))
+
+
+def run_adaptive_samples(database, params, max_samples, central=False, seed=None, n_workers=1,
+                         tolerance=None, time_budget=None):
+    """
+    Run SAMPLE_BLOCK_SIZE blocks until the relative standard error of the
+    FOAK/NOAK LCOE and TCI means is at most tolerance, the time budget (s) is
+    spent, or max_samples samples have run.
+
+    Blocks are those of run_sharded_samples with the same seed, run n_workers at
+    a time, and convergence is checked after every block in block order, so a
+    run stopped by the tolerance does not depend on the number of workers.
+    Returns the accounts, titles and SampleStatistics of the samples kept.
+    """
+    start_time = time.perf_counter()
+    block_sizes = sample_block_sizes(max_samples)
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(block_sizes))
+    n_workers = max(1, min(int(n_workers or 1), len(block_sizes)))
+
+    statistics = None
+    n_blocks = 0
+    executor = ProcessPoolExecutor(max_workers=n_workers - 1) if n_workers > 1 else None
+    try:
+        while n_blocks < len(block_sizes):
+            # One block per worker; the first runs in this process
+            first, last = n_blocks, min(n_blocks + n_workers, len(block_sizes))
+            futures = [executor.submit(_run_sample_blocks, database, params, block_sizes[k:k + 1],
+                                       seed_sequences[k:k + 1], central, False)
+                       for k in range(first + 1, last)]
+            accounts, titles, blocks = _run_sample_blocks(database, params, block_sizes[first:first + 1],
+                                                          seed_sequences[first:first + 1], central, first == 0)
+            blocks += [future.result()[2][0] for future in futures]
+
+            converged = False
+            for block in blocks:
+                statistics = block if statistics is None else statistics.merge(block)
+                n_blocks += 1
+                converged = (tolerance is not None and statistics.n_samples > 1
+                             and relative_standard_error(accounts, statistics) <= tolerance)
+                if converged:
+                    break
+            if converged or (time_budget is not None and time.perf_counter() - start_time >= time_budget):
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    instrumentation.message(f"Adaptive sampling: {statistics.n_samples} samples, LCOE/TCI relative standard error "
+                            f"{relative_standard_error(accounts, statistics):.2%}")
+    return accounts, titles, statistics
+
+
+def batched_cost_estimate(database, params, central=False, seed=None, n_workers=1):
+    """
+    Batched replacement for the sample loop of bottom_up_cost_estimate
+    (central=False) or bottom_up_cost_estimate_central (central=True).
+
+    Parameters
+    ----------
+    database : pd.DataFrame
+        Escalated cost database with irrelevant accounts removed.
+    params : dict
+        The standard MOUSE params dictionary.
+    seed : int or None
+        Seed of the sample stream. None draws fresh entropy (not reproducible).
+    n_workers : int
+        Number of processes the sample blocks are split over.
+
+    Returns
+    -------
+    pd.DataFrame
+        Account, Account Title, FOAK/NOAK mean and FOAK/NOAK std columns
+        (plus standard errors and the number of samples run when the sample
+        count is adaptive, see adaptive_sampling_settings).
+    """
+    adaptive = adaptive_sampling_settings(params)
+    if adaptive is None:
+        export = _sample_export(database, params, central=central)
+        accounts, titles, statistics = run_sharded_samples(database, params, params['Number of Samples'], central=central,
+                                                           seed=seed, n_workers=n_workers, export=export)
+        if export is not None:
+            export.finish(accounts, titles, params, seed)
+        return cost_summary_table(accounts, titles, statistics, params)
+
+    tolerance, time_budget = adaptive
+    accounts, titles, statistics = run_adaptive_samples(database, params, params['Number of Samples'], central=central,
+                                                        seed=seed, n_workers=n_workers,
+                                                        tolerance=tolerance, time_budget=time_budget)
+    return cost_summary_table(accounts, titles, statistics, params, precision=True)
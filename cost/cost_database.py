@@ -0,0 +1,136 @@
+# Copyright 2025, Battelle Energy Alliance, LLC, ALL RIGHTS RESERVED
+"""
+Compiled (binary) snapshot of the cost database workbook.
+
+Parsing Cost_Database.xlsx with openpyxl is slow, and the cost engine needs
+several of its sheets on every estimate. The first time a workbook is used,
+all of its sheets are parsed once and saved as a pickle snapshot named after
+the SHA-256 of the workbook contents. Later runs (including other processes)
+load the snapshot instead. Editing the workbook changes its hash, so the
+snapshot is rebuilt automatically and the stale one is removed.
+
+Snapshots are stored in a '.cost_database_cache' folder next to the workbook,
+or in the folder given by the MOUSE_COST_DATABASE_CACHE environment variable.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import pandas as pd
+
+CACHE_DIR_ENV_VAR = 'MOUSE_COST_DATABASE_CACHE'
+CACHE_DIR_NAME = '.cost_database_cache'
+# Bump when the snapshot layout changes so old snapshots are ignored
+SNAPSHOT_VERSION = 1
+
+_loaded_databases = {}   # absolute path → (file signature, content hash, {sheet name: DataFrame})
+_lock = threading.Lock()
+
+
+def workbook_hash(file_path):
+    # SHA-256 of the workbook bytes
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _file_signature(file_path):
+    stat = os.stat(file_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def snapshot_path(file_path, content_hash):
+    cache_dir = os.environ.get(CACHE_DIR_ENV_VAR) or os.path.join(os.path.dirname(os.path.abspath(file_path)), CACHE_DIR_NAME)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(cache_dir, f'{stem}-v{SNAPSHOT_VERSION}-{content_hash[:16]}.pkl')
+
+
+def _write_snapshot(path, sheets):
+    # Write to a temporary file in the same folder, then rename, so concurrent
+    # readers never see a partially written snapshot.
+    cache_dir = os.path.dirname(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(sheets, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    # Remove snapshots of older versions of the same workbook
+    workbook_prefix = os.path.basename(path).rsplit('-v', 1)[0] + '-v'
+    for name in os.listdir(cache_dir):
+        if name.startswith(workbook_prefix) and name.endswith('.pkl') and name != os.path.basename(path):
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                pass
+
+
+def _compile(file_path, content_hash):
+    path = snapshot_path(file_path, content_hash)
+    if os.path.exists(path):
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            # Corrupt or unreadable snapshot (e.g. written by an incompatible pandas) — rebuild it
+            pass
+
+    sheets = pd.read_excel(file_path, sheet_name=None)
+    try:
+        _write_snapshot(path, sheets)
+    except OSError as e:
+        # A read-only checkout still works, it just parses the workbook every run
+        print(f"--- warning: could not write the cost database snapshot {path}: {e}")
+    return sheets
+
+
+def load_cost_database(file_path):
+    """
+    Returns all sheets of the cost database workbook as {sheet name: DataFrame}.
+
+    Sheets are loaded from the compiled snapshot (built on first use) and kept in
+    memory for the life of the process. The returned DataFrames are shared, so
+    callers that modify a sheet must use read_cost_database_sheet instead.
+    """
+    key = os.path.abspath(file_path)
+    signature = _file_signature(file_path)
+    with _lock:
+        loaded = _loaded_databases.get(key)
+        if loaded is None or loaded[0] != signature:
+            content_hash = workbook_hash(file_path)
+            if loaded is not None and loaded[1] == content_hash:
+                sheets = loaded[2]   # touched but unchanged
+            else:
+                sheets = _compile(file_path, content_hash)
+            loaded = (signature, content_hash, sheets)
+            _loaded_databases[key] = loaded
+    return loaded[2]
+
+
+def read_cost_database_sheet(file_path, sheet_name):
+    # Drop-in replacement for pd.read_excel(file_path, sheet_name=sheet_name) on the cost database
+    sheets = load_cost_database(file_path)
+    if sheet_name not in sheets:
+        raise ValueError(f"Worksheet named '{sheet_name}' not found in {file_path}")
+    return sheets[sheet_name].copy()
+
+
+def cost_database_hash(file_path):
+    # Content hash of the workbook, as used to name its snapshot
+    load_cost_database(file_path)
+    return _loaded_databases[os.path.abspath(file_path)][1]
+
+
+def clear_cost_database_cache():
+    # Drop the in-memory sheets (the on-disk snapshots are kept)
+    with _lock:
+        _loaded_databases.clear()
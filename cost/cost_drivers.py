@@ -3,6 +3,7 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from cost.code_of_account_processing import get_estimated_cost_column
+from cost.levelized_cost import LevelizedCost
 
 
 def is_double_digit_excluding_multiples_of_10(val):
@@ -73,25 +74,11 @@ def energy_cost_levelized_per_acct(params, capital_cost, ann_cost):
     or as `ann_cost` for accounts 70–89 (recurring annual costs). Pass 0 for the
     other argument. Both arguments may be scalars or pandas Series.
 
-    This mirrors the same discounted-cash-flow logic used by energy_cost_levelized
-    in non_direct_cost.py but operates on a single account at a time so the
+    This uses the same levelized cost kernel as energy_cost_levelized in
+    non_direct_cost.py but operates on a single account at a time so the
     contribution of each cost driver to the total LCOE can be isolated.
     """
-    sum_cost = 0
-    sum_elec = 0
-    for i in range(1 + params['Levelization Period']):
-        if i == 0:
-            year_cap  = capital_cost
-            year_ann  = 0
-            year_elec = 0
-        else:
-            year_cap  = 0
-            year_ann  = ann_cost
-            year_elec = params['Power MWe'] * params['Capacity Factor'] * 365 * 24  # MWh
-        discount = (1 + params['Discount Rate']) ** i
-        sum_cost += (year_cap + year_ann) / discount
-        sum_elec += year_elec / discount
-    return sum_cost / sum_elec
+    return LevelizedCost.from_params(params).lcoe(capital_cost, ann_cost)
 
 
 def cost_drivers_estimate(df, params):
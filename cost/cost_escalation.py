@@ -1,51 +1,96 @@
 # Copyright 2025, Battelle Energy Alliance, LLC, ALL RIGHTS RESERVED
 import pandas as pd
 import numpy as np
+from cost.cost_database import read_cost_database_sheet, load_cost_database, cost_database_hash
 
 # **************************************************************************************************************************
 #                                                Sec. 0 :Inflation
 # **************************************************************************************************************************
 
 
-def calculate_inflation_multiplier(file_path, base_dollar_year, cost_type, escalation_year):
-    
-    base_dollar_year = int(base_dollar_year)
-    escalation_year  = int(escalation_year)
-    
-    df = pd.read_excel(file_path, sheet_name="Inflation Adjustment")
-    # print("Shape:", df.shape)
-    # print("First 5 rows raw:")
-    # print(df.head(5))
-    # print("\nYear column raw values:")
-    # print(df['Year'].tolist())
-
-    df = df.dropna(subset=['Year'])
-    df['Year'] = df['Year'].astype(int)
-
-    # --- DEBUG: remove after issue is resolved ---
-    # print("Year column dtype:", df['Year'].dtype)
-    # print("Year values:", df['Year'].values)
-    # print("Looking for:", base_dollar_year, type(base_dollar_year))
-
-    if base_dollar_year not in df['Year'].values:
-        print(f"\033[91mBase Year : {base_dollar_year} not found in the Excel file.\033[0m")
-
-    if escalation_year not in df['Year'].values:
-        print(f"\033[91mEscalation Year:  {escalation_year} not found in the Excel file.\033[0m")
+class InflationTable:
+    """
+    The 'Inflation Adjustment' sheet as a (dollar year × cost type) array.
 
-    if cost_type == 'NA':
-        multiplier = 1
-    else:    
-        multiplier = df.loc[df['Year'] == base_dollar_year, cost_type].values[0] / \
-                     df.loc[df['Year'] == escalation_year, cost_type].values[0]
+    index[year_row[y], type_column[t]] is the escalation index of cost type t in
+    dollar year y. The multiplier that brings a cost from a base dollar year to a
+    target year is index[base, type] / index[target, type]; cost type 'NA' is never
+    escalated (multiplier 1).
+    """
+
+    def __init__(self, inflation_df):
+        inflation_df = inflation_df.dropna(subset=['Year'])
+        self.years = inflation_df['Year'].astype(int).to_numpy()
+        self.cost_types = [col for col in inflation_df.columns if col != 'Year']
+        self.index = inflation_df[self.cost_types].to_numpy(dtype=float)
+        self.year_row = {year: i for i, year in enumerate(self.years)}
+        self.type_column = {cost_type: j for j, cost_type in enumerate(self.cost_types)}
+
+    def _year_rows(self, years, label):
+        missing = sorted({int(year) for year in years if int(year) not in self.year_row})
+        for year in missing:
+            print(f"\033[91m{label} : {year} not found in the Excel file.\033[0m")
+        if missing:
+            raise KeyError(f"{label}(s) {missing} not found in the 'Inflation Adjustment' sheet.")
+        return np.array([self.year_row[int(year)] for year in years], dtype=int)
+
+    def multipliers(self, base_dollar_years, cost_types, escalation_years):
+        """
+        Escalation multipliers for many (base dollar year, cost type) pairs and
+        one or more target years in a single gather.
+
+        Returns an array of shape (len(escalation_years), len(base_dollar_years)),
+        or (len(base_dollar_years),) when escalation_years is a single year.
+        """
+        single_year = np.ndim(escalation_years) == 0
+        escalation_years = np.atleast_1d(escalation_years)
+        cost_types = list(cost_types)
+
+        not_escalated = np.array([cost_type == 'NA' for cost_type in cost_types], dtype=bool)
+        unknown = sorted({str(t) for t, na in zip(cost_types, not_escalated) if not na and t not in self.type_column})
+        if unknown:
+            raise KeyError(f"Cost type(s) {unknown} not found in the 'Inflation Adjustment' sheet.")
+        type_cols = np.array([0 if na else self.type_column[t] for t, na in zip(cost_types, not_escalated)], dtype=int)
+
+        base_rows = np.zeros(len(cost_types), dtype=int)
+        base_rows[~not_escalated] = self._year_rows(np.asarray(base_dollar_years)[~not_escalated], 'Base Year')
+        target_rows = self._year_rows(escalation_years, 'Escalation Year')
+
+        multipliers = self.index[base_rows, type_cols] / self.index[target_rows[:, np.newaxis], type_cols]
+        multipliers[:, not_escalated] = 1
+        return multipliers[0] if single_year else multipliers
 
-    return multiplier
+
+_inflation_tables = {}   # workbook content hash → InflationTable
+
+
+def load_inflation_table(file_path):
+    # Built once per workbook version and shared by every escalation
+    content_hash = cost_database_hash(file_path)
+    if content_hash not in _inflation_tables:
+        _inflation_tables[content_hash] = InflationTable(load_cost_database(file_path)["Inflation Adjustment"])
+    return _inflation_tables[content_hash]
+
+
+def calculate_inflation_multiplier(file_path, base_dollar_year, cost_type, escalation_year):
+    if cost_type == 'NA':
+        return 1
+    inflation_table = load_inflation_table(file_path)
+    return inflation_table.multipliers([base_dollar_year], [cost_type], int(escalation_year))[0]
 
 
 # # **************************************************************************************************************************
 # #                                                Sec. 1 : Baseline Costs (dollars)
 # # **************************************************************************************************************************
 
+# Cost columns that may hold either a number or the name of a parameter
+COST_COLUMNS = ['Fixed Cost ($)',
+                'Fixed Cost Low End',
+                'Fixed Cost High End',
+                'Unit Cost',
+                'Unit Cost Low End',
+                'Unit Cost High End']
+
 
 def resolve_value(val, params):
     """
@@ -65,76 +110,126 @@ def resolve_value(val, params):
     return np.nan
 
 
-def escalate_cost_database(file_name, escalation_year, params, sheet_name="Cost Database"):
+class CompiledCostSheet:
     """
-    Reads an Excel file with a specified sheet name into a Pandas DataFrame.
-    Escalates fixed and unit costs, allowing cost fields to reference params.
+    Numeric form of a cost database sheet.
+
+    values[col] is the float array of a cost column with NaN in the cells that
+    name a parameter; param_refs maps each parameter name to the (column, rows)
+    cells that reference it, so resolving a params dict is a few array writes.
     """
 
-    # Read the Excel file into a Pandas DataFrame
-    df = pd.read_excel(file_name, sheet_name=sheet_name)
-
-    # Helper function to resolve numeric or parameter-referenced values
-    def resolve_value(val, params):
-        if pd.isna(val):
-            return np.nan
-        if isinstance(val, (int, float, np.number)):
-            return float(val)
-        if isinstance(val, str):
-            if val in params:
-                return float(params[val])
-            else:
-                raise KeyError(f"Parameter '{val}' not found in params.")
-        return np.nan
+    def __init__(self, sheet_df):
+        self.sheet_df = sheet_df
+        self.values = {}
+        self.param_refs = {}
+        for col in COST_COLUMNS:
+            cells = sheet_df[col].to_numpy(dtype=object)
+            is_name = np.array([isinstance(val, str) for val in cells], dtype=bool)
+            numeric = np.full(len(cells), np.nan)
+            numeric[~is_name] = [resolve_value(val, {}) for val in cells[~is_name]]
+            self.values[col] = numeric
+            for name in np.unique(cells[is_name]).tolist():
+                self.param_refs.setdefault(name, []).append((col, np.flatnonzero(cells == name)))
+
+    def resolve(self, params):
+        # {cost column: float array} with parameter names replaced by their values
+        resolved = {col: values.copy() for col, values in self.values.items()}
+        for name, cells in self.param_refs.items():
+            if name not in params:
+                raise KeyError(f"Parameter '{name}' not found in params.")
+            for col, rows in cells:
+                resolved[col][rows] = float(params[name])
+        return resolved
+
+
+_compiled_sheets = {}   # (workbook content hash, sheet name) → CompiledCostSheet
+
+
+def load_compiled_cost_sheet(file_name, sheet_name):
+    key = (cost_database_hash(file_name), sheet_name)
+    if key not in _compiled_sheets:
+        _compiled_sheets[key] = CompiledCostSheet(read_cost_database_sheet(file_name, sheet_name))
+    return _compiled_sheets[key]
+
+
+def _escalated_sheets(file_name, escalation_years, params, sheet_names):
+    """
+    {sheet name: {escalation year: escalated DataFrame}} of several cost database
+    sheets. The inflation multipliers of all rows of all sheets and all target
+    years come from one gather on the InflationTable, and the extra economic
+    parameters are read once.
+    """
+    escalation_years = [int(year) for year in np.atleast_1d(escalation_years)]
+    compiled = [load_compiled_cost_sheet(file_name, sheet_name) for sheet_name in sheet_names]
+    resolved = [sheet.resolve(params) for sheet in compiled]
+
+    # Only rows with a fixed or unit cost are escalated; the others get a multiplier of 0
+    costed = [~np.isnan(values['Fixed Cost ($)']) | ~np.isnan(values['Unit Cost']) for values in resolved]
+    all_costed = np.concatenate(costed)
+    multipliers = np.zeros((len(escalation_years), len(all_costed)))
+    if all_costed.any():
+        multipliers[:, all_costed] = load_inflation_table(file_name).multipliers(
+            np.concatenate([sheet.sheet_df['Dollar Year'].to_numpy()[rows] for sheet, rows in zip(compiled, costed)]),
+            np.concatenate([sheet.sheet_df['Type'].to_numpy()[rows] for sheet, rows in zip(compiled, costed)]),
+            escalation_years)
+    bounds = np.cumsum([0] + [len(rows) for rows in costed])
+
+    escalated = {}
+    for k, (sheet_name, sheet, values) in enumerate(zip(sheet_names, compiled, resolved)):
+        escalated[sheet_name] = {}
+        for year, multiplier in zip(escalation_years, multipliers[:, bounds[k]:bounds[k + 1]]):
+            df = sheet.sheet_df.copy()
+            for col, col_values in values.items():
+                df[col] = col_values
+            df['inflation_multiplier'] = multiplier
+
+            # Inflation-adjusted columns
+            df['Adjusted Fixed Cost ($)'] = df['Fixed Cost ($)'] * df['inflation_multiplier']
+            df['Adjusted Fixed Cost Low End ($)'] = df['Fixed Cost Low End'] * df['inflation_multiplier']
+            df['Adjusted Fixed Cost High End ($)'] = df['Fixed Cost High End'] * df['inflation_multiplier']
+
+            df['Adjusted Unit Cost ($)'] = df['Unit Cost'] * df['inflation_multiplier']
+            df['Adjusted Unit Cost Low End ($)'] = df['Unit Cost Low End'] * df['inflation_multiplier']
+            df['Adjusted Unit Cost High End ($)'] = df['Unit Cost High End'] * df['inflation_multiplier']
+            escalated[sheet_name][year] = df
 
-    # Resolve all cost columns to numeric values
-    cost_columns = [
-        'Fixed Cost ($)',
-        'Fixed Cost Low End',
-        'Fixed Cost High End',
-        'Unit Cost',
-        'Unit Cost Low End',
-        'Unit Cost High End'
-    ]
-
-    for col in cost_columns:
-        df[col] = df[col].apply(lambda x: resolve_value(x, params))
-
-    # Initialize an empty list to store inflation multipliers
-    inflation_multipliers = []
-
-    # Iterate through each row in the DataFrame
-    for _, row in df.iterrows():
-        if not pd.isna(row['Fixed Cost ($)']) or not pd.isna(row['Unit Cost']):
-            multiplier = calculate_inflation_multiplier(
-                file_name,
-                row['Dollar Year'],
-                row['Type'],
-                escalation_year
-            )
-        else:
-            multiplier = 0
+    # Read extra economic parameters (no escalation)
+    df_extra_params = load_cost_database(file_name)["Economics Parameters"]
+    extra_economic_parameters = dict(zip(df_extra_params["Parameter"], df_extra_params["Value"]))
 
-        inflation_multipliers.append(multiplier)
+    for parameter, value in extra_economic_parameters.items():
+        params[parameter] = value
 
-    # Assign the inflation multiplier column
-    df['inflation_multiplier'] = inflation_multipliers
+    return escalated
 
-    # Inflation-adjusted columns
-    df['Adjusted Fixed Cost ($)'] = df['Fixed Cost ($)'] * df['inflation_multiplier']
-    df['Adjusted Fixed Cost Low End ($)'] = df['Fixed Cost Low End'] * df['inflation_multiplier']
-    df['Adjusted Fixed Cost High End ($)'] = df['Fixed Cost High End'] * df['inflation_multiplier']
 
-    df['Adjusted Unit Cost ($)'] = df['Unit Cost'] * df['inflation_multiplier']
-    df['Adjusted Unit Cost Low End ($)'] = df['Unit Cost Low End'] * df['inflation_multiplier']
-    df['Adjusted Unit Cost High End ($)'] = df['Unit Cost High End'] * df['inflation_multiplier']
+def escalate_cost_database_years(file_name, escalation_years, params, sheet_name="Cost Database"):
+    """
+    Escalates fixed and unit costs of a cost database sheet to several target
+    years at once. Cost fields may reference params by name.
 
-    # Read extra economic parameters (no escalation)
-    df_extra_params = pd.read_excel(file_name, sheet_name="Economics Parameters")
-    extra_economic_parameters = dict(zip(df_extra_params["Parameter"], df_extra_params["Value"]))
+    Returns {escalation year: escalated DataFrame}. The inflation multipliers of
+    all rows and all target years come from one gather on the InflationTable.
+    """
+    return _escalated_sheets(file_name, escalation_years, params, [sheet_name])[sheet_name]
 
-    for parameter, value in extra_economic_parameters.items():
-        params[parameter] = value
 
-    return df
+def escalate_cost_database_sheets(file_name, escalation_year, params, sheet_names):
+    """
+    Escalates several cost database sheets (e.g. the reactor and the central
+    facility sheets) in one pass: one inflation gather for all their rows and one
+    read of the extra economic parameters. Returns {sheet name: escalated DataFrame}.
+    """
+    escalation_year = int(escalation_year)
+    escalated = _escalated_sheets(file_name, [escalation_year], params, list(sheet_names))
+    return {sheet_name: years[escalation_year] for sheet_name, years in escalated.items()}
+
 
+def escalate_cost_database(file_name, escalation_year, params, sheet_name="Cost Database"):
+    """
+    Reads a cost database sheet into a Pandas DataFrame.
+    Escalates fixed and unit costs, allowing cost fields to reference params.
+    """
+    escalation_year = int(escalation_year)
+    return escalate_cost_database_years(file_name, [escalation_year], params, sheet_name=sheet_name)[escalation_year]
@@ -1,108 +1,53 @@
 # Copyright 2025, Battelle Energy Alliance, LLC, ALL RIGHTS RESERVED
+import functools
 import os
 import pandas as pd
 import numpy as np
 import csv
-from cost.cost_escalation import escalate_cost_database
-from cost.code_of_account_processing import remove_irrelevant_account, get_estimated_cost_column, find_children_accounts, create_cost_dictionary
-from cost.cost_scaling import scale_cost, scale_redundant_BOP_and_primary_loop, scale_central_facility_cost
+from cost.cost_escalation import escalate_cost_database, escalate_cost_database_sheets
+from cost.code_of_account_processing import (remove_irrelevant_account, get_estimated_cost_column, create_cost_dictionary,
+                                              compile_account_hierarchy)
+from cost.cost_scaling import (scale_cost, scale_redundant_BOP_and_primary_loop, scale_central_facility_cost,
+                               calculate_learning_multipliers)
 from cost.non_direct_cost import (validate_tax_credit_params, calculate_accounts_31_32_75_82_cost,
                                    calculate_decommissioning_cost, calculate_high_level_capital_costs,
                                    calculate_TCI, energy_cost_levelized,
                                    calculate_accounts_31_32_75_central_facility_cost,
                                    calculate_high_level_capital_costs_central_facility, calculate_TCI_central)
-from cost.params_registry import PARAMS_REGISTRY, GROUP_ORDER
+from cost.report_writer import PARAMETER_COLUMNS, parameter_table, write_cost_report
 from reactor_engineering_evaluation.operation import reactor_operation
 from cost.cost_drivers import cost_drivers_estimate
+from cost.batched_engine import (batched_cost_estimate, adaptive_sampling_settings, learning_curve_estimate,
+                                 fleet_estimate, joint_cost_estimate, _stage)
+from cost.sample_statistics import new_cost_statistics, cost_summary_table
+from cost.sampling import sampling_strategy, CostDistributions
+from cost.cost_database import cost_database_hash
+from cost.estimate_cache import EstimateCache, estimate_key
+from cost.instrumentation import active_report, instrument_cost_run, message
+
+# Values accepted by params['Cost Engine']
+COST_ENGINES = ('Batched', 'Per-Sample')
+
+
+def update_high_level_costs(scaled_cost, option, sample, hierarchy=None):
+    # Roll up the accounts of one pass (see AccountHierarchy.roll_up) on the
+    # FOAK/NOAK columns of a single sample. The hierarchy is compiled once per
+    # cost sheet, so passing it in only saves the cache lookup.
+    if hierarchy is None:
+        hierarchy = compile_account_hierarchy(scaled_cost)
+    foak_col = get_estimated_cost_column(scaled_cost, 'F')
+    noak_col = get_estimated_cost_column(scaled_cost, 'N')
+
+    foak = scaled_cost[foak_col].to_numpy(dtype=float, copy=True)[np.newaxis, :]
+    noak = scaled_cost[noak_col].to_numpy(dtype=float, copy=True)[np.newaxis, :]
+    no_subaccounts_list = hierarchy.roll_up(foak, noak, option)
+    scaled_cost[foak_col] = foak[0]
+    scaled_cost[noak_col] = noak[0]
 
-
-
-def calculate_high_level_accounts_cost(df, target_level, option, FOAK_or_NOAK):
-    cost_column = get_estimated_cost_column(df, FOAK_or_NOAK)
-
-    if option == "base":
-        valid_prefixes = ('1', '2')
-    elif option == "other":
-        valid_prefixes = ('3', '4', '5')
-    elif option == "finance":
-        valid_prefixes = ('6')
-    elif option == "annual":
-        valid_prefixes = ('7', '8')
-    else:
-        raise ValueError("Invalid option. Choose 'base' or 'other' or 'finance' or 'annual'.")
-
-    # Replace per-row iterrows with a vectorized eligibility mask. Only
-    # the rows that actually need updating (typically a handful) enter
-    # the Python loop — and even there the children sum uses pandas
-    # vectorized .sum() instead of a per-child Python add.
-    accounts_str = df['Account'].astype(str)
-    mask = (
-        accounts_str.str.startswith(valid_prefixes)
-        & (df['Level'] == target_level)
-        & df[cost_column].isna()
-        & df['Children Accounts'].notna()
-    )
-
-    if not mask.any():
-        return df
-
-    children_col = df['Children Accounts']
-    for index in df.index[mask]:
-        children_idxs = [int(x) for x in children_col.at[index].split(',')]
-        df.at[index, cost_column] = df.loc[children_idxs, cost_column].sum()
-
-    return df
-
-
-def update_high_level_costs(scaled_cost, option, sample):
-    df_with_children_accounts = find_children_accounts(scaled_cost)
-    no_subaccounts_list = []
-
-    if option == "base":
-        valid_prefixes = ('1', '2')
-    elif option == "other":
-        valid_prefixes = ('3', '4', '5')
-    elif option == "finance": 
-        valid_prefixes = ('6')  
-    elif option == "annual": 
-        valid_prefixes = ('7', '8')      
-    else:
-        raise ValueError("Invalid option. Choose 'base' or 'other' or 'finance' or 'annual'.")
-
-    # Hoist column-name lookups out of the inner row loop — they were
-    # being called 4× per row × ~100 rows × 5 levels = ~2000 redundant
-    # column-name searches per update_high_level_costs call.
-    foak_col = get_estimated_cost_column(df_with_children_accounts, 'F')
-    noak_col = get_estimated_cost_column(df_with_children_accounts, 'N')
-
-    for level in range(4, -1, -1):
-        df_updated = calculate_high_level_accounts_cost(df_with_children_accounts, level, option, 'F')
-        df_updated_2 = calculate_high_level_accounts_cost(df_updated, level, option, 'N')
-
-        # Vectorized replacement for the per-row iterrows loop. Build masks
-        # for FOAK and NOAK separately, then use bulk df.loc[mask, col] = 0
-        # writes. Both masks read the same pre-mutation state so order is
-        # irrelevant.
-        accounts_str = df_updated_2['Account'].astype(str)
-        common_mask = (
-            accounts_str.str.startswith(valid_prefixes)
-            & (df_updated_2['Level'] == level)
-            & df_updated_2['Children Accounts'].isna()
-        )
-        foak_mask = common_mask & df_updated_2[foak_col].isna()
-        noak_mask = common_mask & df_updated_2[noak_col].isna()
-
-        if foak_mask.any():
-            df_updated_2.loc[foak_mask, foak_col] = 0
-            no_subaccounts_list.extend(df_updated_2.loc[foak_mask, 'Account'].tolist())
-        if noak_mask.any():
-            df_updated_2.loc[noak_mask, noak_col] = 0
-            no_subaccounts_list.extend(df_updated_2.loc[noak_mask, 'Account'].tolist())
-    
     if sample == 0:
         if no_subaccounts_list:
-            print(f"Warning: The following accounts do not have any subaccounts: {', '.join(map(str, set(no_subaccounts_list))) }")
-    return df_updated_2
+            message(f"Warning: The following accounts do not have any subaccounts: {', '.join(map(str, set(no_subaccounts_list))) }")
+    return scaled_cost
 
 
 def save_params_to_excel_file(excel_file, params):
@@ -112,143 +57,14 @@ def save_params_to_excel_file(excel_file, params):
     with units, descriptions, and source (User Input vs Calculated) for each parameter.
     Array parameters are summarized (BOL, EOL, min, max) rather than shown as raw lists.
     Parameters not found in the registry are placed in an 'Uncategorized' group with a warning.
+    Full reports (with array params stored columnar) are written by report_writer.write_cost_report.
     """
-
-    def format_value(val):
-        """
-        Format a single scalar value for display.
-        Converts numpy scalar types to native Python types to prevent
-        Excel file corruption when openpyxl serializes the values.
-        """
-        # Handle complex types that openpyxl can't serialize
-        if isinstance(val, dict):
-            return str(val)
-        if isinstance(val, np.ndarray):
-            return str(val.tolist())
-        # Handle numpy scalars first (before float check, since np.float64 is a subclass of float)
-        if isinstance(val, np.floating):
-            if np.isnan(val):
-                return 'N/A'
-            return float(val)
-        if isinstance(val, np.integer):
-            return int(val)
-        if isinstance(val, np.bool_):
-            return str(bool(val)).upper()
-        # Handle native Python types
-        if isinstance(val, float) and np.isnan(val):
-            return 'N/A'
-        if isinstance(val, bool):
-            return str(val).upper()
-        return val
-
-    def handle_array(name, val, mode, units, description, source):
-        """
-        Expand an array parameter into multiple display rows based on mode:
-          'summary' → BOL, EOL, min, max
-          'steps'   → first step, last step, number of steps
-          'as_is'   → single row with the list as a string
-        Returns a list of (display_name, value, units, description, source) tuples.
-        """
-        rows = []
-        if not isinstance(val, (list, tuple)) or len(val) == 0:
-            rows.append((name, format_value(val), units, description, source))
-            return rows
-
-        if mode == 'summary':
-            rows.append((f'{name} (BOL)',   float(round(val[0], 6)),   units, f'{description} — beginning of life', source))
-            rows.append((f'{name} (EOL)',   float(round(val[-1], 6)),  units, f'{description} — end of life',       source))
-            rows.append((f'{name} (min)',   float(round(min(val), 6)), units, f'{description} — minimum value',     source))
-            rows.append((f'{name} (max)',   float(round(max(val), 6)), units, f'{description} — maximum value',     source))
-        elif mode == 'steps':
-            rows.append((f'{name} (first)', format_value(val[0]),  units, f'{description} — first step',     source))
-            rows.append((f'{name} (last)',  format_value(val[-1]), units, f'{description} — last step',      source))
-            rows.append((f'{name} (count)', len(val),              '',    f'{description} — number of steps', source))
-        elif mode == 'as_is':
-            rows.append((name, str(val), units, description, source))
-        else:
-            rows.append((name, str(val), units, description, source))
-        return rows
-
-    # ---------------------------------------------------------------
-    # Build grouped rows from params using the registry
-    # ---------------------------------------------------------------
-    groups = {g: [] for g in GROUP_ORDER}
-    params_dict = dict(params)
-
-    for param_name, value in sorted(params_dict.items()):  # alphabetical within each group
-        entry = PARAMS_REGISTRY.get(param_name)
-
-        if entry is None:
-            # Not in registry — place in Uncategorized with a warning marker
-            if isinstance(value, (list, tuple)) and len(value) > 10:
-                display_value = f'[list of {len(value)} items — see input file]'
-            else:
-                display_value = format_value(value)
-            groups['Uncategorized'].append((
-                param_name,
-                display_value,
-                '',
-                '--- Not in params registry. Please add to cost/params_registry.py ---',
-                'Unknown'
-            ))
-            continue
-
-        # Skip hidden parameters
-        if entry.get('hidden', False):
-            continue
-
-        # Tax Rate is only relevant when PTC is used (needed for gross-up calculation)
-        # Skip it if PTC is not defined in params
-        if param_name == 'Tax Rate' and 'PTC credit value' not in params_dict:
-            continue
-
-        units       = entry.get('units', '')
-        description = entry.get('description', '')
-        source      = entry.get('source', '')
-        array_mode  = entry.get('array_mode', None)
-        group       = entry.get('group', 'Uncategorized')
-
-        if group not in groups:
-            group = 'Uncategorized'
-
-        if array_mode is not None and isinstance(value, (list, tuple)):
-            rows = handle_array(param_name, value, array_mode, units, description, source)
-            groups[group].extend(rows)
-        else:
-            groups[group].append((param_name, format_value(value), units, description, source))
-
-    # ---------------------------------------------------------------
-    # Build the final list of rows with group headers and separators
-    # ---------------------------------------------------------------
-    all_rows = []
-    columns = ['Group', 'Parameter', 'Value', 'Units', 'Description', 'Source']
-
-    for group_name in GROUP_ORDER:
-        rows = groups.get(group_name, [])
-        if not rows:
-            continue  # skip empty groups
-
-        # Group header row
-        all_rows.append([f'--- {group_name.upper()} ---', '', '', '', '', ''])
-
-        for (pname, pval, punits, pdesc, psource) in rows:
-            all_rows.append([group_name, pname, pval, punits, pdesc, psource])
-
-        # Blank separator row between groups
-        all_rows.append(['', '', '', '', '', ''])
-
-    # ---------------------------------------------------------------
-    # Write to the Parameters sheet using the existing ExcelWriter
-    # ---------------------------------------------------------------
-    df = pd.DataFrame(all_rows, columns=columns)
+    rows, _, total_params, active_groups = parameter_table(params)
+    df = pd.DataFrame(rows, columns=PARAMETER_COLUMNS)
     df.to_excel(excel_file, sheet_name='Parameters', index=False)
-
-    total_params = sum(len(rows) for rows in groups.values())
-    active_groups = sum(1 for g in GROUP_ORDER if groups.get(g))
     print(f"\n\nParameters saved — {total_params} entries across {active_groups} groups.\n\n")
 
 
-
 def transform_dataframe(df):
     numerical_columns = df.select_dtypes(include=[np.number]).columns
     df = df.loc[~(df[numerical_columns] == 0).all(axis=1)]
@@ -259,187 +75,334 @@ def transform_dataframe(df):
     return df
 
 
-def learning_rate_multiplier(learning_rate, number_of_units):
-    return pow(1-learning_rate, np.log2(min(100, number_of_units)))
-
-
 def FOAK_to_NOAK(df, params):
-    # Additional cost scaling based on an assumed learning rate.
-    # Learning rate and cost multiplier are based on
-    # DOI: 10.1080/00295450.2023.2206779.
-    # Cost multiplier is capped at the 100th unit for any component.
-    if 'NOAK Unit Number' not in params.keys():
-        # Use the default value if 'NOAK Unit Number' is not specified.
-        params['NOAK Unit Number'] = 10
-        # Defaults to approximately the 10th unit, with 20 (2×10) units assumed for onsite learning.
-    params['Assumed Number Of Units For Onsite Learning'] = params['NOAK Unit Number'] * 2
-    
-    for multiplier_type in ['No Learning', 
-                            'Licensing Learning', 
-                            'Factory Primary Structure', 
-                            'Factory Drums',
-                            'Factory Other', 
-                            'Factory Be',
-                            'Factory BeO',
-                            'Non-nuclear off-the-shelf']:
-        params[f"{multiplier_type} Cost Multiplier"] = learning_rate_multiplier(params[f'{multiplier_type}'], 
-                                                                                params['NOAK Unit Number'])
-    params['Onsite Learning Cost Multiplier'] = learning_rate_multiplier(params['Onsite Learning'], 
-                                                                         params['Assumed Number Of Units For Onsite Learning'])
-
-    def get_multiplier(multiplier_type):
-        if multiplier_type in ['No Learning', 
-                               'Licensing Learning', 
-                               'Factory Primary Structure', 
-                               'Factory Drums',
-                               'Factory Other', 
-                               'Factory Be',
-                               'Factory BeO',
-                               'Onsite Learning',
-                               'Non-nuclear off-the-shelf']:
-            return params[f"{multiplier_type} Cost Multiplier"]
-        else:
-            return np.nan
-    
-    df['Multiplier'] = df['FOAK to NOAK Multiplier Type'].apply(get_multiplier)
+    multipliers = calculate_learning_multipliers(params)
+    df['Multiplier'] = df['FOAK to NOAK Multiplier Type'].map(lambda multiplier_type: multipliers.get(multiplier_type, np.nan))
     foak_col = get_estimated_cost_column(df, 'F')
     noak_column = foak_col.replace("FOAK", "NOAK")
     df[noak_column] = df['Multiplier'] * df[foak_col]
     return df
 
 
-def reorder_dataframe(df):
-    first_columns = ['Account', 'Account Title']
-    other_columns = [col for col in df.columns if col not in first_columns]
-    new_column_order = first_columns + other_columns
-    df = df[new_column_order]
-    return df
-
+def select_cost_engine(params):
+    # 'Batched' (default) runs all Monte Carlo samples at once on NumPy arrays (cost/batched_engine.py).
+    # 'Per-Sample' runs the original loop that rebuilds the cost DataFrame for every sample.
+    cost_engine = params.get('Cost Engine', 'Batched')
+    if cost_engine not in COST_ENGINES:
+        raise ValueError(f"Unknown 'Cost Engine' {cost_engine!r}. Choose one of: {', '.join(COST_ENGINES)}.")
+    # Quasi-random designs span all samples of a block, so only the batched engine can draw them
+    if cost_engine == 'Per-Sample' and sampling_strategy(params) != 'Random':
+        raise ValueError(f"'Sampling Strategy' {params['Sampling Strategy']!r} requires the 'Batched' cost engine.")
+    if cost_engine == 'Per-Sample' and adaptive_sampling_settings(params) is not None:
+        raise ValueError("An adaptive number of samples ('Sample Relative Tolerance' / 'Sample Time Budget') "
+                         "requires the 'Batched' cost engine.")
+    # Exported samples are written block by block at their position in the run
+    if params.get('Sample Export') and (cost_engine == 'Per-Sample' or adaptive_sampling_settings(params) is not None):
+        raise ValueError("'Sample Export' requires the 'Batched' cost engine and a fixed 'Number of Samples'.")
+    return cost_engine
+
+
+def _sampling_settings(params, seed, n_workers):
+    # Explicit arguments take precedence over params
+    if seed is None:
+        seed = params.get('Random Seed')
+    if n_workers is None:
+        n_workers = params.get('Number of Workers', 1)
+    return seed, n_workers
+
+
+def _accumulate_sample(statistics, Final_COA, params, rng):
+    # Streams one sample's FOAK/NOAK columns into the running statistics, so
+    # per-sample tables are not kept around until the end of the run.
+    FOAK_column = get_estimated_cost_column(Final_COA, 'F')
+    NOAK_column = get_estimated_cost_column(Final_COA, 'N')
+    if statistics is None:
+        statistics = new_cost_statistics(len(Final_COA), params)
+    sample = np.concatenate([Final_COA[FOAK_column].to_numpy(dtype=float), Final_COA[NOAK_column].to_numpy(dtype=float)])
+    return statistics.update(sample[np.newaxis, :], rng=rng)
+
+
+def _per_sample_estimate(database, params, seed):
+    # The per-sample engine is serial; it draws every sample from one Generator
+    rng = np.random.default_rng(seed)
+    hierarchy = compile_account_hierarchy(database)
+    distributions = CostDistributions(database)
+    statistics = None
+    for i in range(params['Number of Samples']):
+        if (i + 1) % 100 == 0:
+            print(f"\n\nSample # {i+1}")
 
-def bottom_up_cost_estimate(cost_database_filename, params):
+        # Stages are named as in batched_engine.cost_stages (see instrumentation.py)
+        with _stage('Scaling'):
+            scaled_cost = scale_cost(database, params, rng=rng, distributions=distributions)
+            scaled_cost = scale_redundant_BOP_and_primary_loop(scaled_cost, params)
+        with _stage('FOAK to NOAK'):
+            NOAK_COA = FOAK_to_NOAK(scaled_cost, params)
+
+        with _stage('Roll-up base'):
+            updated_cost = update_high_level_costs(scaled_cost, 'base', i, hierarchy)
+        with _stage('Indirect and annualized costs'):
+            updated_cost_with_indirect_cost = calculate_accounts_31_32_75_82_cost(updated_cost, params)
+        with _stage('Decommissioning'):
+            cost_with_decommissioning = calculate_decommissioning_cost(updated_cost_with_indirect_cost, params)
+        with _stage('Roll-up other'):
+            updated_accounts_10_40 = update_high_level_costs(cost_with_decommissioning, 'other', i, hierarchy)
+        with _stage('Capital costs'):
+            high_Level_capital_cost = calculate_high_level_capital_costs(updated_accounts_10_40, params)
+
+        with _stage('Roll-up finance'):
+            updated_accounts_10_60 = update_high_level_costs(high_Level_capital_cost, 'finance', i, hierarchy)
+        with _stage('TCI'):
+            TCI = calculate_TCI(updated_accounts_10_60, params)
+        with _stage('Roll-up annual'):
+            updated_accounts_70_80 = update_high_level_costs(TCI, 'annual', i, hierarchy)
+        with _stage('LCOE'):
+            Final_COA = energy_cost_levelized(params, updated_accounts_70_80)
+
+        with _stage('Statistics'):
+            statistics = _accumulate_sample(statistics, Final_COA, params, rng)
+
+    return cost_summary_table(Final_COA['Account'], Final_COA['Account Title'], statistics, params)
+
+
+def _instrumented(estimate):
+    # With params['Instrumentation Report'] (a JSON file name), the estimate writes the
+    # CostRunReport of its stages to that file (see instrumentation.py)
+    @functools.wraps(estimate)
+    def instrumented_estimate(cost_database_filename, params, *args, **kwargs):
+        filename = params.get('Instrumentation Report')
+        if not filename or active_report() is not None:
+            return estimate(cost_database_filename, params, *args, **kwargs)
+        with instrument_cost_run(track_allocations=bool(params.get('Track Allocations', False))) as report:
+            result = estimate(cost_database_filename, params, *args, **kwargs)
+        report.to_json(filename)
+        return result
+    return instrumented_estimate
+
+
+def _describe_run(params, cost_engine, seed, n_workers):
+    # Settings of an instrumented run, in its report
+    report = active_report()
+    if report is not None:
+        report.info.update({'Reactor Type': params.get('reactor type'), 'Cost Engine': cost_engine,
+                            'Number of Samples': params.get('Number of Samples'), 'Number of Workers': n_workers,
+                            'Random Seed': seed, 'Sampling Strategy': params.get('Sampling Strategy', 'Random')})
+
+
+@_instrumented
+def bottom_up_cost_estimate(cost_database_filename, params, seed=None, n_workers=None):
+    # seed and n_workers default to params['Random Seed'] and params['Number of Workers'].
+    # With a seed, the Monte Carlo samples are reproducible, and identical for any number of workers.
     # Validate tax credit params early — before any simulation or cost calculation runs.
     # This catches cases where a user accidentally defines both ITC and PTC,
     # which are mutually exclusive under the IRA.
     validate_tax_credit_params(params)
+    cost_engine = select_cost_engine(params)
+    seed, n_workers = _sampling_settings(params, seed, n_workers)
+    _describe_run(params, cost_engine, seed, n_workers)
+
+    # With params['Estimate Cache'], estimates are served from the on-disk cache shared by all processes,
+    # together with the params the estimate computes. A time budget makes the estimate depend on the machine,
+    # and a sample export needs the samples.
+    if params.get('Estimate Cache') and params.get('Sample Time Budget') is None and not params.get('Sample Export'):
+        cache = EstimateCache.for_database(cost_database_filename)
+        with _stage('Estimate cache'):
+            key = estimate_key(params, cost_database_hash(cost_database_filename), seed)
+            cached = cache.get(key)
+        if cached is not None:
+            detailed_cost_table, computed_params = cached
+            params.update(computed_params)
+            return detailed_cost_table
+        detailed_cost_table = _bottom_up_cost_estimate(cost_database_filename, params, cost_engine, seed, n_workers)
+        cache.put(key, (detailed_cost_table, dict(params)))
+        return detailed_cost_table
+
+    return _bottom_up_cost_estimate(cost_database_filename, params, cost_engine, seed, n_workers)
+
+
+def instrumented_cost_estimate(cost_database_filename, params, seed=None, n_workers=None, track_allocations=False,
+                               quiet=True):
+    """
+    bottom_up_cost_estimate, recording the wall time, calls and (with
+    track_allocations) peak allocation of every stage of the run. quiet keeps
+    the engine messages in the report instead of printing them.
 
-    escalated_cost = escalate_cost_database(cost_database_filename, params['Escalation Year'], params)
-    escalated_cost_cleaned = remove_irrelevant_account(escalated_cost, params)
-    reactor_operation(params)
+    Returns the detailed cost table and the CostRunReport of the run (to_json() exports it).
+    """
+    with instrument_cost_run(track_allocations=track_allocations, quiet=quiet) as report:
+        detailed_cost_table = bottom_up_cost_estimate(cost_database_filename, params, seed=seed, n_workers=n_workers)
+    return detailed_cost_table, report
 
-    COA_list = []
-    for i in range(params['Number of Samples']):
-        if (i + 1) % 100 == 0:
-            print(f"\n\nSample # {i+1}")
 
-        scaled_cost = scale_cost(escalated_cost_cleaned, params)
-        scaled_cost = scale_redundant_BOP_and_primary_loop(scaled_cost, params)
-        NOAK_COA = FOAK_to_NOAK(scaled_cost, params)
+def _bottom_up_cost_estimate(cost_database_filename, params, cost_engine, seed, n_workers):
+    with _stage('Escalation'):
+        escalated_cost = escalate_cost_database(cost_database_filename, params['Escalation Year'], params)
+    with _stage('Account selection'):
+        escalated_cost_cleaned = remove_irrelevant_account(escalated_cost, params)
+    with _stage('Reactor operation'):
+        reactor_operation(params)
 
-        updated_cost = update_high_level_costs(scaled_cost, 'base', i)
-        updated_cost_with_indirect_cost = calculate_accounts_31_32_75_82_cost(updated_cost, params)
-        cost_with_decommissioning = calculate_decommissioning_cost(updated_cost_with_indirect_cost, params)
-        updated_accounts_10_40 = update_high_level_costs(cost_with_decommissioning, 'other', i)
-        high_Level_capital_cost = calculate_high_level_capital_costs(updated_accounts_10_40, params)
+    if cost_engine == 'Batched':
+        return batched_cost_estimate(escalated_cost_cleaned, params, seed=seed, n_workers=n_workers)
 
-        updated_accounts_10_60 = update_high_level_costs(high_Level_capital_cost, 'finance', i)
-        TCI = calculate_TCI(updated_accounts_10_60, params)
-        updated_accounts_70_80 = update_high_level_costs(TCI, 'annual', i)
-        Final_COA = energy_cost_levelized(params, updated_accounts_70_80)
-        FOAK_column = get_estimated_cost_column(Final_COA, 'F')
-        NOAK_column = get_estimated_cost_column(Final_COA, 'N')
-        Final_COA = Final_COA[['Account', 'Account Title', FOAK_column, NOAK_column]]
+    return _per_sample_estimate(escalated_cost_cleaned, params, seed)
 
-        COA_list.append(Final_COA)
 
-    concatenated_df = pd.concat(COA_list)
-    numeric_columns = concatenated_df.select_dtypes(include='number').columns
-    mean_df = concatenated_df[numeric_columns].groupby(concatenated_df.index).mean()
+def _prepare_unit_curve(cost_database_filename, params, seed):
+    # Escalated, cleaned cost database and seed of a learning curve, fleet or Sobol run
+    validate_tax_credit_params(params)
+    seed, _ = _sampling_settings(params, seed, 1)
 
-    if params["Number of Samples"] > 1:
-        std_df = concatenated_df[numeric_columns].groupby(concatenated_df.index).std()
-    else:
-        std_df = concatenated_df[numeric_columns].groupby(concatenated_df.index).std(ddof=0)
+    escalated_cost = escalate_cost_database(cost_database_filename, params['Escalation Year'], params)
+    escalated_cost_cleaned = remove_irrelevant_account(escalated_cost, params)
+    reactor_operation(params)
+    return escalated_cost_cleaned, seed
 
-    mean_df[FOAK_column.replace('Cost', 'Cost std')] = std_df[FOAK_column]
-    mean_df[NOAK_column.replace('Cost', 'Cost std')] = std_df[NOAK_column]
 
-    non_numeric_columns = concatenated_df.select_dtypes(exclude='number').groupby(concatenated_df.index).first()
-    result_df = mean_df.join(non_numeric_columns)
-    reordered_df = reorder_dataframe(result_df)
-    return reordered_df
+def bottom_up_learning_curve(cost_database_filename, params, unit_numbers, seed=None):
+    """
+    OCC, TCI, LCOE (and tax-credit adjusted values) for several NOAK unit numbers
+    from one set of FOAK Monte Carlo samples; see learning_curve_estimate.
+    Always uses the batched engine. seed defaults to params['Random Seed'].
+    """
+    database, seed = _prepare_unit_curve(cost_database_filename, params, seed)
+    return learning_curve_estimate(database, params, unit_numbers, seed=seed)
 
 
-def bottom_up_cost_estimate_central(cost_database_filename, params):
+def bottom_up_fleet_estimate(cost_database_filename, params, n_units, seed=None):
     """
-    Bottom-up cost estimate for central facility.
-    Only runs if params['Estimate Central Facility'] is True.
+    Per-unit and cumulative-average OCC, TCI, LCOE (and tax-credit adjusted
+    values) of a fleet of units 1..n_units, with the ITC/PTC claimed by the first
+    'Number of Units Claiming ITC/PTC' units only; see fleet_estimate.
+    Always uses the batched engine. seed defaults to params['Random Seed'].
     """
-    get_central_facility_cost = params.get('Estimate Central Facility', False)
+    database, seed = _prepare_unit_curve(cost_database_filename, params, seed)
+    return fleet_estimate(database, params, n_units, seed=seed)
 
-    if not get_central_facility_cost:
-        return None
 
-    escalated_central = escalate_cost_database(cost_database_filename,
-                                                params['Escalation Year'],
-                                                params,
-                                                sheet_name='Central Facility Database')
-    escalated_central_cleaned = remove_irrelevant_account(escalated_central, params)
-
-    COA_list = []
+def _per_sample_central_estimate(database, params, seed):
+    # Serial per-sample loop of the central facility, one Generator for every sample
+    rng = np.random.default_rng(seed)
+    hierarchy = compile_account_hierarchy(database)
+    distributions = CostDistributions(database)
+    statistics = None
     for i in range(params['Number of Samples']):
         if (i + 1) % 100 == 0:
             print(f"\n\nSample # {i+1}")
 
-        scaled_cost = scale_central_facility_cost(escalated_central_cleaned, params)
-        NOAK_COA = FOAK_to_NOAK(scaled_cost, params)
-
-        updated_cost = update_high_level_costs(scaled_cost, 'base', i)
-        updated_cost_with_indirect_cost = calculate_accounts_31_32_75_central_facility_cost(updated_cost, params)
-        cost_with_decommissioning = calculate_decommissioning_cost(updated_cost_with_indirect_cost, params)
-        updated_accounts_10_40 = update_high_level_costs(cost_with_decommissioning, 'other', i)
-        high_Level_capital_cost = calculate_high_level_capital_costs_central_facility(updated_accounts_10_40, params)
-
-        updated_accounts_10_60 = update_high_level_costs(high_Level_capital_cost, 'finance', i)
-        TCI = calculate_TCI_central(updated_accounts_10_60, params)
-        updated_accounts_70_80 = update_high_level_costs(TCI, 'annual', i)
-
-        FOAK_column = get_estimated_cost_column(updated_accounts_70_80, 'F')
-        NOAK_column = get_estimated_cost_column(updated_accounts_70_80, 'N')
-        Final_COA = updated_accounts_70_80[['Account', 'Account Title', FOAK_column, NOAK_column]]
+        with _stage('Scaling', central=True):
+            scaled_cost = scale_central_facility_cost(database, params, rng=rng, distributions=distributions)
+        with _stage('FOAK to NOAK', central=True):
+            NOAK_COA = FOAK_to_NOAK(scaled_cost, params)
+
+        with _stage('Roll-up base', central=True):
+            updated_cost = update_high_level_costs(scaled_cost, 'base', i, hierarchy)
+        with _stage('Indirect and annualized costs', central=True):
+            updated_cost_with_indirect_cost = calculate_accounts_31_32_75_central_facility_cost(updated_cost, params)
+        with _stage('Decommissioning', central=True):
+            cost_with_decommissioning = calculate_decommissioning_cost(updated_cost_with_indirect_cost, params)
+        with _stage('Roll-up other', central=True):
+            updated_accounts_10_40 = update_high_level_costs(cost_with_decommissioning, 'other', i, hierarchy)
+        with _stage('Capital costs', central=True):
+            high_Level_capital_cost = calculate_high_level_capital_costs_central_facility(updated_accounts_10_40, params)
+
+        with _stage('Roll-up finance', central=True):
+            updated_accounts_10_60 = update_high_level_costs(high_Level_capital_cost, 'finance', i, hierarchy)
+        with _stage('TCI', central=True):
+            TCI = calculate_TCI_central(updated_accounts_10_60, params)
+        with _stage('Roll-up annual', central=True):
+            updated_accounts_70_80 = update_high_level_costs(TCI, 'annual', i, hierarchy)
+        Final_COA = updated_accounts_70_80
+        with _stage('Statistics', central=True):
+            statistics = _accumulate_sample(statistics, Final_COA, params, rng)
+
+    return cost_summary_table(Final_COA['Account'], Final_COA['Account Title'], statistics, params)
+
+
+@_instrumented
+def bottom_up_cost_estimate_central(cost_database_filename, params, seed=None, n_workers=None):
+    """
+    Bottom-up cost estimate for central facility.
+    Only runs if params['Estimate Central Facility'] is True.
+    """
+    get_central_facility_cost = params.get('Estimate Central Facility', False)
 
-        COA_list.append(Final_COA)
+    if not get_central_facility_cost:
+        return None
+    cost_engine = select_cost_engine(params)
+    seed, n_workers = _sampling_settings(params, seed, n_workers)
 
-    concatenated_df = pd.concat(COA_list)
-    numeric_columns = concatenated_df.select_dtypes(include='number').columns
-    mean_df = concatenated_df[numeric_columns].groupby(concatenated_df.index).mean()
+    with _stage('Escalation', central=True):
+        escalated_central = escalate_cost_database(cost_database_filename,
+                                                    params['Escalation Year'],
+                                                    params,
+                                                    sheet_name='Central Facility Database')
+    with _stage('Account selection', central=True):
+        escalated_central_cleaned = remove_irrelevant_account(escalated_central, params)
 
-    if params["Number of Samples"] > 1:
-        std_df = concatenated_df[numeric_columns].groupby(concatenated_df.index).std()
-    else:
-        std_df = concatenated_df[numeric_columns].groupby(concatenated_df.index).std(ddof=0)
+    if cost_engine == 'Batched':
+        return batched_cost_estimate(escalated_central_cleaned, params, central=True, seed=seed, n_workers=n_workers)
 
-    mean_df[FOAK_column.replace('Cost', 'Cost std')] = std_df[FOAK_column]
-    mean_df[NOAK_column.replace('Cost', 'Cost std')] = std_df[NOAK_column]
+    return _per_sample_central_estimate(escalated_central_cleaned, params, seed)
 
-    non_numeric_columns = concatenated_df.select_dtypes(exclude='number').groupby(concatenated_df.index).first()
-    result_df = mean_df.join(non_numeric_columns)
-    reordered_df = reorder_dataframe(result_df)
-    return reordered_df
 
+@_instrumented
+def bottom_up_cost_estimate_with_central(cost_database_filename, params, seed=None, n_workers=None):
+    """
+    Same results as bottom_up_cost_estimate followed by
+    bottom_up_cost_estimate_central, computed together: both cost database sheets
+    are escalated in one pass (one inflation gather, one read of the
+    'Economics Parameters'), and with the batched engine both estimates run in
+    one pass over the sample blocks (see joint_cost_estimate). The central
+    facility samples of the uncertain inputs both sheets share (same account
+    and distribution) are the reactor's samples.
+
+    Returns the reactor cost table and the central facility cost table (None
+    unless params['Estimate Central Facility'] is True).
+    """
+    if not params.get('Estimate Central Facility', False):
+        return bottom_up_cost_estimate(cost_database_filename, params, seed=seed, n_workers=n_workers), None
 
-def parametric_studies(cost_database_filename, tracked_params_list):
+    validate_tax_credit_params(params)
+    cost_engine = select_cost_engine(params)
+    seed, n_workers = _sampling_settings(params, seed, n_workers)
+    _describe_run(params, cost_engine, seed, n_workers)
+
+    with _stage('Escalation'):
+        escalated = escalate_cost_database_sheets(cost_database_filename, params['Escalation Year'], params,
+                                                  ['Cost Database', 'Central Facility Database'])
+    with _stage('Account selection'):
+        escalated_cost_cleaned = remove_irrelevant_account(escalated['Cost Database'], params)
+    with _stage('Reactor operation'):
+        reactor_operation(params)
+    with _stage('Account selection', central=True):
+        escalated_central_cleaned = remove_irrelevant_account(escalated['Central Facility Database'], params)
+
+    if cost_engine == 'Batched':
+        return joint_cost_estimate(escalated_cost_cleaned, escalated_central_cleaned, params, seed=seed,
+                                   n_workers=n_workers)
+
+    return (_per_sample_estimate(escalated_cost_cleaned, params, seed),
+            _per_sample_central_estimate(escalated_central_cleaned, params, seed))
+
+
+def parametric_studies(cost_database_filename, tracked_params_list, params=None, output_csv_filename=None):
+    # Appends the tracked costs of one design point to a CSV file. Sweeps of the cost inputs run all their
+    # points at once with cost.parametric_study.run_parametric_study.
     import inspect
 
-    # Grab params and the calling script's path from the caller's frame automatically
+    # Without explicit arguments, grab params and the calling script's path from the caller's frame
     caller_frame = inspect.stack()[1][0]
-    params = caller_frame.f_locals.get('params')
+    if params is None:
+        params = caller_frame.f_locals.get('params')
     if params is None:
         raise RuntimeError(
             "parametric_studies could not find 'params' in the calling scope. "
             "Make sure a variable named 'params' exists in the script that calls this function."
         )
-    caller_file = caller_frame.f_globals.get('__file__', 'output')
-    output_csv_filename = os.path.splitext(os.path.abspath(caller_file))[0] + '_output.csv'
+    if output_csv_filename is None:
+        caller_file = caller_frame.f_globals.get('__file__', 'output')
+        output_csv_filename = os.path.splitext(os.path.abspath(caller_file))[0] + '_output.csv'
 
     detailed_cost_table = bottom_up_cost_estimate(cost_database_filename, params)
     tracked_costs = create_cost_dictionary(detailed_cost_table, params, tracked_params_list)
@@ -470,35 +433,29 @@ def detailed_bottom_up_cost_estimate(cost_database_filename):
             "Make sure a variable named 'params' exists in the script that calls this function."
         )
     caller_file = caller_frame.f_globals.get('__file__', 'output')
-    output_filename = os.path.splitext(os.path.abspath(caller_file))[0] + '_output.xlsx'
-
-    detailed_cost_table = bottom_up_cost_estimate(cost_database_filename, params)
-    detailed_central_cost_table = bottom_up_cost_estimate_central(cost_database_filename, params)
-    pretty_df = transform_dataframe(detailed_cost_table)
+    report_format = params.get('Report Format', 'xlsx')
+    output_filename = os.path.splitext(os.path.abspath(caller_file))[0] + f'_output.{report_format}'
 
-    with pd.ExcelWriter(output_filename) as writer:
-        pretty_df.to_excel(writer, sheet_name="cost estimate", index=False)
+    detailed_cost_table, detailed_central_cost_table = bottom_up_cost_estimate_with_central(cost_database_filename,
+                                                                                            params)
 
-        if detailed_central_cost_table is not None:
-            numerical_columns = detailed_central_cost_table.select_dtypes(include=[np.number]).columns
-            nan_mask = detailed_central_cost_table[numerical_columns].isna().any(axis=1)
-            if nan_mask.any():
-                print("WARNING: NaN values in central facility accounts:")
-                print(detailed_central_cost_table[nan_mask][['Account', 'Account Title'] + list(numerical_columns)])
-            pretty_central_df = transform_dataframe(detailed_central_cost_table)
-            pretty_central_df.to_excel(writer, sheet_name="central facility cost estimate", index=False)
-
-        save_params_to_excel_file(writer, params)
-
-    # Always compute per-account LCOE contributions so they appear in Excel.
+    # Always compute per-account LCOE contributions so they appear in the report.
     # The PNG plot is only generated if params['plotting'] == "Y" —
     # that gate lives inside cost_drivers_estimate.
     lcoe_enriched_table, _ = cost_drivers_estimate(detailed_cost_table, params)
-
-    if lcoe_enriched_table is not None:
-        pretty_lcoe_df = transform_dataframe(lcoe_enriched_table)
-        with pd.ExcelWriter(output_filename, mode='a', if_sheet_exists='replace') as writer:
-            pretty_lcoe_df.to_excel(writer, sheet_name="cost estimate", index=False)
+    cost_tables = {"cost estimate": transform_dataframe(lcoe_enriched_table if lcoe_enriched_table is not None
+                                                        else detailed_cost_table)}
+
+    if detailed_central_cost_table is not None:
+        numerical_columns = detailed_central_cost_table.select_dtypes(include=[np.number]).columns
+        nan_mask = detailed_central_cost_table[numerical_columns].isna().any(axis=1)
+        if nan_mask.any():
+            print("WARNING: NaN values in central facility accounts:")
+            print(detailed_central_cost_table[nan_mask][['Account', 'Account Title'] + list(numerical_columns)])
+        cost_tables["central facility cost estimate"] = transform_dataframe(detailed_central_cost_table)
+
+    # The cost tables, the Parameters table and the array params in one pass
+    write_cost_report(output_filename, params, cost_tables)
 
     print(f"\n\nThe cost estimate and all the parameters are saved at {output_filename}\n\n")
     return detailed_cost_table
\ No newline at end of file
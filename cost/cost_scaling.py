@@ -2,77 +2,146 @@
 
 import numpy as np
 import pandas as pd
-from cost.sampling import sampler
+from cost.sampling import CostDistributions
 
-def non_standard_cost_scale(account, unit_cost, scaling_variable_value, exponent, params):
-    # pumps
-    if account == 222.11 or account == 222.12:
-        cost_multiplier = (0.2 / (1 - params['Pump Isentropic Efficiency'])) + 1
-        cost = cost_multiplier * unit_cost * pow(scaling_variable_value,exponent)
-    
-    # compressors
-    elif account == 222.13:
-        if 'Primary Loop Count' in params.keys():
-            # Account for multiple primary loops and their individual rated load
-            ## PR1: Updated cost correlation based on ANL/NSE-20/28 in place of the default,
-            ## due to inherent uncertainty in the compressor pressure ratio across GCMR designs
-            cost_multiplier = (((params['Primary Loop Outlet Temperature'] - 273.15)/650)**1.29 *
-                                (params['Primary Loop Compressor Power']/1e6/2.6)**0.74)
-            cost = cost_multiplier * unit_cost
-        else:
-            # Old Correlation kept as backup
-            cost_multiplier = (1 / (0.95 - params['Compressor Isentropic Efficiency'])) * params['Compressor Pressure Ratio'] * np.log(params['Compressor Pressure Ratio'])
-            cost = cost_multiplier * unit_cost * pow(scaling_variable_value,exponent)
-    
-    elif account == 253:
-        if params['Enrichment'] < 0.1:
-            cost_premium = 1
-        elif  0.1 <= params['Enrichment'] < 0.2:
-            cost_premium = 1.15
-        elif 0.2 <= params['Enrichment']:
-            print("\033[91m ERROR: Enrichment is too high \033[0m")
-            raise ValueError("Enrichment is too high")
-        cost = cost_premium * unit_cost *pow(scaling_variable_value,exponent) 
-    elif account == 711:
-        cost_multiplier = params['FTEs Per Onsite Operator Per Year'] 
-        cost = cost_multiplier * unit_cost * pow(scaling_variable_value,exponent)
-    elif account == 712:
-        cost_multiplier = params['FTEs Per Offsite Operator (24/7)']
-        cost = cost_multiplier * unit_cost * pow(1 / scaling_variable_value, exponent) 
-    elif account == 713:
-        cost_multiplier = params['FTEs Per Security Staff (24/7)']
-        cost = cost_multiplier * unit_cost * pow(scaling_variable_value,exponent)       
-    elif account == 721:
-        cost_multiplier = params['Annual Coolant Supply Frequency']
-        cost = cost_multiplier * unit_cost * scaling_variable_value
- 
-    elif account == 81:
-        cost_multiplier =  params['FTEs Per Operator Per Year Per Refueling'] 
-        cost = cost_multiplier * unit_cost * pow(scaling_variable_value, exponent)
-    return cost
+# Nonstandard cost equations: cost = multiplier * unit cost * scaling term, where
+# NON_STANDARD_COST_EQUATIONS[account](params) gives the multiplier and the form of
+# the scaling term (NON_STANDARD_SCALING_TERMS) of the account. The per-sample
+# engine evaluates one row at a time (non_standard_cost_scale); the batched engine
+# evaluates all nonstandard rows of all samples at once (see CostEquations).
 
+def _compressor_equation(params):
+    if 'Primary Loop Count' in params.keys():
+        # Account for multiple primary loops and their individual rated load
+        ## PR1: Updated cost correlation based on ANL/NSE-20/28 in place of the default,
+        ## due to inherent uncertainty in the compressor pressure ratio across GCMR designs
+        cost_multiplier = (((params['Primary Loop Outlet Temperature'] - 273.15)/650)**1.29 *
+                            (params['Primary Loop Compressor Power']/1e6/2.6)**0.74)
+        return cost_multiplier, 'none'
+    # Old Correlation kept as backup
+    cost_multiplier = (1 / (0.95 - params['Compressor Isentropic Efficiency'])) * params['Compressor Pressure Ratio'] * np.log(params['Compressor Pressure Ratio'])
+    return cost_multiplier, 'power'
+
+
+def _enrichment_premium_equation(params):
+    if params['Enrichment'] < 0.1:
+        cost_premium = 1
+    elif 0.1 <= params['Enrichment'] < 0.2:
+        cost_premium = 1.15
+    else:
+        print("\033[91m ERROR: Enrichment is too high \033[0m")
+        raise ValueError("Enrichment is too high")
+    return cost_premium, 'power'
+
+
+def _pump_equation(params):
+    return (0.2 / (1 - params['Pump Isentropic Efficiency'])) + 1, 'power'
+
+
+NON_STANDARD_COST_EQUATIONS = {
+    222.11: _pump_equation,                 # pumps
+    222.12: _pump_equation,
+    222.13: _compressor_equation,           # compressors
+    253: _enrichment_premium_equation,
+    711: lambda params: (params['FTEs Per Onsite Operator Per Year'], 'power'),
+    712: lambda params: (params['FTEs Per Offsite Operator (24/7)'], 'inverse power'),
+    713: lambda params: (params['FTEs Per Security Staff (24/7)'], 'power'),
+    721: lambda params: (params['Annual Coolant Supply Frequency'], 'linear'),
+    81: lambda params: (params['FTEs Per Operator Per Year Per Refueling'], 'power'),
+}
+
+# Scaling term of a nonstandard cost equation, from the scaling variable value and the exponent
+NON_STANDARD_SCALING_TERMS = {
+    'power': lambda scaling_variable_value, exponent: pow(scaling_variable_value, exponent),
+    'inverse power': lambda scaling_variable_value, exponent: pow(1 / scaling_variable_value, exponent),
+    'linear': lambda scaling_variable_value, exponent: scaling_variable_value,
+    'none': lambda scaling_variable_value, exponent: 1,
+}
+
+
+def non_standard_cost_equation(account, params):
+    # (multiplier, scaling term form) of the nonstandard cost equation of an account
+    if account not in NON_STANDARD_COST_EQUATIONS:
+        raise ValueError(f"Account {account} has a nonstandard cost equation, but none is defined for it "
+                         f"in cost_scaling.NON_STANDARD_COST_EQUATIONS.")
+    return NON_STANDARD_COST_EQUATIONS[account](params)
 
 
-def scale_redundant_BOP_and_primary_loop(df, params):
-    # Scales special cases to handle redundant or multiple coolant/BoP loops
-    escalation_year = params['Escalation Year']
-    cost_col = f'FOAK Estimated Cost (${escalation_year })'
+def non_standard_cost_scale(account, unit_cost, scaling_variable_value, exponent, params):
+    cost_multiplier, form = non_standard_cost_equation(account, params)
+    if form == 'none':
+        return cost_multiplier * unit_cost
+    return cost_multiplier * unit_cost * NON_STANDARD_SCALING_TERMS[form](scaling_variable_value, exponent)
+
+
+def redundant_BOP_and_primary_loop_multiplier(accounts, params):
+    # Per-row cost multiplier for redundant or multiple coolant/BoP loops.
+    # Rows that are not affected get a multiplier of 1.
+    accounts = pd.Series(accounts)
+    accounts_str = accounts.astype(str)
+    multiplier = np.ones(len(accounts))
 
     if 'Primary Loop Count' in params.keys():
-        df.loc[df['Account'].astype(str).str.startswith('222'), cost_col] *= params['Primary Loop Count']
+        multiplier[accounts_str.str.startswith('222').to_numpy()] *= params['Primary Loop Count']
     if 'BoP Count' in params.keys():
         # Balance of plant
-        df.loc[df['Account'].astype(str).str.startswith('232'), cost_col] *= params['BoP Count']
+        multiplier[accounts_str.str.startswith('232').to_numpy()] *= params['BoP Count']
         # Balance-of-plant building — assumed to be a high 40-ft CONEX container with 20 cm wall thickness (including the CONEX wall)
-        df.loc[df['Account'].astype(str).str.startswith('213.1'), cost_col] *= params['BoP Count']
+        multiplier[accounts_str.str.startswith('213.1').to_numpy()] *= params['BoP Count']
     if 'Primary Loop Purification' in params.keys():
-        df.loc[df['Account'] == 226, cost_col] *= int(params['Primary Loop Purification'])
+        multiplier[(accounts == 226).to_numpy()] *= int(params['Primary Loop Purification'])
+
+    return multiplier
+
 
+def scale_redundant_BOP_and_primary_loop(df, params):
+    # Scales special cases to handle redundant or multiple coolant/BoP loops
+    escalation_year = params['Escalation Year']
+    cost_col = f'FOAK Estimated Cost (${escalation_year })'
+    df[cost_col] = df[cost_col] * redundant_BOP_and_primary_loop_multiplier(df['Account'], params)
     return df
 
 
+# Learning-curve categories read from the 'FOAK to NOAK Multiplier Type' column.
+# 'Onsite Learning' is handled separately because it uses its own unit count.
+NOAK_MULTIPLIER_TYPES = ['No Learning',
+                         'Licensing Learning',
+                         'Factory Primary Structure',
+                         'Factory Drums',
+                         'Factory Other',
+                         'Factory Be',
+                         'Factory BeO',
+                         'Non-nuclear off-the-shelf']
+
+
+def learning_rate_multiplier(learning_rate, number_of_units):
+    return pow(1-learning_rate, np.log2(min(100, number_of_units)))
+
+
+def calculate_learning_multipliers(params):
+    # Additional cost scaling based on an assumed learning rate.
+    # Learning rate and cost multiplier are based on
+    # DOI: 10.1080/00295450.2023.2206779.
+    # Cost multiplier is capped at the 100th unit for any component.
+    # Stores the multipliers in params and returns them keyed by multiplier type.
+    if 'NOAK Unit Number' not in params.keys():
+        # Use the default value if 'NOAK Unit Number' is not specified.
+        params['NOAK Unit Number'] = 10
+        # Defaults to approximately the 10th unit, with 20 (2×10) units assumed for onsite learning.
+    params['Assumed Number Of Units For Onsite Learning'] = params['NOAK Unit Number'] * 2
 
-def scale_cost(initial_database, params):
+    for multiplier_type in NOAK_MULTIPLIER_TYPES:
+        params[f"{multiplier_type} Cost Multiplier"] = learning_rate_multiplier(params[f'{multiplier_type}'],
+                                                                                params['NOAK Unit Number'])
+    params['Onsite Learning Cost Multiplier'] = learning_rate_multiplier(params['Onsite Learning'],
+                                                                         params['Assumed Number Of Units For Onsite Learning'])
+
+    return {multiplier_type: params[f"{multiplier_type} Cost Multiplier"]
+            for multiplier_type in NOAK_MULTIPLIER_TYPES + ['Onsite Learning']}
+
+
+
+def scale_cost(initial_database, params, rng=None, distributions=None):
     scaled_cost = initial_database[['Account', 'Level', 'Account Title', 'FOAK to NOAK Multiplier Type',\
                                     "Fixed Cost Low End", "Fixed Cost High End", "Fixed Cost Distribution",\
                                     "Unit Cost Low End", "Unit Cost High End", "Unit Cost Distribution",\
@@ -81,8 +150,14 @@ def scale_cost(initial_database, params):
     escalation_year = params['Escalation Year']
     
 
+    # All uncertain inputs of this sample are drawn at once, in row order
+    if distributions is None:
+        distributions = CostDistributions(initial_database)
+    fixed_costs, unit_costs, exponents = (values[0] for values in
+                                          distributions.draw(1, sampled=params['Number of Samples'] > 1, rng=rng))
+
     # Iterate through each row in the DataFrame
-    for index, row in initial_database.iterrows():
+    for position, (index, row) in enumerate(initial_database.iterrows()):
         
         # Check if cost data are available (fixed or unit cost)
         if row['Fixed Cost ($)'] > 0 or	row['Unit Cost'] > 0:
@@ -90,58 +165,15 @@ def scale_cost(initial_database, params):
             scaling_variable_value = params[row['Scaling Variable']] if pd.notna(row['Scaling Variable']) else 0
             
             # Calculate the 'Estimated Cost
-            fixed_cost_0 = row['Adjusted Fixed Cost ($)'] 
-            fixed_cost_lo = row['Adjusted Fixed Cost Low End ($)'] 
-            fixed_cost_hi = row['Adjusted Fixed Cost High End ($)'] 
-            fixed_cost_dist = row['Fixed Cost Distribution']
-
-            if pd.notna(row['Fixed Cost ($)']):
-                if params['Number of Samples'] > 1:
-                    if fixed_cost_dist == 'Lognormal':
-                        fixed_cost = sampler("Lognormal", low_cost=fixed_cost_lo, high_cost=fixed_cost_hi, class3_cost=fixed_cost_0)
-                    elif fixed_cost_dist == 'Uniform': 
-                        fixed_cost = sampler('Uniform', low=fixed_cost_lo, high=fixed_cost_hi)
-                    else:
-                        fixed_cost = fixed_cost_0
-                else:
-                    fixed_cost = fixed_cost_0
-            else:
-                fixed_cost = 0    
+            # Class 3 value, or this sample's draw from the row's distribution (0 without a fixed cost)
+            fixed_cost = fixed_costs[position]
             
-            unit_cost_0 = row['Adjusted Unit Cost ($)'] 
-            unit_cost_lo = row['Adjusted Unit Cost Low End ($)'] 
-            unit_cost_hi = row['Adjusted Unit Cost High End ($)'] 
-            unit_cost_dist = row['Unit Cost Distribution']
-
-            if pd.notna(row['Unit Cost']):
-                if params['Number of Samples'] > 1:
-                    if unit_cost_dist == 'Lognormal':
-                        unit_cost = sampler("Lognormal", low_cost=unit_cost_lo, high_cost=unit_cost_hi, class3_cost=unit_cost_0)
-                    elif unit_cost_dist == 'Uniform': 
-                        unit_cost = sampler('Uniform', low=unit_cost_lo, high=unit_cost_hi)
-                    else:
-                        unit_cost = unit_cost_0
-                else:
-                    unit_cost =unit_cost_0
-
-            else:
-                unit_cost = 0  
+            unit_cost = unit_costs[position]
 
             scaling_variable_ref_value  = row['Scaling Variable Ref Value']
-            exponent_0 = row['Exponent']
-            exponent_min = row['Exponent Min']
-            exponent_max = row['Exponent Max']
-            exponent_std = row['Exponent std']
-            exponent_dist = row['Exponent Distribution']
-
+            # Rows without an exponent keep the one of the previous costed row
             if pd.notna(row['Exponent']):
-                if params['Number of Samples'] > 1:
-                    if exponent_dist == 'Truncated Normal':
-                        exponent = sampler("Truncated Normal", mean=exponent_0, std=exponent_std, lower_bound=exponent_min, upper_bound=exponent_max)
-                    else:
-                        exponent = exponent_0
-                else:
-                    exponent = exponent_0
+                exponent = exponents[position]
             
             if row['Standard Cost Equation?'] == 'standard' :
                 
@@ -171,7 +203,7 @@ def scale_cost(initial_database, params):
     return scaled_cost
 
 
-def scale_central_facility_cost(initial_database, params):
+def scale_central_facility_cost(initial_database, params, rng=None, distributions=None):
     """
     Scale costs for central facility accounts.
     Similar to scale_cost() but includes Count Scaling Variable support.
@@ -184,7 +216,12 @@ def scale_central_facility_cost(initial_database, params):
     escalation_year = params['Escalation Year']
     params['Constant'] = 1
 
-    for index, row in initial_database.iterrows():
+    if distributions is None:
+        distributions = CostDistributions(initial_database)
+    fixed_costs, unit_costs, exponents = (values[0] for values in
+                                          distributions.draw(1, sampled=params['Number of Samples'] > 1, rng=rng))
+
+    for position, (index, row) in enumerate(initial_database.iterrows()):
 
         if row['Fixed Cost ($)'] > 0 or row['Unit Cost'] > 0:
 
@@ -192,57 +229,15 @@ def scale_central_facility_cost(initial_database, params):
             count_variable_value = (params[row['Count Scaling Variable']] * row['Count per Variable']
                                     if pd.notna(row['Count Scaling Variable']) else 0)
 
-            fixed_cost_0 = row['Adjusted Fixed Cost ($)']
-            fixed_cost_lo = row['Adjusted Fixed Cost Low End ($)']
-            fixed_cost_hi = row['Adjusted Fixed Cost High End ($)']
-            fixed_cost_dist = row['Fixed Cost Distribution']
-
-            if pd.notna(row['Fixed Cost ($)']):
-                if params['Number of Samples'] > 1:
-                    if fixed_cost_dist == 'Lognormal':
-                        fixed_cost = sampler("Lognormal", low_cost=fixed_cost_lo, high_cost=fixed_cost_hi, class3_cost=fixed_cost_0)
-                    elif fixed_cost_dist == 'Uniform':
-                        fixed_cost = sampler('Uniform', low=fixed_cost_lo, high=fixed_cost_hi)
-                    else:
-                        fixed_cost = fixed_cost_0
-                else:
-                    fixed_cost = fixed_cost_0
-            else:
-                fixed_cost = 0
-
-            unit_cost_0 = row['Adjusted Unit Cost ($)']
-            unit_cost_lo = row['Adjusted Unit Cost Low End ($)']
-            unit_cost_hi = row['Adjusted Unit Cost High End ($)']
-            unit_cost_dist = row['Unit Cost Distribution']
-
-            if pd.notna(row['Unit Cost']):
-                if params['Number of Samples'] > 1:
-                    if unit_cost_dist == 'Lognormal':
-                        unit_cost = sampler("Lognormal", low_cost=unit_cost_lo, high_cost=unit_cost_hi, class3_cost=unit_cost_0)
-                    elif unit_cost_dist == 'Uniform':
-                        unit_cost = sampler('Uniform', low=unit_cost_lo, high=unit_cost_hi)
-                    else:
-                        unit_cost = unit_cost_0
-                else:
-                    unit_cost = unit_cost_0
-            else:
-                unit_cost = 0
+            # Class 3 value, or this sample's draw from the row's distribution (0 without a fixed cost)
+            fixed_cost = fixed_costs[position]
 
-            scaling_variable_ref_value = row['Scaling Variable Ref Value']
-            exponent_0 = row['Exponent']
-            exponent_min = row['Exponent Min']
-            exponent_max = row['Exponent Max']
-            exponent_std = row['Exponent std']
-            exponent_dist = row['Exponent Distribution']
+            unit_cost = unit_costs[position]
 
+            scaling_variable_ref_value = row['Scaling Variable Ref Value']
+            # Rows without an exponent keep the one of the previous costed row
             if pd.notna(row['Exponent']):
-                if params['Number of Samples'] > 1:
-                    if exponent_dist == 'Truncated Normal':
-                        exponent = sampler("Truncated Normal", mean=exponent_0, std=exponent_std, lower_bound=exponent_min, upper_bound=exponent_max)
-                    else:
-                        exponent = exponent_0
-                else:
-                    exponent = exponent_0
+                exponent = exponents[position]
 
             if row['Standard Cost Equation?'] == 'standard':
 
@@ -0,0 +1,155 @@
+# Copyright 2025, Battelle Energy Alliance, LLC, ALL RIGHTS RESERVED
+"""
+Persistent (on-disk) cache of cost estimates, shared by all processes.
+
+An entry is keyed by the canonical params hash of the inputs (see
+results_store.canonical_params), the content hash of the cost database
+workbook, the seed and a hash of the source code of the estimate. Editing the
+workbook or the code therefore never serves a stale estimate.
+
+Entries are pickles written to a temporary file and renamed, so concurrent
+readers never see a partial entry. Reading an entry marks it as recently used;
+once the cache grows beyond its size limit, the least recently used entries
+are removed.
+
+Entries are stored in an 'estimates' folder of the '.cost_database_cache'
+folder next to the workbook, or in the folder given by the
+MOUSE_ESTIMATE_CACHE environment variable. The size limit (bytes) can be set
+with MOUSE_ESTIMATE_CACHE_SIZE; a size limit of 0 disables the cache (nothing
+is read or written).
+"""
+
+import functools
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+from cost.cost_database import CACHE_DIR_NAME
+from cost.results_store import canonical_params, _canonical_value
+
+CACHE_DIR_ENV_VAR = 'MOUSE_ESTIMATE_CACHE'
+CACHE_SIZE_ENV_VAR = 'MOUSE_ESTIMATE_CACHE_SIZE'
+DEFAULT_CACHE_SIZE = 256 * 2**20
+# Bump when the entry layout changes so old entries are ignored
+ENTRY_VERSION = 1
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Source code (folders or files, relative to the repository) a cost estimate depends on
+ESTIMATE_CODE = ('cost', 'reactor_engineering_evaluation')
+
+
+@functools.lru_cache(maxsize=None)
+def code_version(code=ESTIMATE_CODE):
+    # SHA-256 of the Python sources of the code, computed once per process
+    sha = hashlib.sha256()
+    for entry in code:
+        path = os.path.join(REPO_ROOT, entry)
+        if os.path.isdir(path):
+            files = sorted(os.path.join(folder, name) for folder, _, names in os.walk(path)
+                           for name in names if name.endswith('.py'))
+        else:
+            files = [path]
+        for file in files:
+            sha.update(os.path.relpath(file, REPO_ROOT).encode())
+            with open(file, 'rb') as f:
+                sha.update(f.read())
+    return sha.hexdigest()
+
+
+def estimate_key(params, database_hash, seed, code=ESTIMATE_CODE):
+    key = json.dumps([ENTRY_VERSION, canonical_params(params), database_hash, seed, code_version(code)],
+                     default=_canonical_value)
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class EstimateCache:
+    def __init__(self, directory, max_bytes=None):
+        self.directory = directory
+        if max_bytes is None:
+            max_bytes = int(os.environ.get(CACHE_SIZE_ENV_VAR, DEFAULT_CACHE_SIZE))
+        self.max_bytes = max_bytes
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    @classmethod
+    def for_database(cls, cost_database_filename):
+        # Cache of the estimates of a cost database workbook
+        directory = os.environ.get(CACHE_DIR_ENV_VAR) or os.path.join(
+            os.path.dirname(os.path.abspath(cost_database_filename)), CACHE_DIR_NAME, 'estimates')
+        return cls(directory)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.pkl')
+
+    def get(self, key):
+        # Cached value of the key, or None
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path)   # most recently used
+            return value
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Corrupt or unreadable entry (e.g. written by an incompatible pandas) — recompute it
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self._path(key))
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self._evict()
+        except OSError as e:
+            # A read-only checkout still works, it just recomputes every estimate
+            print(f"--- warning: could not write the estimate cache entry {self._path(key)}: {e}")
+
+    def _evict(self):
+        # Remove the least recently used entries until the cache fits in max_bytes
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith('.pkl'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue   # removed by another process
+                    entries.append((stat.st_mtime_ns, entry.name, stat.st_size))
+        total = sum(size for _, _, size in entries)
+        for _, name, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith('.pkl'):
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except FileNotFoundError:
+                        pass
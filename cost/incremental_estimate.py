@@ -0,0 +1,286 @@
+# Copyright 2025, Battelle Energy Alliance, LLC, ALL RIGHTS RESERVED
+"""
+Incremental cost estimates for interactive what-ifs.
+
+IncrementalCostEstimate runs the batched cost pipeline as a graph of stages:
+
+    Cost database ─→ FOAK costs ─→ FOAK to NOAK ─→ Roll-up base ─→ ... ─→ LCOE
+    Reactor operation (params only)
+
+Every stage records the params it reads while it runs (the 'Scaling Variable'
+of each account and the parameter names in cost cells are read by the
+'Cost database' and 'FOAK costs' stages, the financial inputs by the stages
+downstream of them), together with the params it writes. On the next estimate,
+a stage whose recorded inputs are unchanged, and whose upstream stage did not
+run again, is skipped: its cached output is reused and its params writes are
+replayed. Changing e.g. the 'Interest Rate' therefore only reruns the stages
+from the capital costs (account 62) to the LCOE.
+
+Estimates are identical to bottom_up_cost_estimate with the batched engine and
+the same seed. Without a seed, the FOAK cost samples are drawn once and reused
+by every what-if that does not change them (common random numbers), so what-ifs
+differ by their inputs only, not by sampling noise.
+"""
+
+import copy
+
+import numpy as np
+
+from cost import instrumentation
+from cost.batched_engine import (BatchedCostTable, adaptive_sampling_settings, cost_stages, sample_block_sizes,
+                                 scale_foak_samples, table_samples)
+from cost.code_of_account_processing import remove_irrelevant_account
+from cost.cost_database import cost_database_hash
+from cost.cost_escalation import escalate_cost_database
+from cost.cost_estimation import _sampling_settings, bottom_up_cost_estimate, select_cost_engine
+from cost.non_direct_cost import validate_tax_credit_params
+from cost.sample_statistics import cost_summary_table, new_cost_statistics
+from cost.sampling import CostDistributions
+from reactor_engineering_evaluation.operation import reactor_operation
+
+_MISSING = object()   # value recorded for a parameter that is not in params
+_KEY_SET = object()   # dependency on the set of keys of params (params.keys(), iteration)
+
+
+def _recorded(value):
+    # Values are kept as they were when the stage read them
+    if value is _MISSING or isinstance(value, (bool, int, float, str, type(None), np.number)):
+        return value
+    return copy.deepcopy(value)
+
+
+def _same_value(a, b):
+    if a is b:
+        return True
+    try:
+        if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+            return type(a) is type(b) and np.array_equal(a, b)
+        return type(a) is type(b) and bool(a == b)
+    except (TypeError, ValueError):
+        return False
+
+
+class TrackedParams(dict):
+    """
+    A params dict that records, stage by stage, the parameters read (with their
+    value when the stage started) and the parameters written.
+    """
+
+    def __init__(self, params):
+        super().__init__(params)
+        self.begin_stage()
+
+    def begin_stage(self):
+        self._start = dict(dict.items(self))
+        self.reads = {}
+        self.written = set()
+
+    def _read(self, key):
+        if key not in self.reads:
+            self.reads[key] = _recorded(self._start.get(key, _MISSING))
+
+    def _read_key_set(self):
+        if _KEY_SET not in self.reads:
+            self.reads[_KEY_SET] = frozenset(self._start)
+
+    def __getitem__(self, key):
+        self._read(key)
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        self._read(key)
+        return dict.get(self, key, default)
+
+    def __contains__(self, key):
+        self._read(key)
+        return dict.__contains__(self, key)
+
+    def keys(self):
+        self._read_key_set()
+        return dict.keys(self)
+
+    def __iter__(self):
+        self._read_key_set()
+        return dict.__iter__(self)
+
+    def values(self):
+        for key in self._start:
+            self._read(key)
+        self._read_key_set()
+        return dict.values(self)
+
+    def items(self):
+        for key in self._start:
+            self._read(key)
+        self._read_key_set()
+        return dict.items(self)
+
+    def __setitem__(self, key, value):
+        self.written.add(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self.written.add(key)
+        dict.__delitem__(self, key)
+
+    def setdefault(self, key, default=None):
+        if not self.__contains__(key):
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def pop(self, key, *default):
+        self._read(key)
+        self.written.add(key)
+        return dict.pop(self, key, *default)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+
+class StageRecord:
+    """Inputs, params writes and output of the last run of one stage."""
+
+    def __init__(self, params, output, upstream, external):
+        self.reads = params.reads
+        self.writes = {key: _recorded(dict.get(params, key, _MISSING)) for key in params.written}
+        self.output = output
+        self.upstream = upstream
+        self.external = external
+
+    def is_current(self, params, external):
+        if not _same_value(self.external, external):
+            return False
+        for key, value in self.reads.items():
+            current = frozenset(dict.keys(params)) if key is _KEY_SET else dict.get(params, key, _MISSING)
+            if not _same_value(value, current):
+                return False
+        return True
+
+    def replay(self, params):
+        for key, value in self.writes.items():
+            if value is _MISSING:
+                dict.pop(params, key, None)
+            else:
+                dict.__setitem__(params, key, _recorded(value))
+
+    def parameters(self):
+        return sorted(str(key) for key in self.reads if key is not _KEY_SET)
+
+
+class IncrementalCostEstimate:
+    """
+    Batched bottom-up cost estimates of one cost database that only rerun the
+    stages whose inputs changed since the previous estimate.
+
+    Runs with a 'Per-Sample' cost engine, an adaptive number of samples, a
+    sample export, or more than max_cached_samples samples (the outputs of all
+    stages are kept in memory) are passed on to bottom_up_cost_estimate.
+    """
+
+    def __init__(self, cost_database_filename, max_cached_samples=1000):
+        self.cost_database_filename = cost_database_filename
+        self.max_cached_samples = max_cached_samples
+        self.records = {}       # stage name → StageRecord
+        self.recomputed = []    # stages run by the last estimate, in order
+
+    def dependency_graph(self):
+        """{stage: {'params': params read, 'upstream': stage whose output it uses}} of the last estimate."""
+        return {name: {'params': record.parameters(), 'upstream': record.upstream}
+                for name, record in self.records.items()}
+
+    def clear(self):
+        # Drops the cached outputs of all stages (the next estimate reruns them all)
+        self.records, self.recomputed = {}, []
+
+    def _stage(self, name, params, compute, upstream=None, external=None):
+        # Output of one stage, from the cache when its inputs are unchanged
+        record = self.records.get(name)
+        if record is not None and upstream not in self.recomputed and record.is_current(params, external):
+            record.replay(params)
+            return record.output
+        params.begin_stage()
+        with instrumentation.stage(name):
+            output = compute(params)
+        self.records[name] = StageRecord(params, output, upstream, external)
+        self.recomputed.append(name)
+        return output
+
+    def estimate(self, params, seed=None):
+        """
+        Same result as bottom_up_cost_estimate(cost_database_filename, params, seed)
+        with the batched engine; params is updated the same way.
+        """
+        validate_tax_credit_params(params)
+        cost_engine = select_cost_engine(params)
+        seed, _ = _sampling_settings(params, seed, 1)
+        if (cost_engine != 'Batched' or adaptive_sampling_settings(params) is not None
+                or params['Number of Samples'] > self.max_cached_samples or params.get('Sample Export')):
+            self.clear()
+            return bottom_up_cost_estimate(self.cost_database_filename, params, seed=seed)
+
+        tracked = TrackedParams(params)
+        self.recomputed = []
+
+        def cost_database(tracked):
+            escalated_cost = escalate_cost_database(self.cost_database_filename, tracked['Escalation Year'], tracked)
+            database = remove_irrelevant_account(escalated_cost, tracked)
+            return database, CostDistributions(database)
+
+        database, distributions = self._stage('Cost database', tracked, cost_database,
+                                              external=cost_database_hash(self.cost_database_filename))
+        self._stage('Reactor operation', tracked, reactor_operation)
+
+        def foak_costs(tracked):
+            # FOAK costs of the seeded sample blocks, with the state of each
+            # block's Generator (it also draws the percentile reservoir)
+            block_sizes = sample_block_sizes(tracked['Number of Samples'])
+            entropy = seed if seed is not None else np.random.SeedSequence().entropy
+            blocks = []
+            for block_size, seed_sequence in zip(block_sizes, np.random.SeedSequence(entropy).spawn(len(block_sizes))):
+                rng = np.random.default_rng(seed_sequence)
+                foak = scale_foak_samples(database, tracked, block_size, rng=rng, distributions=distributions)
+                blocks.append((BatchedCostTable(database, foak).snapshot(), rng.bit_generator.state))
+            return blocks
+
+        blocks = self._stage('FOAK costs', tracked, foak_costs, upstream='Cost database', external=seed)
+        snapshots = [snapshot for snapshot, _ in blocks]
+
+        # One working table per block; in_state[k] is the snapshot tables[k] holds
+        tables = [BatchedCostTable.from_snapshot(database, snapshot) for snapshot in snapshots]
+        in_state = [None] * len(tables)
+
+        def table_in_state(k, snapshot):
+            if in_state[k] is not snapshot:
+                tables[k].restore(snapshot)
+                in_state[k] = snapshot
+            return tables[k]
+
+        upstream = 'FOAK costs'
+        for name, stage in cost_stages():
+            def compute(tracked, stage=stage, snapshots=snapshots):
+                outputs = []
+                for k, snapshot in enumerate(snapshots):
+                    table = table_in_state(k, snapshot)
+                    table.report_warnings = k == 0
+                    stage(table, tracked)
+                    in_state[k] = table.snapshot()
+                    outputs.append(in_state[k])
+                return outputs
+            snapshots = self._stage(name, tracked, compute, upstream=upstream)
+            upstream = name
+
+        def summary(tracked):
+            # Statistics of the blocks, merged in block order as in run_sharded_samples
+            statistics = None
+            for k, (snapshot, (_, rng_state)) in enumerate(zip(snapshots, blocks)):
+                rng = np.random.default_rng()
+                rng.bit_generator.state = rng_state
+                accounts, titles, samples = table_samples(table_in_state(k, snapshot))
+                block_statistics = new_cost_statistics(len(accounts), tracked).update(samples, rng=rng)
+                statistics = block_statistics if statistics is None else statistics.merge(block_statistics)
+            return cost_summary_table(accounts, titles, statistics, tracked)
+
+        summary_table = self._stage('Summary', tracked, summary, upstream=upstream)
+        params.update(dict.items(tracked))
+        return summary_table.copy()
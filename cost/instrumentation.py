@@ -0,0 +1,186 @@
+# Copyright 2025, Battelle Energy Alliance, LLC, ALL RIGHTS RESERVED
+"""
+Stage-level instrumentation of cost runs.
+
+Inside instrument_cost_run, every stage of the cost engine (escalation,
+scaling, FOAK to NOAK, each roll-up pass, indirect costs, TCI, LCOE, ...)
+records its wall time, number of calls and, optionally, its peak allocation
+in a CostRunReport, together with the messages the engine prints (selected
+optional accounts, accounts without subaccounts):
+
+    with instrument_cost_run(track_allocations=True, quiet=True) as report:
+        bottom_up_cost_estimate(cost_database_filename, params)
+    report.to_json('cost_run_report.json')
+
+or, from the params, params['Instrumentation Report'] = 'cost_run_report.json'.
+
+Outside of a run the stages cost one global lookup each. Peak allocations
+are measured with tracemalloc, which slows Python-level code down, so they
+are only tracked on request. Sample blocks run by worker processes record
+into their own report, merged into the run's report: stage times are then
+summed over the processes, while the run's wall time is that of the caller.
+"""
+
+import contextlib
+import json
+import os
+import platform
+import time
+import tracemalloc
+
+_active_report = None
+_NO_STAGE = contextlib.nullcontext()
+
+
+class StageRecord:
+    # Accumulated measurements of one stage
+    __slots__ = ('calls', 'seconds', 'max_seconds', 'peak_bytes')
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.peak_bytes = None
+
+    def add(self, seconds, peak_bytes=None, calls=1):
+        self.calls += calls
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        if peak_bytes is not None:
+            self.peak_bytes = peak_bytes if self.peak_bytes is None else max(self.peak_bytes, peak_bytes)
+
+    def to_dict(self):
+        return {'Calls': self.calls, 'Wall Time (s)': self.seconds, 'Max Call Time (s)': self.max_seconds,
+                'Peak Allocation (bytes)': self.peak_bytes}
+
+
+class CostRunReport:
+    """
+    Stages (in the order of their first call) and messages of a cost run.
+    stages maps a stage name to its StageRecord; peak allocations are the
+    largest growth of the traced memory during one call of the stage.
+    """
+
+    def __init__(self, track_allocations=False, quiet=False):
+        self.track_allocations = track_allocations
+        self.quiet = quiet
+        self.stages = {}
+        self.messages = []
+        self.info = {}
+        self.wall_time = 0.0
+        self.peak_bytes = None
+        self._frames = []   # [traced memory at entry, largest peak of the nested stages] of the open stages
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        if self.track_allocations:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._frames:
+                self._frames[-1][1] = max(self._frames[-1][1], peak)
+            tracemalloc.reset_peak()
+            self._frames.append([current, current])
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            peak_bytes = None
+            if self.track_allocations:
+                entry, nested_peak = self._frames.pop()
+                peak = max(tracemalloc.get_traced_memory()[1], nested_peak)
+                peak_bytes = peak - entry
+                if self._frames:
+                    self._frames[-1][1] = max(self._frames[-1][1], peak)
+            self.stages.setdefault(name, StageRecord()).add(seconds, peak_bytes)
+
+    def message(self, text):
+        self.messages.append(text)
+
+    def merge(self, other):
+        # Adds the stages and messages of another report (e.g. of a worker process)
+        for name, record in other.stages.items():
+            merged = self.stages.setdefault(name, StageRecord())
+            merged.add(record.seconds, record.peak_bytes, calls=record.calls)
+            merged.max_seconds = max(merged.max_seconds, record.max_seconds)
+        self.messages.extend(other.messages)
+        return self
+
+    def to_dict(self):
+        return {'Wall Time (s)': self.wall_time,
+                'Peak Allocation (bytes)': self.peak_bytes,
+                'Allocation Tracking': self.track_allocations,
+                'Python': platform.python_version(),
+                'CPU Count': os.cpu_count(),
+                **self.info,
+                'Stages': {name: record.to_dict() for name, record in self.stages.items()},
+                'Messages': list(self.messages)}
+
+    def to_json(self, filename=None):
+        # JSON text of the report, also written to filename if given
+        text = json.dumps(self.to_dict(), indent=1, default=str)
+        if filename is not None:
+            with open(filename, 'w') as f:
+                f.write(text + '\n')
+        return text
+
+
+def active_report():
+    # The CostRunReport being recorded, or None
+    return _active_report
+
+
+def stage(name):
+    # Context manager measuring one call of a stage (a shared no-op outside of a run)
+    if _active_report is None:
+        return _NO_STAGE
+    return _active_report.stage(name)
+
+
+def message(text):
+    # Prints a message of the cost engine, and records it (without its surrounding blank lines) in the report of the run
+    if _active_report is not None:
+        _active_report.message(text.strip())
+        if _active_report.quiet:
+            return
+    print(text)
+
+
+@contextlib.contextmanager
+def instrument_cost_run(track_allocations=False, quiet=False):
+    """
+    Records the stages of the cost runs inside the block into a new
+    CostRunReport. quiet keeps the engine messages in the report instead of
+    printing them. Runs do not nest: inside a run, this returns the active report.
+    """
+    global _active_report
+    if _active_report is not None:
+        yield _active_report
+        return
+
+    report = CostRunReport(track_allocations=track_allocations, quiet=quiet)
+    started_tracing = track_allocations and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    elif track_allocations:
+        tracemalloc.reset_peak()
+    _active_report = report
+    start = time.perf_counter()
+    try:
+        yield report
+    finally:
+        report.wall_time = time.perf_counter() - start
+        if track_allocations:
+            report.peak_bytes = tracemalloc.get_traced_memory()[1]
+        if started_tracing:
+            tracemalloc.stop()
+        _active_report = None
+
+
+def run_instrumented(track_allocations, function, *args, **kwargs):
+    # Runs function in a report of its own, in a worker process; returns (result, report).
+    # A forked worker inherits a copy of the caller's report, which is not the one to record into.
+    global _active_report
+    _active_report = None
+    with instrument_cost_run(track_allocations=track_allocations, quiet=True) as report:
+        result = function(*args, **kwargs)
+    return result, report
@@ -0,0 +1,61 @@
+# Copyright 2025, Battelle Energy Alliance, LLC, ALL RIGHTS RESERVED
+"""
+Levelized cost kernel shared by the cost engines and the cost-driver tables.
+
+Discounted-cash-flow convention used throughout MOUSE: the capital cost is paid
+at year 0, annual costs are paid and electricity is produced in years
+1..Levelization Period, all discounted at the discount rate:
+
+    LCOE = (capital + annual × AF) / (annual electricity × AF)
+    AF   = Σ_{i=1..N} (1 + r)^-i = (1 - (1 + r)^-N) / r
+
+The sums over years are evaluated once, as annuity factors, instead of in a
+loop over every year. All inputs may be NumPy arrays (samples × accounts ×
+scenarios, ...) and results broadcast, so per-account tables and sweeps over
+financial parameters are single array operations.
+"""
+
+import numpy as np
+
+HOURS_PER_YEAR = 365 * 24
+
+
+def annuity_factor(discount_rate, n_years):
+    # Present value of 1 $ per year paid in years 1..n_years (n_years itself when the rate is 0)
+    discount_rate = np.asarray(discount_rate, dtype=float)
+    n_years = np.asarray(n_years, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = (1 - (1 + discount_rate) ** -n_years) / discount_rate
+    return np.where(discount_rate == 0, n_years, factor)
+
+
+class LevelizedCost:
+    """
+    Levelizing factors of one plant (or of an array of financial scenarios).
+
+    discount_rate, levelization_period, power_MWe and capacity_factor may be
+    scalars or arrays; the cost arguments of the methods broadcast against them.
+    """
+
+    def __init__(self, discount_rate, levelization_period, power_MWe, capacity_factor):
+        self.discount_rate = np.asarray(discount_rate, dtype=float)
+        self.levelization_period = np.asarray(levelization_period, dtype=float)
+        self.annuity = annuity_factor(self.discount_rate, self.levelization_period)
+        self.annual_electricity = np.asarray(power_MWe, dtype=float) * capacity_factor * HOURS_PER_YEAR  # MWh/year
+        self.pv_electricity = self.annual_electricity * self.annuity
+
+    @classmethod
+    def from_params(cls, params):
+        return cls(params['Discount Rate'], params['Levelization Period'], params['Power MWe'], params['Capacity Factor'])
+
+    def lcoe(self, capital_cost, annual_cost):
+        # $/MWh of a capital cost paid at year 0 plus an annual cost paid in years 1..N
+        return (capital_cost + annual_cost * self.annuity) / self.pv_electricity
+
+    def ptc_credit(self, credit_value, credit_period, tax_rate, bonus_multiplier=1.0):
+        # $/MWh LCOE reduction from a production tax credit paid on the electricity of
+        # years 1..credit_period (grossed up for taxes, as a pre-tax equivalent)
+        credit_years = np.clip(np.floor(credit_period), 0, self.levelization_period)
+        pv_credit = (self.annual_electricity * (credit_value * bonus_multiplier) / (1 - tax_rate)
+                     * annuity_factor(self.discount_rate, credit_years))
+        return pv_credit / self.pv_electricity
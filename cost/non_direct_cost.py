@@ -3,6 +3,16 @@
 import numpy as np
 import pandas as pd
 from cost.code_of_account_processing import get_estimated_cost_column
+from cost.levelized_cost import LevelizedCost
+
+# -----------------------------------------------------------------------------------------
+# Heat application cost reduction factors (hardcoded, based on process heat study)
+# For heat applications, the OCC is lower because no power conversion system is needed
+# (e.g. no turbine, generator, condenser). The annual O&M cost is also slightly reduced.
+# Source: [add your reference here]
+# -----------------------------------------------------------------------------------------
+HEAT_OCC_FACTOR         = 0.795  # OCC for heat = OCC_electric × 0.795
+HEAT_ANNUAL_COST_FACTOR = 0.966  # Annual O&M+fuel cost for heat = baseline × 0.966
 
 def validate_tax_credit_params(params):
     """
@@ -326,20 +336,73 @@ def calculate_TCI(df, params):
     return df
 
 
-def energy_cost_levelized(params, df):
+def levelized_energy_costs(params, TCI, ann_cost, OCC, TCI_ITC=None, eligible=True):
+    """
+    LCOE, LCOH and tax-credit adjusted LCOE of one cost column ($/MWh, $/MWth).
+
+    TCI, ann_cost (accounts 70 + 80), OCC and TCI_ITC (TCI (ITC-adjusted), used when
+    'ITC credit level' is in params) may be scalars or arrays of samples; eligible
+    says whether this unit may claim the ITC/PTC (a bool, or a bool per sample).
+    Shared by energy_cost_levelized and the batched engine. Returns {account: value}.
+    """
+    params.setdefault('Tax Rate', 0.21)
+    levelized = LevelizedCost.from_params(params)
+
+    # Baseline LCOE (no tax credits): capital at year 0, O&M and fuel in years 1..Levelization Period
+    lcoe = levelized.lcoe(TCI, ann_cost)
+    levelized_costs = {'LCOE': lcoe}
+
     # -----------------------------------------------------------------------------------------
-    # LCOE (Levelized Cost of Energy) Calculation
-    # ... (existing docstring unchanged)
+    # LCOH (Levelized Cost of Heat) calculation
+    #
+    # For heat applications, the plant does not need a power conversion system,
+    # so both capital and O&M costs are reduced by the factors defined above.
+    #
+    # The full heat cost chain (all intermediate values are behind the scenes):
+    #   1. OCC_heat      = OCC × HEAT_OCC_FACTOR
+    #   2. Interest_heat = calculate_interest_cost(params, OCC_heat)
+    #   3. TCI_heat      = OCC_heat + Interest_heat
+    #   4. ann_cost_heat = ann_cost × HEAT_ANNUAL_COST_FACTOR
+    #   5. LCOE_heat     = PV(costs with TCI_heat, ann_cost_heat) / PV(electricity)
+    #   6. LCOH          = LCOE_heat × Thermal Efficiency
+    #
+    # The ×Thermal Efficiency step converts from $/MWhe to $/MWth:
+    # e.g. η=0.33 → 1 MWhe = 3 MWth → LCOH = LCOE_heat × 0.33 → cheaper per MWth
     # -----------------------------------------------------------------------------------------
+    OCC_heat      = OCC * HEAT_OCC_FACTOR
+    TCI_heat      = OCC_heat + calculate_interest_cost(params, OCC_heat)
+    ann_cost_heat = ann_cost * HEAT_ANNUAL_COST_FACTOR
+    levelized_costs['LCOH'] = levelized.lcoe(TCI_heat, ann_cost_heat) * params['Thermal Efficiency']
+
+    if 'PTC credit value' in params.keys():
+        if np.any(eligible):
+            assert 'PTC credit period' in params.keys(), 'error: If a PTC credit value is provided, a corresponding PTC credit period must be given as well.'
+            try:
+                bonus_multiplier = 1.0 + params['domestic_content_bonus'] + params['energy_community_bonus']
+            except:
+                print('--- warning: Assume no extra percentage on the credit')
+                bonus_multiplier = 1.0
+            ptc_credit = levelized.ptc_credit(params['PTC credit value'], params['PTC credit period'],
+                                              params['Tax Rate'], bonus_multiplier)
+            # Units past the IRA sunset cutoff get no credit
+            levelized_costs['LCOE with PTC'] = lcoe - np.where(eligible, ptc_credit, 0)
+        else:
+            # This unit is past the IRA sunset cutoff — fall back to the
+            # un-subsidized LCOE so the 'LCOE with PTC' cell shows the
+            # un-subsidized cost rather than blank/NaN.
+            levelized_costs['LCOE with PTC'] = lcoe
+
+    # ITC adjustment: the same LCOE with the ITC-reduced capital investment
+    if 'ITC credit level' in params.keys():
+        levelized_costs['LCOE (ITC-adjusted)'] = levelized.lcoe(TCI_ITC, ann_cost)
+    return levelized_costs
+
 
+def energy_cost_levelized(params, df):
     # -----------------------------------------------------------------------------------------
-    # Heat application cost reduction factors (hardcoded, based on process heat study)
-    # For heat applications, the OCC is lower because no power conversion system is needed
-    # (e.g. no turbine, generator, condenser). The annual O&M cost is also slightly reduced.
-    # Source: [add your reference here]
+    # LCOE (Levelized Cost of Energy) Calculation
+    # ... (existing docstring unchanged)
     # -----------------------------------------------------------------------------------------
-    HEAT_OCC_FACTOR         = 0.795  # OCC for heat = OCC_electric × 0.795
-    HEAT_ANNUAL_COST_FACTOR = 0.966  # Annual O&M+fuel cost for heat = baseline × 0.966
 
     df = pd.concat([df, pd.DataFrame([{'Account': 'AC',         'Account Title': 'Annualized Cost'}])], ignore_index=True)
     df = pd.concat([df, pd.DataFrame([{'Account': 'AC per MWh', 'Account Title': 'Annualized Cost per MWh'}])], ignore_index=True)
@@ -354,13 +417,6 @@ def energy_cost_levelized(params, df):
 
     df = pd.concat([df, pd.DataFrame([{'Account': 'LCOH',       'Account Title': 'Levelized Cost Of Heat ($/MWth)'}])], ignore_index=True)
 
-    params.setdefault('Tax Rate', 0.21)
-
-    plant_lifetime_years = params['Levelization Period']
-    discount_rate        = params['Discount Rate']
-    power_MWe            = params['Power MWe']
-    capacity_factor      = params['Capacity Factor']
-    thermal_efficiency   = params['Thermal Efficiency']
     estimated_cost_col_F = get_estimated_cost_column(df, 'F')
     estimated_cost_col_N = get_estimated_cost_column(df, 'N')
 
@@ -376,281 +432,18 @@ def energy_cost_levelized(params, df):
                           estimated_cost_col_N: noak_unit <= n_credit}
 
     for estimated_cost_col in [estimated_cost_col_F, estimated_cost_col_N]:
-
-        # -----------------------------------------------------------------------------------------
-        # Baseline LCOE calculation (no tax credits) — unchanged
-        # -----------------------------------------------------------------------------------------
-        cap_cost          = df.loc[df['Account'] == 'TCI', estimated_cost_col].values[0]
-        ann_cost          = df.loc[df['Account'] == 70, estimated_cost_col].values[0] + df.loc[df['Account'] == 80, estimated_cost_col].values[0]
+        cap_cost           = df.loc[df['Account'] == 'TCI', estimated_cost_col].values[0]
+        ann_cost           = df.loc[df['Account'] == 70, estimated_cost_col].values[0] + df.loc[df['Account'] == 80, estimated_cost_col].values[0]
         levelized_ann_cost = ann_cost / params['Annual Electricity Production']
         df.loc[df['Account'] == 'AC',        estimated_cost_col] = ann_cost
         df.loc[df['Account'] == 'AC per MWh', estimated_cost_col] = levelized_ann_cost
 
-        sum_cost = 0
-        sum_elec = 0
-        for i in range(1 + plant_lifetime_years):
-            if i == 0:
-                cap_cost_per_year = cap_cost
-                annual_cost       = 0
-                elec_gen          = 0
-            else:
-                cap_cost_per_year = 0
-                annual_cost       = ann_cost
-                elec_gen          = power_MWe * capacity_factor * 365 * 24
-            sum_cost += (cap_cost_per_year + annual_cost) / ((1 + discount_rate)**i)
-            sum_elec += elec_gen / ((1 + discount_rate)**i)
-
-        lcoe = sum_cost / sum_elec
-        df.loc[df['Account'] == 'LCOE', estimated_cost_col] = lcoe
-
-        # -----------------------------------------------------------------------------------------
-        # LCOH (Levelized Cost of Heat) calculation
-        #
-        # For heat applications, the plant does not need a power conversion system,
-        # so both capital and O&M costs are reduced by the factors defined above.
-        #
-        # The full heat cost chain (all intermediate values are behind the scenes):
-        #   1. OCC_heat      = OCC × HEAT_OCC_FACTOR
-        #   2. Interest_heat = calculate_interest_cost(params, OCC_heat)
-        #   3. TCI_heat      = OCC_heat + Interest_heat
-        #   4. ann_cost_heat = ann_cost × HEAT_ANNUAL_COST_FACTOR
-        #   5. LCOE_heat     = PV(costs with TCI_heat, ann_cost_heat) / PV(electricity)
-        #   6. LCOH          = LCOE_heat × Thermal Efficiency
-        #
-        # The ×Thermal Efficiency step converts from $/MWhe to $/MWth:
-        # e.g. η=0.33 → 1 MWhe = 3 MWth → LCOH = LCOE_heat × 0.33 → cheaper per MWth
-        # -----------------------------------------------------------------------------------------
-        OCC           = df.loc[df['Account'] == 'OCC', estimated_cost_col].values[0]
-        OCC_heat      = OCC * HEAT_OCC_FACTOR
-        Interest_heat = calculate_interest_cost(params, OCC_heat)
-        TCI_heat      = OCC_heat + Interest_heat
-        ann_cost_heat = ann_cost * HEAT_ANNUAL_COST_FACTOR
-
-        sum_cost_heat = 0
-        sum_elec_heat = 0
-        for i in range(1 + plant_lifetime_years):
-            if i == 0:
-                cap_cost_per_year = TCI_heat
-                annual_cost_heat  = 0
-                elec_gen          = 0
-            else:
-                cap_cost_per_year = 0
-                annual_cost_heat  = ann_cost_heat
-                elec_gen          = power_MWe * capacity_factor * 365 * 24
-            sum_cost_heat += (cap_cost_per_year + annual_cost_heat) / ((1 + discount_rate)**i)
-            sum_elec_heat += elec_gen / ((1 + discount_rate)**i)
-
-            lcoe = sum_cost / sum_elec
-            df.loc[df['Account'] == 'LCOE (ITC-adjusted)', estimated_cost_col] = lcoe
-
-        # -----------------------------------------------------------------------------------------
-        # LCOH — always computed last so it appears as the final row in the output table
-        # -----------------------------------------------------------------------------------------
-        OCC           = df.loc[df['Account'] == 'OCC', estimated_cost_col].values[0]
-        OCC_heat      = OCC * HEAT_OCC_FACTOR
-        Interest_heat = calculate_interest_cost(params, OCC_heat)
-        TCI_heat      = OCC_heat + Interest_heat
-        ann_cost_heat = ann_cost * HEAT_ANNUAL_COST_FACTOR
-
-        sum_cost_heat = 0
-        sum_elec_heat = 0
-        for i in range(1 + plant_lifetime_years):
-            if i == 0:
-                cap_cost_per_year = TCI_heat
-                annual_cost_heat  = 0
-                elec_gen          = 0
-            else:
-                cap_cost_per_year = 0
-                annual_cost_heat  = ann_cost_heat
-                elec_gen          = power_MWe * capacity_factor * 365 * 24
-            sum_cost_heat += (cap_cost_per_year + annual_cost_heat) / ((1 + discount_rate)**i)
-            sum_elec_heat += elec_gen / ((1 + discount_rate)**i)
-
-        lcoe_heat = sum_cost_heat / sum_elec_heat
-        lcoh      = lcoe_heat * thermal_efficiency
-        df.loc[df['Account'] == 'LCOH', estimated_cost_col] = lcoh
-        # -----------------------------------------------------------------------------------------
-        if 'PTC credit value' in params.keys():
-            if eligible_by_column[estimated_cost_col]:
-                sum_elec = 0
-                sum_ptc  = 0
-                assert 'PTC credit period' in params.keys(), 'error: If a PTC credit value is provided, a corresponding PTC credit period must be given as well.'
-                try:
-                    bonus_multiplier = 1.0 + params['domestic_content_bonus'] + params['energy_community_bonus']
-                except:
-                    print('--- warning: Assume no extra percentage on the credit')
-                    bonus_multiplier = 1.0
-
-                for i in range(1 + plant_lifetime_years):
-                    if i == 0:
-                        elec_gen = 0
-                        ptc_gen  = 0
-                    else:
-                        elec_gen = power_MWe * capacity_factor * 365 * 24
-                        if i > params['PTC credit period']:
-                            ptc_gen = 0
-                        else:
-                            ptc_gen = elec_gen * (params['PTC credit value'] * bonus_multiplier) / (1 - params['Tax Rate'])
-                    sum_ptc  += ptc_gen  / ((1 + discount_rate)**i)
-                    sum_elec += elec_gen / ((1 + discount_rate)**i)
-
-                estimated_ptc = sum_ptc / sum_elec
-                df.loc[df['Account'] == 'LCOE with PTC', estimated_cost_col] = lcoe - estimated_ptc
-            else:
-                # This unit is past the IRA sunset cutoff — fall back to the
-                # un-subsidized LCOE so the 'LCOE with PTC' cell shows the
-                # un-subsidized cost rather than blank/NaN.
-                df.loc[df['Account'] == 'LCOE with PTC', estimated_cost_col] = lcoe
-
-        # -----------------------------------------------------------------------------------------
-        # ITC adjustment — unchanged
-        # -----------------------------------------------------------------------------------------
-        if 'ITC credit level' in params.keys():
-            cap_cost      = df.loc[df['Account'] == 'TCI (ITC-adjusted)', estimated_cost_col].values[0]
-            ann_cost      = df.loc[df['Account'] == 70, estimated_cost_col].values[0] + df.loc[df['Account'] == 80, estimated_cost_col].values[0]
-            levelized_ann_cost = ann_cost / params['Annual Electricity Production']
-            df.loc[df['Account'] == 'AC',         estimated_cost_col] = ann_cost
-            df.loc[df['Account'] == 'AC per MWh', estimated_cost_col] = levelized_ann_cost
-            sum_cost = 0
-            sum_elec = 0
-
-            for i in range(1 + plant_lifetime_years):
-                if i == 0:
-                    cap_cost_per_year = cap_cost
-                    annual_cost       = 0
-                    elec_gen          = 0
-                else:
-                    cap_cost_per_year = 0
-                    annual_cost       = ann_cost
-                    elec_gen          = power_MWe * capacity_factor * 365 * 24
-                sum_cost += (cap_cost_per_year + annual_cost) / ((1 + discount_rate)**i)
-                sum_elec += elec_gen / ((1 + discount_rate)**i)
-
-            lcoe = sum_cost / sum_elec
-            df.loc[df['Account'] == 'LCOE (ITC-adjusted)', estimated_cost_col] = lcoe
+        OCC     = df.loc[df['Account'] == 'OCC', estimated_cost_col].values[0]
+        TCI_ITC = (df.loc[df['Account'] == 'TCI (ITC-adjusted)', estimated_cost_col].values[0]
+                   if 'ITC credit level' in params.keys() else None)
+        levelized_costs = levelized_energy_costs(params, cap_cost, ann_cost, OCC, TCI_ITC,
+                                                 eligible=eligible_by_column[estimated_cost_col])
+        for account, cost in levelized_costs.items():
+            df.loc[df['Account'] == account, estimated_cost_col] = cost
 
     return df
-
-    for estimated_cost_col in [estimated_cost_col_F, estimated_cost_col_N]:
-
-        # -----------------------------------------------------------------------------------------
-        # Baseline LCOE calculation (no tax credits)
-        # Capital cost is paid upfront at year 0; O&M and fuel costs are paid annually from year 1
-        # -----------------------------------------------------------------------------------------
-        cap_cost = df.loc[df['Account'] == 'TCI', estimated_cost_col].values[0]
-        ann_cost = df.loc[df['Account'] == 70, estimated_cost_col].values[0] + df.loc[df['Account'] == 80, estimated_cost_col].values[0]
-        levelized_ann_cost = ann_cost / params['Annual Electricity Production']
-        df.loc[df['Account'] == 'AC', estimated_cost_col] = ann_cost
-        df.loc[df['Account'] == 'AC per MWh', estimated_cost_col] = levelized_ann_cost
-        sum_cost = 0
-        sum_elec = 0
-
-        for i in range(1 + plant_lifetime_years):
-            if i == 0:
-                # Year 0: capital cost is paid, no electricity is produced
-                cap_cost_per_year = cap_cost
-                annual_cost = 0
-                elec_gen = 0
-            elif i > 0:
-                # Years 1 to plant_lifetime: O&M and fuel costs are paid, electricity is produced
-                cap_cost_per_year = 0
-                annual_cost = ann_cost
-                elec_gen = power_MWe * capacity_factor * 365 * 24  # MWh/year
-            sum_cost += (cap_cost_per_year + annual_cost) / ((1 + discount_rate)**i)
-            sum_elec += elec_gen / ((1 + discount_rate)**i)
-
-        # Divide PV of costs by PV of electricity to get levelized $/MWh
-        lcoe = sum_cost / sum_elec
-        df.loc[df['Account'] == 'LCOE', estimated_cost_col] = lcoe
-
-        # -----------------------------------------------------------------------------------------
-        # PTC (Production Tax Credit) adjustment
-        # -----------------------------------------------------------------------------------------
-        # The PTC is a per-MWh tax credit earned for every MWh produced during the credit period.
-        # To subtract it from the before-tax LCOE consistently, the PTC must be grossed up
-        # by (1 - tax_rate) to convert it to its before-tax revenue equivalent.
-        #
-        # Without gross-up: $15/MWh credit would be subtracted directly → underestimates benefit
-        # With gross-up:    $15/MWh / (1 - 0.21) = $18.99/MWh → correct before-tax equivalent
-        #
-        # The PTC is only earned during the credit period (e.g. 10 years).
-        # Both PTC revenue and electricity production are discounted to present value,
-        # then divided to give a levelized $/MWh equivalent that accounts for the fact
-        # that credits only come in the first N years but electricity spans the full plant life.
-        #
-        # Bonus multiplier accounts for IRA stackable bonuses:
-        #   - domestic_content_bonus : extra % for using US-made materials
-        #   - energy_community_bonus : extra % for siting in an energy community
-        # -----------------------------------------------------------------------------------------
-        if 'PTC credit value' in params.keys():
-            sum_elec = 0
-            sum_ptc = 0
-            assert 'PTC credit period' in params.keys(), 'error: If a PTC credit value is provided, a corresponding PTC credit period must be given as well.'
-            try:
-                # Apply stackable IRA bonus multipliers if provided
-                bonus_multiplier = 1.0 + params['domestic_content_bonus'] + params['energy_community_bonus']
-            except:
-                print('--- warning: Assume no extra percentage on the credit')
-                bonus_multiplier = 1.0
-
-            for i in range(1 + plant_lifetime_years):
-                if i == 0:
-                    # Year 0: construction year, no electricity or PTC
-                    elec_gen = 0
-                    ptc_gen = 0
-                elif i > 0:
-                    elec_gen = power_MWe * capacity_factor * 365 * 24  # MWh/year
-                    if i > params['PTC credit period']:
-                        # Credit period has expired — no more PTC
-                        ptc_gen = 0
-                    else:
-                        # PTC earned this year, grossed up to before-tax equivalent
-                        # Gross-up formula: PTC_before_tax = PTC_credit / (1 - tax_rate)
-                        ptc_gen = elec_gen * (params['PTC credit value'] * bonus_multiplier) / (1 - params['Tax Rate'])
-
-                sum_ptc += ptc_gen / ((1 + discount_rate)**i)
-                sum_elec += elec_gen / ((1 + discount_rate)**i)
-
-            # Levelized PTC = PV(PTC revenue) / PV(electricity produced)
-            # This gives the effective $/MWh reduction in LCOE due to the PTC
-            estimated_ptc = sum_ptc / sum_elec
-            df.loc[df['Account'] == 'LCOE with PTC', estimated_cost_col] = lcoe - estimated_ptc
-
-        # -----------------------------------------------------------------------------------------
-        # ITC (Investment Tax Credit) LCOE adjustment
-        # -----------------------------------------------------------------------------------------
-        # The ITC reduces the capital cost (OCC) upfront — already computed in calculate_TCI.
-        # Here, the LCOE is recalculated using the reduced capital cost (TCI with ITC)
-        # instead of the baseline TCI. O&M and fuel costs are unchanged.
-        #
-        # This produces two additional output metrics:
-        #   - LCOE with ITC      : full LCOE using reduced capital cost
-        #   - LCOE_cap_withitc   : capital-only component of LCOE with ITC
-        # -----------------------------------------------------------------------------------------
-        if 'ITC credit level' in params.keys():
-            # Use the ITC-adjusted capital cost computed in calculate_TCI
-            cap_cost = df.loc[df['Account'] == 'TCI (ITC-adjusted)', estimated_cost_col].values[0]
-            ann_cost = df.loc[df['Account'] == 70, estimated_cost_col].values[0] + df.loc[df['Account'] == 80, estimated_cost_col].values[0]
-            levelized_ann_cost = ann_cost / params['Annual Electricity Production']
-            df.loc[df['Account'] == 'AC', estimated_cost_col] = ann_cost
-            df.loc[df['Account'] == 'AC per MWh', estimated_cost_col] = levelized_ann_cost
-            sum_cost = 0
-            sum_elec = 0
-
-            for i in range(1 + plant_lifetime_years):
-                if i == 0:
-                    # Year 0: ITC-adjusted capital cost is paid upfront
-                    cap_cost_per_year = cap_cost
-                    annual_cost = 0
-                    elec_gen = 0
-                elif i > 0:
-                    cap_cost_per_year = 0
-                    annual_cost = ann_cost
-                    elec_gen = power_MWe * capacity_factor * 365 * 24  # MWh/year
-                sum_cost += (cap_cost_per_year + annual_cost) / ((1 + discount_rate)**i)
-                sum_elec += elec_gen / ((1 + discount_rate)**i)
-
-            lcoe = sum_cost / sum_elec
-            df.loc[df['Account'] == 'LCOE (ITC-adjusted)', estimated_cost_col] = lcoe
-
-    return df
\ No newline at end of file
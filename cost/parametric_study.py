@@ -0,0 +1,172 @@
+# Copyright 2025, Battelle Energy Alliance, LLC, ALL RIGHTS RESERVED
+"""
+Batch parametric studies: the cost estimate of every point of a sweep.
+
+A sweep is a list of points; each point is a dict of params overrides applied
+on top of one base params dict. Points come from
+
+    grid_points({'Interest Rate': [0.04, 0.07], 'Construction Duration': [12, 24]})   # Cartesian grid
+    doe_points({'Interest Rate': (0.03, 0.10)}, n_points=32)                           # design of experiments
+    [{'Interest Rate': 0.05}, {'Interest Rate': 0.08, 'Discount Rate': 0.06}]         # explicit list
+
+run_parametric_study runs the cost estimate of all points over a pool of
+worker processes and writes one row per point (the overrides, the tracked
+params and the tracked costs of create_cost_dictionary) to the output table:
+a CSV file, or Parquet when the file name ends in '.parquet'.
+
+Completed points are written to the output in chunks. Every point has a
+'Point ID', a hash of its params (the base params with its overrides), the
+seed, the tracked params, the prepare function and the cost database, so
+rerunning the same study after a crash skips the points already in the output,
+while a rerun with another base design, seed or workbook recomputes them. With a ResultsStore, the
+workers also add every point (its params and its row) to the store.
+"""
+
+import copy
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from cost.code_of_account_processing import create_cost_dictionary
+from cost.cost_database import cost_database_hash
+from cost.cost_estimation import bottom_up_cost_estimate
+from cost.results_store import params_hash
+from cost.sampling import uniform_design
+
+# Number of points of a sweep run between two writes of the output table
+STUDY_CHUNK_SIZE = 16
+
+
+def grid_points(axes):
+    # Every combination of the values of the axes ({param: values}), the last axis varying fastest
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[name] for name in names))]
+
+
+def doe_points(ranges, n_points, strategy='Latin Hypercube', seed=None):
+    """
+    n_points points spread over the ranges ({param: (low, high)}) by a uniform
+    design: 'Latin Hypercube', 'Sobol' or 'Random' (see sampling.uniform_design).
+    """
+    names = list(ranges)
+    design = uniform_design(strategy, n_points, len(names), rng=np.random.default_rng(seed))
+    low = np.array([ranges[name][0] for name in names], dtype=float)
+    high = np.array([ranges[name][1] for name in names], dtype=float)
+    values = low + (high - low) * design
+    return [dict(zip(names, map(float, row))) for row in values]
+
+
+def _function_name(function):
+    return None if function is None else f"{getattr(function, '__module__', None)}.{getattr(function, '__qualname__', repr(function))}"
+
+
+def point_id(point, base_params=None, seed=None, tracked_params_list=(), prepare=None, database_hash=None):
+    # Stable key of a point of a study, independent of the order of the params
+    study = {'Random Seed': seed, 'Tracked Params': list(tracked_params_list), 'Prepare': _function_name(prepare),
+             'Cost Database Hash': database_hash}
+    return params_hash(dict(base_params or {}, **point, **study))[:16]
+
+
+def _read_table(filename):
+    if filename.endswith('.parquet'):
+        return pd.read_parquet(filename)
+    return pd.read_csv(filename, dtype={'Point ID': str})
+
+
+def _write_table(table, filename):
+    # Written to a temporary file first, so a crash never leaves a truncated table behind
+    temporary = f'{filename}.tmp'
+    if filename.endswith('.parquet'):
+        table.to_parquet(temporary, index=False)
+    else:
+        table.to_csv(temporary, index=False)
+    os.replace(temporary, filename)
+
+
+def _point_costs(cost_database_filename, base_params, point, tracked_params_list, seed, prepare, store, key):
+    # One row of the output table. Runs in a worker process, so the estimate itself runs on one worker.
+    params = copy.deepcopy(base_params)
+    params.update(point)
+    if prepare is not None:
+        prepare(params)
+    inputs = copy.deepcopy(params) if store is not None else None
+    detailed_cost_table = bottom_up_cost_estimate(cost_database_filename, params, seed=seed, n_workers=1)
+    tracked = list(point) + [key for key in tracked_params_list if key not in point]
+    tracked_costs = create_cost_dictionary(detailed_cost_table, params, tracked)
+    if store is not None:
+        store.put(dict(inputs, **{'Random Seed': seed}), tracked_costs)
+    return {'Point ID': key, **tracked_costs}
+
+
+def run_parametric_study(cost_database_filename, base_params, points, output_filename, tracked_params_list=(),
+                         prepare=None, seed=None, n_workers=None, resume=True, chunk_size=STUDY_CHUNK_SIZE,
+                         store=None):
+    """
+    Cost estimate of every point of a sweep (see the module docstring).
+
+    Parameters
+    ----------
+    base_params : dict
+        Params shared by all points; not modified.
+    points : list of dict
+        Params overrides of every point.
+    output_filename : str
+        Output table, '.csv' or '.parquet' (Parquet requires pyarrow).
+    tracked_params_list : sequence of str
+        Params reported next to the overrides and the costs of every point.
+    prepare : callable, optional
+        Called with the params of every point before its cost estimate, e.g. to
+        rerun the design calculations the point changes. It runs in the worker
+        processes, so it must be a module-level function.
+    seed : int, optional
+        Seed of every point's samples (default params['Random Seed']). All points
+        then share their random numbers, so differences between points are not
+        blurred by sampling noise.
+    n_workers : int, optional
+        Number of processes the points are split over (default params['Number of Workers']).
+    resume : bool
+        Skip the points already in the output table. Without it the output table is overwritten.
+    store : ResultsStore, optional
+        Store the workers add every point to, keyed by its params (including the seed).
+
+    Returns the output table (all points of the study, including earlier runs).
+    """
+    if seed is None:
+        seed = base_params.get('Random Seed')
+    if n_workers is None:
+        n_workers = base_params.get('Number of Workers', 1)
+
+    table = _read_table(output_filename) if resume and os.path.isfile(output_filename) else None
+    database_hash = cost_database_hash(cost_database_filename)
+    keys = [point_id(point, base_params, seed, tracked_params_list, prepare, database_hash) for point in points]
+    if table is not None:
+        # Rows of another study (other base params, seed, ... or points) are not results of this one
+        current = table['Point ID'].isin(keys)
+        if not current.all():
+            print(f"Dropping {int((~current).sum())} points of another study from {output_filename}")
+            table = table[current].reset_index(drop=True)
+    done = set() if table is None else set(table['Point ID'])
+    pending = [(point, key) for point, key in zip(points, keys) if key not in done]
+    if table is not None:
+        print(f"Resuming the parametric study: {len(points) - len(pending)} of {len(points)} points are already in {output_filename}")
+
+    n_workers = max(1, min(int(n_workers or 1), len(pending)))
+    executor = ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 else None
+    try:
+        for first in range(0, len(pending), chunk_size):
+            chunk, chunk_keys = zip(*pending[first:first + chunk_size])
+            arguments = ([cost_database_filename] * len(chunk), [base_params] * len(chunk), chunk,
+                         [tracked_params_list] * len(chunk), [seed] * len(chunk), [prepare] * len(chunk),
+                         [store] * len(chunk), chunk_keys)
+            rows = list(executor.map(_point_costs, *arguments) if executor else map(_point_costs, *arguments))
+            table = pd.concat([table, pd.DataFrame(rows)], ignore_index=True) if table is not None else pd.DataFrame(rows)
+            _write_table(table, output_filename)
+            print(f"Parametric study: {first + len(chunk)} of {len(pending)} points saved on {output_filename}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return table if table is not None else pd.DataFrame(columns=['Point ID'])
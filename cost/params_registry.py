@@ -1154,6 +1154,78 @@ PARAMS_REGISTRY = {
         'description': 'Number of Monte Carlo samples used for cost uncertainty quantification',
         'source': 'User Input', 'hidden': False, 'array_mode': None},
 
+    'Cost Engine': {
+        'group': 'Economic Parameters', 'units': '',
+        'description': "Monte Carlo engine used by the bottom-up estimate: 'Batched' (default) evaluates all samples "
+                       "at once on arrays, 'Per-Sample' rebuilds the cost table for every sample",
+        'source': 'User Input', 'hidden': False, 'array_mode': None},
+
+    'Sampling Strategy': {
+        'group': 'Economic Parameters', 'units': '',
+        'description': "How the uncertain costs and exponents are sampled: 'Random' (default), or a scrambled "
+                       "'Sobol' or 'Latin Hypercube' design mapped through each account's inverse CDF, which "
+                       "converges with fewer samples (Batched engine only)",
+        'source': 'User Input', 'hidden': False, 'array_mode': None},
+
+    'Sample Relative Tolerance': {
+        'group': 'Economic Parameters', 'units': 'fraction',
+        'description': 'Adaptive sample count: stop sampling once the standard error of the FOAK/NOAK LCOE and TCI '
+                       'means is below this fraction of the mean (Number of Samples is then the maximum)',
+        'source': 'User Input', 'hidden': False, 'array_mode': None},
+
+    'Sample Time Budget': {
+        'group': 'Economic Parameters', 'units': 's',
+        'description': 'Adaptive sample count: stop sampling after this wall time (Number of Samples is then the maximum)',
+        'source': 'User Input', 'hidden': False, 'array_mode': None},
+
+    'Random Seed': {
+        'group': 'Economic Parameters', 'units': '',
+        'description': 'Seed of the Monte Carlo cost samples; with a seed the estimate is reproducible '
+                       '(unset = fresh random samples every run)',
+        'source': 'User Input', 'hidden': False, 'array_mode': None},
+
+    'Number of Workers': {
+        'group': 'Economic Parameters', 'units': '',
+        'description': 'Number of processes the Monte Carlo cost samples are split over (Batched engine); '
+                       'results for a given seed do not depend on it',
+        'source': 'User Input', 'hidden': False, 'array_mode': None},
+
+    'Report Format': {
+        'group': 'Economic Parameters', 'units': '',
+        'description': "Format of the detailed cost report: 'xlsx' (default), 'json' or 'parquet' "
+                       '(a folder of one Parquet file per table, requires pyarrow)',
+        'source': 'User Input', 'hidden': False, 'array_mode': None},
+
+    'Sample Export': {
+        'group': 'Economic Parameters', 'units': '',
+        'description': 'Folder the raw FOAK/NOAK cost samples and sampled inputs of every account are written to '
+                       '(.npy arrays plus a JSON sidecar, Batched engine; unset = no export)',
+        'source': 'User Input', 'hidden': False, 'array_mode': None},
+
+    'Estimate Cache': {
+        'group': 'Economic Parameters', 'units': '',
+        'description': 'Serve repeated estimates of the same inputs, cost database, seed and code from the '
+                       'on-disk estimate cache shared by all processes (True/False)',
+        'source': 'User Input', 'hidden': False, 'array_mode': None},
+
+    'Instrumentation Report': {
+        'group': 'Economic Parameters', 'units': '',
+        'description': 'JSON file the wall time, calls and peak allocation of every stage of the cost run, and the '
+                       'messages of the engine, are written to (unset = no instrumentation)',
+        'source': 'User Input', 'hidden': False, 'array_mode': None},
+
+    'Track Allocations': {
+        'group': 'Economic Parameters', 'units': '',
+        'description': 'Measure the peak allocation of every stage in the instrumentation report with tracemalloc, '
+                       'which slows the run down (True/False)',
+        'source': 'User Input', 'hidden': False, 'array_mode': None},
+
+    'Cost Percentiles': {
+        'group': 'Economic Parameters', 'units': '%',
+        'description': 'Percentiles of the Monte Carlo cost samples reported next to the mean and std '
+                       '(e.g. [10, 50, 90]), estimated from a bounded reservoir of samples',
+        'source': 'User Input', 'hidden': False, 'array_mode': 'as_is'},
+
     'indirect to direct field-related cost': {
         'group': 'Economic Parameters', 'units': 'fraction',
         'description': 'Ratio of indirect field (site) costs to total direct field costs — covers site supervision, '
@@ -0,0 +1,328 @@
+# Copyright 2025, Battelle Energy Alliance, LLC, ALL RIGHTS RESERVED
+"""
+Writers of the cost report: the cost estimate tables, the Parameters table and
+the array params, in one pass, to one of several formats.
+
+The format follows the extension of the output file (REPORT_WRITERS):
+
+    '.xlsx'     one sheet per table, streamed row by row (openpyxl write-only
+                workbook, so memory does not grow with the size of the report)
+    '.json'     {"table": {"columns": [...], "data": [[...], ...]}, ..., "Arrays": {"param": [...]}},
+                streamed row by row
+    '.parquet'  a folder of one '<table>.parquet' file per table (requires pyarrow)
+
+Numeric array params longer than ARRAY_ROW_LIMIT values (e.g. 'keff 2D') and
+tables stored as dicts of columns (e.g. 'PF Summary') are written to an
+'Arrays' table, one column per array, instead of as text in the Parameters
+table.
+"""
+
+import importlib.util
+import itertools
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from cost.params_registry import PARAMS_REGISTRY, GROUP_ORDER
+
+# Arrays with more values than this go to the Arrays table
+ARRAY_ROW_LIMIT = 10
+
+PARAMETER_COLUMNS = ['Group', 'Parameter', 'Value', 'Units', 'Description', 'Source']
+
+
+# **************************************************************************************************************************
+#                                                Parameters table
+# **************************************************************************************************************************
+
+def format_value(val):
+    """
+    Format a single scalar value for display.
+    Converts numpy scalar types to native Python types to prevent
+    Excel file corruption when openpyxl serializes the values.
+    """
+    # Handle complex types that openpyxl can't serialize
+    if isinstance(val, dict):
+        return str(val)
+    if isinstance(val, np.ndarray):
+        return str(val.tolist())
+    # Handle numpy scalars first (before float check, since np.float64 is a subclass of float)
+    if isinstance(val, np.floating):
+        if np.isnan(val):
+            return 'N/A'
+        return float(val)
+    if isinstance(val, np.integer):
+        return int(val)
+    if isinstance(val, np.bool_):
+        return str(bool(val)).upper()
+    # Handle native Python types
+    if isinstance(val, float) and np.isnan(val):
+        return 'N/A'
+    if isinstance(val, bool):
+        return str(val).upper()
+    return val
+
+
+def _array_rows(name, val, mode, units, description, source):
+    """
+    Expand an array parameter into multiple display rows based on mode:
+      'summary' → BOL, EOL, min, max
+      'steps'   → first step, last step, number of steps
+      'as_is'   → single row with the list as a string
+    Returns a list of (display_name, value, units, description, source) tuples.
+    """
+    if not isinstance(val, (list, tuple)) or len(val) == 0:
+        return [(name, format_value(val), units, description, source)]
+
+    if mode == 'summary':
+        values = np.asarray(val, dtype=float)
+        return [(f'{name} (BOL)', float(round(values[0], 6)), units, f'{description} — beginning of life', source),
+                (f'{name} (EOL)', float(round(values[-1], 6)), units, f'{description} — end of life', source),
+                (f'{name} (min)', float(round(values.min(), 6)), units, f'{description} — minimum value', source),
+                (f'{name} (max)', float(round(values.max(), 6)), units, f'{description} — maximum value', source)]
+    if mode == 'steps':
+        return [(f'{name} (first)', format_value(val[0]), units, f'{description} — first step', source),
+                (f'{name} (last)', format_value(val[-1]), units, f'{description} — last step', source),
+                (f'{name} (count)', len(val), '', f'{description} — number of steps', source)]
+    return [(name, str(val), units, description, source)]
+
+
+def _columnar_arrays(name, value):
+    # {column name: values} of an array param stored columnar, or None if it stays in the Parameters table
+    if isinstance(value, dict):
+        columns = {f'{name}: {key}': column for key, column in value.items() if isinstance(column, (list, tuple, np.ndarray))}
+        return columns if columns and len(columns) == len(value) else None
+    if isinstance(value, (list, tuple, np.ndarray)) and len(value) > ARRAY_ROW_LIMIT:
+        try:
+            values = np.asarray(value)
+        except ValueError:
+            return None   # ragged nested lists (e.g. a pin arrangement)
+        if values.ndim == 1 and np.issubdtype(values.dtype, np.number):
+            return {name: values}
+    return None
+
+
+def parameter_table(params, columnar_arrays=False):
+    """
+    Rows of the Parameters table (PARAMETER_COLUMNS), in one pass over the params.
+    Parameters are organized into labeled groups, sorted alphabetically within each group,
+    with units, descriptions, and source (User Input vs Calculated) for each parameter.
+    Array parameters are summarized (BOL, EOL, min, max) rather than shown as raw lists.
+    Parameters not found in the registry are placed in an 'Uncategorized' group.
+
+    With columnar_arrays, long numeric arrays and dicts of columns are left out of
+    the rows (a row points to the Arrays table instead) and returned as
+    {column name: values}. Returns (rows, arrays, number of entries, number of groups).
+    """
+    groups = {g: [] for g in GROUP_ORDER}
+    arrays = {}
+
+    for param_name, value in sorted(dict(params).items()):  # alphabetical within each group
+        entry = PARAMS_REGISTRY.get(param_name)
+        columns = _columnar_arrays(param_name, value) if columnar_arrays else None
+        if columns is not None:
+            arrays.update(columns)
+
+        if entry is None:
+            # Not in registry — place in Uncategorized with a warning marker
+            if columns is not None:
+                display_value = f'[{len(value)} items — see the Arrays table]'
+            elif isinstance(value, (list, tuple)) and len(value) > 10:
+                display_value = f'[list of {len(value)} items — see input file]'
+            else:
+                display_value = format_value(value)
+            groups['Uncategorized'].append((param_name, display_value, '',
+                                            '--- Not in params registry. Please add to cost/params_registry.py ---',
+                                            'Unknown'))
+            continue
+
+        # Skip hidden parameters (their arrays are still written to the Arrays table)
+        if entry.get('hidden', False):
+            continue
+
+        # Tax Rate is only relevant when PTC is used (needed for gross-up calculation)
+        if param_name == 'Tax Rate' and 'PTC credit value' not in params:
+            continue
+
+        units = entry.get('units', '')
+        description = entry.get('description', '')
+        source = entry.get('source', '')
+        array_mode = entry.get('array_mode', None)
+        group = entry.get('group', 'Uncategorized')
+        if group not in groups:
+            group = 'Uncategorized'
+
+        if array_mode is not None and isinstance(value, (list, tuple)):
+            if columns is not None and array_mode != 'summary':
+                groups[group].append((param_name, f'[{len(value)} values — see the Arrays table]', units,
+                                      description, source))
+            else:
+                groups[group].extend(_array_rows(param_name, value, array_mode, units, description, source))
+        else:
+            groups[group].append((param_name, format_value(value), units, description, source))
+
+    # Group header rows and blank separator rows between groups
+    rows = []
+    for group_name in GROUP_ORDER:
+        if not groups.get(group_name):
+            continue
+        rows.append([f'--- {group_name.upper()} ---', '', '', '', '', ''])
+        rows.extend([group_name, *row] for row in groups[group_name])
+        rows.append(['', '', '', '', '', ''])
+
+    n_entries = sum(len(group_rows) for group_rows in groups.values())
+    n_groups = sum(1 for g in GROUP_ORDER if groups.get(g))
+    return rows, arrays, n_entries, n_groups
+
+
+# **************************************************************************************************************************
+#                                                Writers
+# **************************************************************************************************************************
+
+def _cell_value(value):
+    # Native Python scalar of a table cell (None for NaN); other objects as text
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def dataframe_rows(df):
+    # Rows of a DataFrame as lists of native values, one at a time
+    for row in df.itertuples(index=False, name=None):
+        yield [_cell_value(value) for value in row]
+
+
+class ReportWriter:
+    """
+    Base class of the report writers: tables are written one at a time with
+    write_table(name, columns, rows), rows being any iterable of sequences, then
+    the array params with write_arrays({column name: values}).
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def write_table(self, name, columns, rows):
+        raise NotImplementedError
+
+    def write_arrays(self, arrays):
+        # Arrays of different lengths are padded with empty cells
+        if arrays:
+            self.write_table('Arrays', list(arrays),
+                             (list(map(_cell_value, row)) for row in itertools.zip_longest(*arrays.values())))
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+        return False
+
+
+class ExcelReportWriter(ReportWriter):
+    def __init__(self, filename):
+        super().__init__(filename)
+        from openpyxl import Workbook
+        from openpyxl.styles import Font
+        self.workbook = Workbook(write_only=True)
+        self.header_font = Font(bold=True)
+
+    def write_table(self, name, columns, rows):
+        from openpyxl.cell import WriteOnlyCell
+        sheet = self.workbook.create_sheet(name[:31])   # Excel limits sheet names to 31 characters
+        header = []
+        for column in columns:
+            cell = WriteOnlyCell(sheet, value=str(column))
+            cell.font = self.header_font
+            header.append(cell)
+        sheet.append(header)
+        for row in rows:
+            sheet.append(row)
+
+    def close(self):
+        self.workbook.save(self.filename)
+
+
+class JsonReportWriter(ReportWriter):
+    def __init__(self, filename):
+        super().__init__(filename)
+        self.file = open(filename, 'w')
+        self.file.write('{')
+        self.n_entries = 0
+
+    def _key(self, name):
+        self.file.write(('\n' if self.n_entries == 0 else ',\n') + json.dumps(name) + ': ')
+        self.n_entries += 1
+
+    def write_table(self, name, columns, rows):
+        self._key(name)
+        self.file.write('{"columns": ' + json.dumps([str(column) for column in columns]) + ', "data": [')
+        for k, row in enumerate(rows):
+            self.file.write((',\n  ' if k else '\n  ') + json.dumps(row, default=str))
+        self.file.write(']}')
+
+    def write_arrays(self, arrays):
+        if arrays:
+            self._key('Arrays')
+            self.file.write(json.dumps({name: [_cell_value(v) for v in values] for name, values in arrays.items()}))
+
+    def close(self):
+        self.file.write('\n}\n')
+        self.file.close()
+
+
+class ParquetReportWriter(ReportWriter):
+    # One '<table>.parquet' file per table in the folder filename
+    def __init__(self, filename):
+        if importlib.util.find_spec('pyarrow') is None:
+            raise ImportError("Parquet reports require pyarrow (pip install pyarrow).")
+        super().__init__(filename)
+        os.makedirs(filename, exist_ok=True)
+
+    def write_table(self, name, columns, rows):
+        table = pd.DataFrame(list(rows), columns=[str(column) for column in columns])
+        # Parquet columns hold one type: mixed text/number columns (e.g. 'Value') are written as text
+        for column in table.columns[table.dtypes == object]:
+            table[column] = table[column].map(lambda value: None if value is None else str(value))
+        table.to_parquet(os.path.join(self.filename, f'{name}.parquet'), index=False)
+
+    def write_arrays(self, arrays):
+        if arrays:
+            table = pd.DataFrame({name: pd.Series(np.asarray(values)) for name, values in arrays.items()})
+            table.to_parquet(os.path.join(self.filename, 'Arrays.parquet'), index=False)
+
+
+# Output file extension → writer
+REPORT_WRITERS = {'.xlsx': ExcelReportWriter, '.json': JsonReportWriter, '.parquet': ParquetReportWriter}
+
+
+def report_writer(filename):
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in REPORT_WRITERS:
+        raise ValueError(f"Unknown report format {extension!r}. Choose one of: {', '.join(REPORT_WRITERS)}.")
+    return REPORT_WRITERS[extension](filename)
+
+
+def write_cost_report(filename, params, cost_tables):
+    """
+    Writes the cost report to filename in one pass: the cost tables
+    ({sheet name: DataFrame}, in order), the Parameters table and the Arrays table.
+    """
+    rows, arrays, n_entries, n_groups = parameter_table(params, columnar_arrays=True)
+    with report_writer(filename) as writer:
+        for name, table in cost_tables.items():
+            writer.write_table(name, list(table.columns), dataframe_rows(table))
+        # Native cell values, as in the cost tables (short lists, e.g. uncategorized params, as text)
+        writer.write_table('Parameters', PARAMETER_COLUMNS, (list(map(_cell_value, row)) for row in rows))
+        writer.write_arrays(arrays)
+    print(f"\n\nParameters saved — {n_entries} entries across {n_groups} groups.\n\n")
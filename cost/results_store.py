@@ -0,0 +1,169 @@
+# Copyright 2025, Battelle Energy Alliance, LLC, ALL RIGHTS RESERVED
+"""
+Indexed store of cost estimate results (SQLite in WAL mode).
+
+Every record is one design point: its input params, keyed by a canonical
+hash of them (params_hash), and its results (e.g. the tracked costs of
+create_cost_dictionary). The reactor type, power, enrichment and core
+geometry of the inputs are indexed columns, so range queries over thousands
+of points do not parse any results:
+
+    store = ResultsStore('sweeps.sqlite')
+    store.put(params, results)
+    store.query(reactor_type='GCMR', power_mwt=(10, 20), enrichment=(None, 0.15))
+
+Records are never updated: storing a point that is already in the store keeps
+the first record. Each operation opens its own connection, so several
+processes (e.g. the workers of a parametric study) can write to one store.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+# Params that do not change the results of an estimate (the samples of a seed do not depend on the
+# number of workers), so they are left out of the params hash
+NON_RESULT_PARAMS = ('Number of Workers', 'Estimate Cache', 'Instrumentation Report', 'Track Allocations')
+
+# Indexed columns of the store and the params they hold (the first one found in the params)
+INDEXED_PARAMS = {
+    'reactor_type': ('reactor type',),
+    'power_mwt': ('Power MWt',),
+    'enrichment': ('Enrichment',),
+    'active_height': ('Active Height',),
+    'core_radius': ('Core Radius',),
+    'assembly_rings': ('Assembly Rings', 'Number of Rings per Assembly'),
+    'core_rings': ('Core Rings', 'Number of Rings per Core'),
+}
+
+# Seconds a writer waits for another writer's transaction to finish
+BUSY_TIMEOUT = 60.0
+
+
+def _canonical_value(value):
+    # numpy values and arrays like the equivalent Python values; other objects by their text
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def canonical_params(params):
+    # JSON text of the params, independent of the order of their keys
+    relevant = {key: value for key, value in params.items() if key not in NON_RESULT_PARAMS}
+    return json.dumps(relevant, sort_keys=True, default=_canonical_value)
+
+
+def params_hash(params):
+    return hashlib.sha256(canonical_params(params).encode()).hexdigest()
+
+
+class ResultsStore:
+    def __init__(self, path):
+        self.path = path
+        connection = self._connect()
+        try:
+            connection.execute('PRAGMA journal_mode=WAL')
+            columns = ', '.join(f'{column} {"TEXT" if column == "reactor_type" else "REAL"}' for column in INDEXED_PARAMS)
+            with connection:
+                connection.execute(f'CREATE TABLE IF NOT EXISTS results (params_hash TEXT PRIMARY KEY, {columns}, '
+                                   'created REAL, params TEXT, results TEXT)')
+                connection.execute('CREATE INDEX IF NOT EXISTS results_design ON results (reactor_type, power_mwt, enrichment)')
+                connection.execute('CREATE INDEX IF NOT EXISTS results_geometry ON results '
+                                   '(reactor_type, active_height, core_radius, assembly_rings, core_rings)')
+                connection.execute('CREATE INDEX IF NOT EXISTS results_power ON results (power_mwt)')
+                connection.execute('CREATE INDEX IF NOT EXISTS results_enrichment ON results (enrichment)')
+        finally:
+            connection.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+
+    @staticmethod
+    def _record(params, results):
+        indexed = []
+        for names in INDEXED_PARAMS.values():
+            value = next((params[name] for name in names if name in params), None)
+            indexed.append(_canonical_value(value) if isinstance(value, np.generic) else value)
+        return (params_hash(params), *indexed, time.time(), canonical_params(params),
+                json.dumps(results, default=_canonical_value))
+
+    def put_many(self, records):
+        """
+        Store (params, results) pairs in one transaction. Returns the number of
+        new records; points already in the store are skipped.
+        """
+        rows = [self._record(params, results) for params, results in records]
+        placeholders = ', '.join('?' * (len(INDEXED_PARAMS) + 4))
+        connection = self._connect()
+        try:
+            with connection:
+                before = connection.total_changes
+                connection.executemany(f'INSERT OR IGNORE INTO results VALUES ({placeholders})', rows)
+                return connection.total_changes - before
+        finally:
+            connection.close()
+
+    def put(self, params, results):
+        # True if the point was not in the store yet
+        return self.put_many([(params, results)]) == 1
+
+    def get(self, params):
+        # Results of the params, or None
+        connection = self._connect()
+        try:
+            row = connection.execute('SELECT results FROM results WHERE params_hash = ?', (params_hash(params),)).fetchone()
+        finally:
+            connection.close()
+        return None if row is None else json.loads(row[0])
+
+    def __contains__(self, params):
+        return self.get(params) is not None
+
+    def __len__(self):
+        connection = self._connect()
+        try:
+            return connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        finally:
+            connection.close()
+
+    def query(self, **filters):
+        """
+        Records whose indexed columns match the filters, as a table of the
+        indexed columns and the results of every record (one column per key).
+
+        A filter is a value (equality) or a (low, high) range, with None for an
+        open end: query(reactor_type='LTMR', power_mwt=(5, None)).
+        """
+        conditions, values = [], []
+        for column, value in filters.items():
+            if column not in INDEXED_PARAMS:
+                raise ValueError(f"Unknown results store column {column!r}. Choose one of: {', '.join(INDEXED_PARAMS)}.")
+            if isinstance(value, tuple):
+                low, high = value
+                if low is not None:
+                    conditions.append(f'{column} >= ?')
+                    values.append(low)
+                if high is not None:
+                    conditions.append(f'{column} <= ?')
+                    values.append(high)
+            else:
+                conditions.append(f'{column} = ?')
+                values.append(value)
+        where = f' WHERE {" AND ".join(conditions)}' if conditions else ''
+
+        connection = self._connect()
+        try:
+            rows = connection.execute(f'SELECT params_hash, {", ".join(INDEXED_PARAMS)}, results FROM results{where} '
+                                      'ORDER BY created', values).fetchall()
+        finally:
+            connection.close()
+        columns = ['params_hash', *INDEXED_PARAMS]
+        table = pd.DataFrame([row[:-1] for row in rows], columns=columns)
+        results = pd.DataFrame([json.loads(row[-1]) for row in rows], index=table.index)
+        return pd.concat([table, results.drop(columns=columns, errors='ignore')], axis=1)
@@ -0,0 +1,89 @@
+# Copyright 2025, Battelle Energy Alliance, LLC, ALL RIGHTS RESERVED
+"""
+Raw Monte Carlo samples of a batched estimate, exported as .npy arrays.
+
+With params['Sample Export'] set to a folder, a batched estimate writes, next
+to its mean/std summary, every sample of the run to that folder:
+
+    <name>_foak.npy     (samples, columns) FOAK costs
+    <name>_noak.npy     (samples, columns) NOAK costs
+    <name>_inputs.npy   (samples, uncertain inputs) sampled fixed costs, unit costs and exponents
+    <name>.json         sidecar: the account and title of every column, the input and
+                        account of every input column, and the settings of the run
+
+where name is 'reactor' or 'central_facility'. The columns are those of the
+BatchedCostTable: the rows of the cost database, in their order, then the
+summary rows (OCC, TCI, LCOE, ...); summary row slots the run does not use
+hold NaN. Files are written block by block through memory maps (by every
+worker, at the block's sample offset), so the samples never have to fit in
+memory, and can be read back the same way with load_sample_export.
+"""
+
+import json
+import os
+
+import numpy as np
+
+
+def _json_value(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class SampleExport:
+    def __init__(self, directory, name, n_samples, n_columns, input_keys):
+        self.directory = directory
+        self.name = name
+        self.n_samples = n_samples
+        self.input_keys = [(name, _json_value(account)) for name, account, *_ in input_keys]
+        self.paths = {part: os.path.join(directory, f'{name}_{part}.npy') for part in ('foak', 'noak', 'inputs')}
+
+        os.makedirs(directory, exist_ok=True)
+        shapes = {'foak': (n_samples, n_columns), 'noak': (n_samples, n_columns),
+                  'inputs': (n_samples, len(self.input_keys))}
+        for part, shape in shapes.items():
+            array = np.lib.format.open_memmap(self.paths[part], mode='w+', dtype=float, shape=shape)
+            array.flush()
+            del array
+
+    def write_block(self, first_sample, table, inputs):
+        # Samples first_sample, ... of a BatchedCostTable and their (samples, uncertain inputs) inputs
+        stop = first_sample + table.n_samples
+        for part, block in (('foak', table.values[:, 0]), ('noak', table.values[:, 1]), ('inputs', inputs)):
+            array = np.load(self.paths[part], mmap_mode='r+')
+            n_columns = min(array.shape[1], block.shape[1])
+            array[first_sample:stop, :n_columns] = block[:, :n_columns]
+            array.flush()
+            del array
+
+    def finish(self, accounts, titles, params, seed):
+        # Writes the sidecar once every block is in the arrays
+        metadata = {
+            'Samples': self.n_samples,
+            'Files': {'FOAK': os.path.basename(self.paths['foak']), 'NOAK': os.path.basename(self.paths['noak']),
+                      'Inputs': os.path.basename(self.paths['inputs'])},
+            'Columns': [{'Account': _json_value(account), 'Account Title': title, 'Column': column}
+                        for column, (account, title) in enumerate(zip(accounts, titles))],
+            'Inputs': [{'Input': name, 'Account': account, 'Column': column}
+                       for column, (name, account) in enumerate(self.input_keys)],
+            'Random Seed': _json_value(seed),
+            'Sampling Strategy': params.get('Sampling Strategy', 'Random'),
+            'Escalation Year': _json_value(params.get('Escalation Year')),
+            'NOAK Unit Number': _json_value(params.get('NOAK Unit Number')),
+        }
+        path = os.path.join(self.directory, f'{self.name}.json')
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(metadata, f, indent=1, default=str)
+        os.replace(f'{path}.tmp', path)
+
+
+def load_sample_export(directory, name='reactor'):
+    """
+    Memory-mapped (read-only) FOAK, NOAK and input samples of an export, with
+    its sidecar metadata: (foak, noak, inputs, metadata). metadata['Columns']
+    maps every account to its column of foak and noak.
+    """
+    with open(os.path.join(directory, f'{name}.json')) as f:
+        metadata = json.load(f)
+    foak, noak, inputs = (np.load(os.path.join(directory, metadata['Files'][part]), mmap_mode='r')
+                          for part in ('FOAK', 'NOAK', 'Inputs'))
+    return foak, noak, inputs, metadata
@@ -0,0 +1,147 @@
+# Copyright 2025, Battelle Energy Alliance, LLC, ALL RIGHTS RESERVED
+"""
+Streaming statistics of Monte Carlo cost samples.
+
+SampleStatistics keeps, for every column (account), the number of non-NaN
+samples, their mean and the sum of squared deviations (M2), and updates them
+block by block (Welford's algorithm, with the pairwise merge of Chan et al. for
+whole blocks). Memory does not grow with the number of samples.
+
+Percentiles (e.g. P10/P50/P90) come from a bounded-size uniform sample of the
+rows: every sample gets a random key and the reservoir keeps the samples with
+the smallest keys ("bottom-k" sampling). The kept set does not depend on the
+order in which blocks are merged, so parallel and serial runs agree.
+"""
+
+import warnings
+import numpy as np
+import pandas as pd
+
+# Default number of samples kept for percentile estimates
+RESERVOIR_SIZE = 2000
+
+
+class SampleStatistics:
+
+    def __init__(self, n_columns, reservoir_size=0):
+        self.count = np.zeros(n_columns)
+        self.mean = np.full(n_columns, np.nan)
+        self.m2 = np.zeros(n_columns)
+        self.n_samples = 0
+        self.reservoir_size = reservoir_size
+        self.reservoir_keys = np.empty(0)
+        self.reservoir = np.empty((0, n_columns))
+
+    def _merge_moments(self, count, mean, m2):
+        total = self.count + count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = mean - self.mean
+            new_mean = np.where(self.count == 0, mean, self.mean + delta * (count / total))
+            new_m2 = np.where(self.count == 0, m2, self.m2 + m2 + delta ** 2 * (self.count * count / total))
+        has_new = count > 0
+        self.mean = np.where(has_new, new_mean, self.mean)
+        self.m2 = np.where(has_new, new_m2, self.m2)
+        self.count = total
+
+    def _merge_reservoir(self, keys, samples):
+        keys = np.concatenate([self.reservoir_keys, keys])
+        samples = np.concatenate([self.reservoir, samples])
+        keep = np.argsort(keys, kind='stable')[:self.reservoir_size]
+        self.reservoir_keys, self.reservoir = keys[keep], samples[keep]
+
+    def update(self, samples, rng=None):
+        """
+        Add a (n, n_columns) block of samples. NaN entries are skipped, as in
+        np.nanmean/np.nanstd. rng draws the reservoir keys (only needed when
+        reservoir_size > 0).
+        """
+        samples = np.asarray(samples, dtype=float)
+        valid = ~np.isnan(samples)
+        count = valid.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, np.where(valid, samples, 0).sum(axis=0) / count, np.nan)
+            m2 = np.where(valid, (samples - mean) ** 2, 0).sum(axis=0)
+        self._merge_moments(count, mean, m2)
+        self.n_samples += len(samples)
+
+        if self.reservoir_size:
+            keys = (np.random.default_rng() if rng is None else rng).random(len(samples))
+            self._merge_reservoir(keys, samples)
+        return self
+
+    def merge(self, other):
+        # Combine with the statistics of another, disjoint set of samples
+        self._merge_moments(other.count, other.mean, other.m2)
+        self.n_samples += other.n_samples
+        if self.reservoir_size:
+            self._merge_reservoir(other.reservoir_keys, other.reservoir)
+        return self
+
+    def std(self, ddof=1):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = np.where(self.count - ddof > 0, self.m2 / (self.count - ddof), np.nan)
+        return np.sqrt(variance)
+
+    def standard_error(self):
+        # Standard error of the mean of every column
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.std(ddof=1) / np.sqrt(self.count)
+
+    def percentiles(self, q):
+        # (len(q), n_columns) percentiles estimated from the reservoir
+        if not len(self.reservoir):
+            return np.full((len(q), len(self.count)), np.nan)
+        with warnings.catch_warnings():
+            # Accounts that are empty in every kept sample give NaN
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            return np.nanpercentile(self.reservoir, q, axis=0).reshape(len(q), -1)
+
+
+def cost_percentiles(params):
+    # Percentiles reported next to the mean and std, e.g. params['Cost Percentiles'] = [10, 50, 90]
+    return [float(q) for q in (params.get('Cost Percentiles') or [])]
+
+
+def new_cost_statistics(n_rows, params):
+    # Statistics of the FOAK and NOAK columns of n_rows accounts, stored side by side
+    return SampleStatistics(2 * n_rows, reservoir_size=RESERVOIR_SIZE if cost_percentiles(params) else 0)
+
+
+def cost_summary_table(accounts, titles, statistics, params, precision=False):
+    """
+    The mean/std table returned by the bottom-up estimators: Account, Account
+    Title, FOAK/NOAK mean and FOAK/NOAK std columns, followed by FOAK/NOAK
+    percentile columns when params['Cost Percentiles'] is set.
+
+    With precision=True (adaptive sample counts) the table also reports the
+    standard error of every mean (FOAK/NOAK SE columns), and the number of
+    samples actually run is in table.attrs['Number of Samples'].
+    """
+    escalation_year = params['Escalation Year']
+    FOAK_column = f'FOAK Estimated Cost (${escalation_year })'
+    NOAK_column = FOAK_column.replace("FOAK", "NOAK")
+    n_rows = len(accounts)
+    ddof = 1 if params['Number of Samples'] > 1 else 0
+    std = statistics.std(ddof)
+
+    columns = {
+        'Account': pd.Series(list(accounts), dtype=object),
+        'Account Title': list(titles),
+        FOAK_column: statistics.mean[:n_rows],
+        NOAK_column: statistics.mean[n_rows:],
+        FOAK_column.replace('Cost', 'Cost std'): std[:n_rows],
+        NOAK_column.replace('Cost', 'Cost std'): std[n_rows:],
+    }
+    percentiles = cost_percentiles(params)
+    for q, values in zip(percentiles, statistics.percentiles(percentiles)):
+        columns[FOAK_column.replace('Cost', f'Cost P{q:g}')] = values[:n_rows]
+        columns[NOAK_column.replace('Cost', f'Cost P{q:g}')] = values[n_rows:]
+    if not precision:
+        return pd.DataFrame(columns)
+
+    standard_error = statistics.standard_error()
+    columns[FOAK_column.replace('Cost', 'Cost SE')] = standard_error[:n_rows]
+    columns[NOAK_column.replace('Cost', 'Cost SE')] = standard_error[n_rows:]
+    table = pd.DataFrame(columns)
+    table.attrs['Number of Samples'] = statistics.n_samples
+    return table
@@ -1,38 +1,270 @@
 # Copyright 2025, Battelle Energy Alliance, LLC, ALL RIGHTS RESERVED
 
 import numpy as np
+from scipy.special import ndtr, ndtri
+from scipy.stats import qmc
 
-def create_lognormal_sampler(low_cost, high_cost, class3_cost):
-    # Calculate the natural logarithms of the given costs
-    ln_low_cost = np.log(low_cost)
-    ln_high_cost = np.log(high_cost)
-    ln_class3_cost = np.log(class3_cost)
+# Generator used when the caller does not pass one (unseeded, so not reproducible).
+# Reproducible runs pass their own np.random.Generator as rng.
+_default_rng = np.random.default_rng()
 
-    # Calculate the mean (mu) and standard deviation (sigma) of the logarithms
-    mu = np.mean([ln_low_cost, ln_high_cost, ln_class3_cost])
-    sigma = np.std([ln_low_cost, ln_high_cost, ln_class3_cost], ddof=0) # Population std deviation
 
-    # Define the sampler function
-    def sampler():
-        return np.random.lognormal(mean=mu, sigma=sigma)
+def get_rng(rng=None):
+    return _default_rng if rng is None else rng
 
-    return sampler()
 
-def truncated_normal_sample(mean, std, lower_bound, upper_bound):
-    while True:
-        sample = np.random.normal(mean, std)
-        if lower_bound <= sample <= upper_bound:
-            return sample
+# How the uncertain inputs of a Monte Carlo run are drawn (params['Sampling Strategy']):
+# 'Random' draws independent pseudo-random samples; 'Sobol' and 'Latin Hypercube'
+# draw one scrambled low-discrepancy design across all uncertain inputs and map it
+# through each input's inverse CDF.
+SAMPLING_STRATEGIES = ('Random', 'Sobol', 'Latin Hypercube')
 
-def uniform_sample(low, high):
-    return np.random.uniform(low, high)
 
-def sampler(distribution, **kwargs):
+def sampling_strategy(params):
+    strategy = params.get('Sampling Strategy', 'Random')
+    if strategy not in SAMPLING_STRATEGIES:
+        raise ValueError(f"Unknown 'Sampling Strategy' {strategy!r}. Choose one of: {', '.join(SAMPLING_STRATEGIES)}.")
+    return strategy
+
+
+def uniform_design(strategy, n_samples, dimension, rng=None):
+    """
+    (n_samples, dimension) points in the unit hypercube.
+
+    'Sobol' points are the first n_samples points of a scrambled Sobol sequence
+    (balanced when n_samples is a power of 2); 'Latin Hypercube' stratifies every
+    dimension into n_samples equal bins with one point each.
+    """
+    rng = get_rng(rng)
+    if dimension == 0:
+        return np.empty((n_samples, 0))
+    if strategy == 'Sobol':
+        m = int(np.ceil(np.log2(max(n_samples, 1))))
+        return qmc.Sobol(d=dimension, scramble=True, seed=rng).random_base2(m)[:n_samples]
+    if strategy == 'Latin Hypercube':
+        return qmc.LatinHypercube(d=dimension, seed=rng).random(n_samples)
+    return rng.random((n_samples, dimension))
+
+
+class UniformDesign:
+    # Hands out the columns of a uniform design, one group of inputs at a time
+    def __init__(self, points):
+        self.points = points
+        self.used = 0
+
+    def take(self, n_columns):
+        columns = self.points[:, self.used:self.used + n_columns]
+        self.used += n_columns
+        return columns
+
+
+# **************************************************************************************************************************
+#                                                Distribution parameters and inverse CDFs
+# **************************************************************************************************************************
+
+def lognormal_parameters(low_cost, high_cost, class3_cost):
+    # Mean (mu) and population standard deviation (sigma) of the logarithms of the
+    # low, high and class 3 costs (one mu/sigma per entry for array-valued costs)
+    logs = [np.log(low_cost), np.log(high_cost), np.log(class3_cost)]
+    return np.mean(logs, axis=0), np.std(logs, axis=0, ddof=0)
+
+
+def lognormal_ppf(u, mu, sigma):
+    return np.exp(mu + sigma * ndtri(u))
+
+
+def uniform_ppf(u, low, high):
+    return low + (np.asarray(high, dtype=float) - low) * u
+
+
+class TruncatedNormal:
+    """
+    Normal distributions truncated to [lower_bound, upper_bound], sampled in
+    closed form through the inverse CDF (no rejection loop). The normal CDF at
+    both bounds is computed once, so ppf is a single ndtri call.
+    """
+
+    def __init__(self, mean, std, lower_bound, upper_bound):
+        self.mean = np.asarray(mean, dtype=float)
+        self.std = np.asarray(std, dtype=float)
+        a = (np.asarray(lower_bound, dtype=float) - self.mean) / self.std
+        b = (np.asarray(upper_bound, dtype=float) - self.mean) / self.std
+        # Bounds in the upper tail are mirrored to the lower tail, where ndtr keeps its
+        # precision (with u mirrored as well, so samples still increase with u)
+        self.flip = a > 0
+        self.a, self.b = np.where(self.flip, -b, a), np.where(self.flip, -a, b)
+        self.cdf_a, self.cdf_b = ndtr(self.a), ndtr(self.b)
+
+    def ppf(self, u):
+        u = np.where(self.flip, 1 - u, u)
+        z = np.clip(ndtri(self.cdf_a + u * (self.cdf_b - self.cdf_a)), self.a, self.b)
+        return self.mean + self.std * np.where(self.flip, -z, z)
+
+
+def truncated_normal_ppf(u, mean, std, lower_bound, upper_bound):
+    return TruncatedNormal(mean, std, lower_bound, upper_bound).ppf(u)
+
+
+# **************************************************************************************************************************
+#                                                Samplers
+# **************************************************************************************************************************
+
+def _sample_shape(size, *params):
+    # Shape of a draw: size when given (broadcast with the parameters), else the parameters' shape
+    shape = np.broadcast_shapes(*(np.shape(x) for x in params))
+    if size is None:
+        return shape
+    return np.broadcast_shapes((size,) if np.isscalar(size) else tuple(size), shape)
+
+
+def _as_sample(values, size):
+    # Scalar parameters without a size give a plain float, as rng.normal etc. do
+    return float(values) if size is None and np.ndim(values) == 0 else values
+
+
+def create_lognormal_sampler(low_cost, high_cost, class3_cost, size=None, rng=None):
+    mu, sigma = lognormal_parameters(low_cost, high_cost, class3_cost)
+    u = get_rng(rng).random(_sample_shape(size, mu, sigma))
+    return _as_sample(lognormal_ppf(u, mu, sigma), size)
+
+
+def truncated_normal_sample(mean, std, lower_bound, upper_bound, size=None, rng=None):
+    # Entries with undefined (NaN) parameters give NaN
+    u = get_rng(rng).random(_sample_shape(size, mean, std, lower_bound, upper_bound))
+    return _as_sample(truncated_normal_ppf(u, mean, std, lower_bound, upper_bound), size)
+
+
+def uniform_sample(low, high, size=None, rng=None):
+    return get_rng(rng).uniform(low, high, size)
+
+
+def sampler(distribution, size=None, rng=None, **kwargs):
     if distribution == "Lognormal":
-        return create_lognormal_sampler(kwargs['low_cost'], kwargs['high_cost'], kwargs['class3_cost'])
+        return create_lognormal_sampler(kwargs['low_cost'], kwargs['high_cost'], kwargs['class3_cost'], size=size, rng=rng)
     elif distribution == "Truncated Normal":
-        return truncated_normal_sample(kwargs['mean'], kwargs['std'], kwargs['lower_bound'], kwargs['upper_bound'])
+        return truncated_normal_sample(kwargs['mean'], kwargs['std'], kwargs['lower_bound'], kwargs['upper_bound'], size=size, rng=rng)
     elif distribution == "Uniform":
-        return uniform_sample(kwargs['low'], kwargs['high'])    
+        return uniform_sample(kwargs['low'], kwargs['high'], size=size, rng=rng)
     else:
         raise ValueError("Unavailable Distribution")
+
+
+# **************************************************************************************************************************
+#                                                Cost database distributions
+# **************************************************************************************************************************
+
+class CostDistributions:
+    """
+    Distributions of the fixed cost, unit cost and exponent of every row of an
+    escalated cost database, with their parameters computed once per row.
+
+    draw() returns (n_samples, n_rows) arrays of fixed costs, unit costs and
+    exponents. Rows without a fixed (unit) cost get 0 and rows without an
+    exponent get NaN; the other rows get their class 3 value, or a sample of
+    their distribution when sampled=True. Only rows with a fixed or unit cost
+    above 0 (the rows scale_cost evaluates) are filled in.
+    """
+
+    def __init__(self, database):
+        self.n_rows = len(database)
+        self.active = ((database['Fixed Cost ($)'] > 0) | (database['Unit Cost'] > 0)).to_numpy()
+
+        self.costs = {}
+        for prefix, cost_col in [('Fixed Cost', 'Fixed Cost ($)'), ('Unit Cost', 'Unit Cost')]:
+            present = self.active & database[cost_col].notna().to_numpy()
+            base = database[f'Adjusted {prefix} ($)'].to_numpy(dtype=float)
+            low = database[f'Adjusted {prefix} Low End ($)'].to_numpy(dtype=float)
+            high = database[f'Adjusted {prefix} High End ($)'].to_numpy(dtype=float)
+            dist = database[f'{prefix} Distribution'].to_numpy()
+            lognormal = np.flatnonzero(present & (dist == 'Lognormal'))
+            uniform = np.flatnonzero(present & (dist == 'Uniform'))
+            mu, sigma = lognormal_parameters(low[lognormal], high[lognormal], base[lognormal])
+            self.costs[prefix] = {'present': present, 'base': base,
+                                  'lognormal': lognormal, 'mu': mu, 'sigma': sigma,
+                                  'uniform': uniform, 'low': low[uniform], 'high': high[uniform]}
+
+        self.exponent_base = database['Exponent'].to_numpy(dtype=float)
+        self.exponent_present = self.active & ~np.isnan(self.exponent_base)
+        self.truncated = np.flatnonzero(self.exponent_present
+                                        & (database['Exponent Distribution'].to_numpy() == 'Truncated Normal'))
+        self.exponent_distribution = TruncatedNormal(self.exponent_base[self.truncated],
+                                                     database['Exponent std'].to_numpy(dtype=float)[self.truncated],
+                                                     database['Exponent Min'].to_numpy(dtype=float)[self.truncated],
+                                                     database['Exponent Max'].to_numpy(dtype=float)[self.truncated])
+
+    @property
+    def dimension(self):
+        # Number of uncertain inputs, i.e. the dimension of the uniform design of one sample
+        return (sum(cost['lognormal'].size + cost['uniform'].size for cost in self.costs.values())
+                + self.truncated.size)
+
+    def uncertain_inputs(self):
+        """
+        (input, row) of every uncertain input, in the order of the columns of a
+        uniform design (input is 'Fixed Cost', 'Unit Cost' or 'Exponent').
+        """
+        inputs = []
+        for prefix, cost in self.costs.items():
+            inputs += [(prefix, row) for row in cost['lognormal']] + [(prefix, row) for row in cost['uniform']]
+        return inputs + [('Exponent', row) for row in self.truncated]
+
+    def input_values(self, fixed_costs, unit_costs, exponents):
+        # (n_samples, dimension) values of the uncertain inputs, in uncertain_inputs() order
+        columns = [values[:, np.concatenate([cost['lognormal'], cost['uniform']])]
+                   for values, cost in zip((fixed_costs, unit_costs), self.costs.values())]
+        return np.concatenate(columns + [exponents[:, self.truncated]], axis=1)
+
+    def input_keys(self, database):
+        """
+        Definition (input, account, class 3 value and distribution parameters) of
+        every uncertain input, in uncertain_inputs() order. Inputs of two cost
+        database sheets with the same key are the same uncertain quantity.
+        """
+        accounts = database['Account'].to_numpy()
+        columns = {'Exponent': ['Exponent', 'Exponent std', 'Exponent Min', 'Exponent Max', 'Exponent Distribution']}
+        for prefix in self.costs:
+            columns[prefix] = [f'Adjusted {prefix} ($)', f'Adjusted {prefix} Low End ($)',
+                               f'Adjusted {prefix} High End ($)', f'{prefix} Distribution']
+        values = {name: [database[col].to_numpy() for col in cols] for name, cols in columns.items()}
+        return [(name, accounts[row]) + tuple(column[row] for column in values[name])
+                for name, row in self.uncertain_inputs()]
+
+    def draw(self, n_samples, sampled=True, strategy='Random', rng=None):
+        points = uniform_design(strategy, n_samples, self.dimension, rng=rng) if sampled else None
+        return self.values(points, n_samples)
+
+    def values(self, points, n_samples=None):
+        """
+        Fixed costs, unit costs and exponents of the (n_samples, dimension) points
+        of a uniform design (class 3 values of n_samples samples when points is None).
+        """
+        design = None if points is None else UniformDesign(points)
+        if points is not None:
+            n_samples = len(points)
+
+        costs = []
+        for cost in self.costs.values():
+            values = np.zeros((n_samples, self.n_rows))
+            values[:, cost['present']] = cost['base'][cost['present']]
+            if design is not None:
+                values[:, cost['lognormal']] = lognormal_ppf(design.take(cost['lognormal'].size), cost['mu'], cost['sigma'])
+                values[:, cost['uniform']] = uniform_ppf(design.take(cost['uniform'].size), cost['low'], cost['high'])
+            costs.append(values)
+
+        exponents = np.full((n_samples, self.n_rows), np.nan)
+        exponents[:, self.exponent_present] = self.exponent_base[self.exponent_present]
+        if design is not None:
+            exponents[:, self.truncated] = self.exponent_distribution.ppf(design.take(self.truncated.size))
+        fixed_costs, unit_costs = costs
+        return fixed_costs, unit_costs, exponents
+
+
+def shared_design_columns(keys, other_keys):
+    """
+    Columns of two uniform designs (of inputs with the given input_keys) that
+    hold the same uncertain quantity, as (columns, other columns) index arrays.
+    """
+    position = {key: column for column, key in enumerate(keys)}
+    pairs = [(position[key], column) for column, key in enumerate(other_keys) if key in position]
+    columns, other_columns = zip(*pairs) if pairs else ((), ())
+    return np.array(columns, dtype=int), np.array(other_columns, dtype=int)
@@ -0,0 +1,307 @@
+# Copyright 2025, Battelle Energy Alliance, LLC, ALL RIGHTS RESERVED
+"""
+Sensitivity of the LCOE and TCI to the cost estimate inputs.
+
+tornado_sensitivity: one-at-a-time (tornado) sensitivity. Every factor is set to its low and then its high value while all other inputs
+keep their base values. A factor is either a parameter:
+
+    {'Parameter': 'Interest Rate', 'Low': 0.04, 'High': 0.10}
+
+or an account of the cost database:
+
+    {'Account': 222.11, 'Field': 'Unit Cost', 'Low': 2.0e6, 'High': 4.0e6}
+    {'Account': 22}
+
+An account factor with 'Low'/'High' sets the fixed or unit cost ('Field') of
+the account's row to these values, in the dollar year of the row. Without them,
+the fixed and unit costs ('Field', default both) of every costed row at or below
+the account in the code of accounts go to their low / high end in the cost
+database (rows without a range keep their cost).
+
+Estimates are deterministic (class 3 costs, one sample). All account factors
+are evaluated in one batched pass: the FOAK costs of their low and high cases
+are stacked along the sample axis of one BatchedCostTable. Parameter factors go
+through an IncrementalCostEstimate, so each only reruns the cost stages that
+read the parameter.
+
+sobol_indices: global, variance-based sensitivity. First-order and total Sobol
+indices of every uncertain fixed cost, unit cost and exponent of the cost
+database, from Saltelli's A/B/AB sample matrices evaluated in batches.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+from cost.batched_engine import BatchedCostTable, cost_equation_samples, run_cost_stages
+from cost.code_of_account_processing import compile_account_hierarchy, get_estimated_cost_column
+from cost.cost_estimation import _prepare_unit_curve
+from cost.cost_scaling import redundant_BOP_and_primary_loop_multiplier
+from cost.incremental_estimate import IncrementalCostEstimate
+from cost.sampling import CostDistributions, sampling_strategy, uniform_design
+
+# Summary rows reported by default; the table is ranked by the swing of the first one
+TORNADO_ACCOUNTS = ('LCOE', 'TCI')
+
+# Cost fields of an account factor
+ACCOUNT_FIELDS = ('Fixed Cost', 'Unit Cost')
+
+# Approximate number of model evaluations (rows of the A, B and AB matrices)
+# run through the cost stages at once by sobol_indices
+SOBOL_BLOCK_EVALUATIONS = 1024
+
+
+def cost_driver_factors(detailed_sorted_df, n_factors=10):
+    """
+    Account factors (with the cost database ranges) of the n_factors largest
+    cost drivers, i.e. the first rows of the detailed cost drivers returned by
+    cost_drivers_estimate.
+    """
+    return [{'Account': account} for account in detailed_sorted_df['Account'].head(n_factors)]
+
+
+# Sampling settings of a run, left to the engine defaults by the deterministic estimates
+# (an adaptive run or a sample export would not go through the IncrementalCostEstimate)
+_SAMPLING_SETTINGS = ('Sample Relative Tolerance', 'Sample Time Budget', 'Sample Export', 'Sampling Strategy')
+
+
+def _deterministic_params(params):
+    # One class 3 sample with the batched engine
+    params = copy.deepcopy(params)
+    params['Number of Samples'] = 1
+    params['Cost Engine'] = 'Batched'
+    for setting in _SAMPLING_SETTINGS:
+        params.pop(setting, None)
+    return params
+
+
+def _check_bounds(factor):
+    # A factor with a low or a high value needs both
+    missing = [bound for bound in ('Low', 'High') if bound not in factor]
+    if missing:
+        raise ValueError(f"A sensitivity factor needs both 'Low' and 'High' values (missing {', '.join(missing)}): {factor}")
+
+
+def _summary_values(cost_table, accounts, FOAK_or_NOAK):
+    # {account: value} of summary rows of an estimate
+    cost_column = get_estimated_cost_column(cost_table, FOAK_or_NOAK)
+    values = cost_table.set_index('Account')[cost_column]
+    return {account: float(values.get(account, np.nan)) for account in accounts}
+
+
+def _account_changes(database, distributions, factor):
+    """
+    (field, rows, low values, high values) of the costs an account factor
+    changes, in escalated dollars.
+    """
+    rows = np.flatnonzero(database['Account'].to_numpy() == factor['Account'])
+    if not rows.size:
+        raise ValueError(f"Account {factor['Account']} is not in the cost database (or is not relevant to this reactor).")
+    fields = [factor['Field']] if 'Field' in factor else list(ACCOUNT_FIELDS)
+    for field in fields:
+        if field not in ACCOUNT_FIELDS:
+            raise ValueError(f"Unknown account field {field!r}. Choose one of: {', '.join(ACCOUNT_FIELDS)}.")
+
+    if 'Low' in factor or 'High' in factor:
+        _check_bounds(factor)
+        if len(rows) != 1 or 'Field' not in factor:
+            raise ValueError(f"Low/High values of account {factor['Account']} need a 'Field' and a single cost row.")
+        if not distributions.costs[factor['Field']]['present'][rows[0]]:
+            raise ValueError(f"Account {factor['Account']} has no {factor['Field']}.")
+        inflation_multiplier = database['inflation_multiplier'].to_numpy(dtype=float)[rows]
+        return [(factor['Field'], rows, factor['Low'] * inflation_multiplier, factor['High'] * inflation_multiplier)]
+
+    # The cost database ranges of the account and all accounts below it
+    hierarchy = compile_account_hierarchy(database)
+    rows = np.unique(np.concatenate([rows] + [hierarchy.descendants(row) for row in rows]))
+    changes = []
+    for field in fields:
+        low = database[f'Adjusted {field} Low End ($)'].to_numpy(dtype=float)[rows]
+        high = database[f'Adjusted {field} High End ($)'].to_numpy(dtype=float)[rows]
+        ranged = distributions.costs[field]['present'][rows] & ~np.isnan(low) & ~np.isnan(high)
+        changes.append((field, rows[ranged], low[ranged], high[ranged]))
+    return changes
+
+
+def account_factor_values(database, distributions, params, factors, accounts=TORNADO_ACCOUNTS, FOAK_or_NOAK='F'):
+    """
+    Summary rows of the base case and of the low and high case of every account
+    factor, from one batched pass over all cases. database and params are those
+    of a prepared (escalated, cleaned, reactor operation evaluated) estimate.
+
+    Returns {account: array of 1 + 2 × len(factors) values}: the base case, then
+    the low and high case of each factor.
+    """
+    fixed_cost, unit_cost, exponent = distributions.draw(1, sampled=False)
+    n_cases = 1 + 2 * len(factors)
+    costs = {'Fixed Cost': np.repeat(fixed_cost, n_cases, axis=0),
+             'Unit Cost': np.repeat(unit_cost, n_cases, axis=0)}
+    for k, factor in enumerate(factors):
+        for field, rows, low, high in _account_changes(database, distributions, factor):
+            costs[field][1 + 2 * k, rows] = low
+            costs[field][2 + 2 * k, rows] = high
+
+    foak = cost_equation_samples(database, params, costs['Fixed Cost'], costs['Unit Cost'],
+                                 np.repeat(exponent, n_cases, axis=0), distributions)
+    foak *= redundant_BOP_and_primary_loop_multiplier(database['Account'], params)
+    table = BatchedCostTable(database, foak)
+    table.report_warnings = False
+    run_cost_stages(table, params)
+    return {account: (table.derived_value(account, FOAK_or_NOAK) if account in table.derived else np.full(n_cases, np.nan))
+            for account in accounts}
+
+
+def tornado_sensitivity(cost_database_filename, params, factors, accounts=TORNADO_ACCOUNTS, FOAK_or_NOAK='F'):
+    """
+    One-at-a-time sensitivity of the summary rows in accounts (FOAK or NOAK
+    column) to every factor (see the module docstring).
+
+    Returns a DataFrame with one row per factor, ranked by the swing of
+    accounts[0]: 'Factor', 'Low', 'High' (the factor values; NaN for cost
+    database ranges), and for every account A: 'A Low', 'A High' (the estimates
+    with the factor at its low / high value), 'Delta A Low', 'Delta A High'
+    (their change from the base estimate) and 'A Swing' (|high - low|).
+    The base estimate is in the attrs['Base'] dict of the table.
+    """
+    params = _deterministic_params(params)
+    incremental = IncrementalCostEstimate(cost_database_filename)
+    base_params = copy.deepcopy(params)
+    base = _summary_values(incremental.estimate(base_params), accounts, FOAK_or_NOAK)
+
+    cases = {}   # factor index → (low values, high values)
+    account_factors = [k for k, factor in enumerate(factors) if 'Account' in factor]
+    if account_factors:
+        # The base estimate's cost database, with the params updated by its run
+        database, distributions = incremental.records['Cost database'].output
+        values = account_factor_values(database, distributions, base_params, [factors[k] for k in account_factors],
+                                       accounts, FOAK_or_NOAK)
+        for position, k in enumerate(account_factors):
+            cases[k] = tuple({account: values[account][1 + 2 * position + bound] for account in accounts}
+                             for bound in (0, 1))
+
+    for k, factor in enumerate(factors):
+        if 'Account' in factor:
+            continue
+        if 'Parameter' not in factor:
+            raise ValueError(f"A sensitivity factor needs a 'Parameter' or an 'Account': {factor}")
+        _check_bounds(factor)
+        bounds = []
+        for bound in ('Low', 'High'):
+            case_params = copy.deepcopy(params)
+            case_params[factor['Parameter']] = factor[bound]
+            bounds.append(_summary_values(incremental.estimate(case_params), accounts, FOAK_or_NOAK))
+        cases[k] = tuple(bounds)
+
+    rows = []
+    for k, factor in enumerate(factors):
+        low, high = cases[k]
+        if 'Parameter' in factor:
+            name = factor['Parameter']
+        else:
+            database = incremental.records['Cost database'].output[0]
+            title = database.loc[database['Account'] == factor['Account'], 'Account Title'].iloc[0].strip()
+            name = f"{factor['Account']}: {title}" + (f" ({factor['Field']})" if 'Field' in factor else '')
+        row = {'Factor': name, 'Low': factor.get('Low', np.nan), 'High': factor.get('High', np.nan)}
+        for account in accounts:
+            row[f'{account} Low'] = low[account]
+            row[f'{account} High'] = high[account]
+            row[f'Delta {account} Low'] = low[account] - base[account]
+            row[f'Delta {account} High'] = high[account] - base[account]
+            row[f'{account} Swing'] = abs(high[account] - low[account])
+        rows.append(row)
+
+    tornado = pd.DataFrame(rows)
+    if not tornado.empty:
+        tornado = tornado.sort_values(f'{accounts[0]} Swing', ascending=False, kind='stable').reset_index(drop=True)
+    tornado.attrs['Base'] = base
+    return tornado
+
+
+def _evaluate_cases(database, distributions, params, costs, accounts, FOAK_or_NOAK):
+    # Summary rows of the (fixed costs, unit costs, exponents) of a batch of cases
+    foak = cost_equation_samples(database, params, *costs, distributions)
+    foak *= redundant_BOP_and_primary_loop_multiplier(database['Account'], params)
+    table = BatchedCostTable(database, foak)
+    table.report_warnings = False
+    run_cost_stages(table, params)
+    return np.column_stack([table.derived_value(account, FOAK_or_NOAK) for account in accounts])
+
+
+def sobol_indices(cost_database_filename, params, n_base_samples=1024, seed=None, accounts=TORNADO_ACCOUNTS,
+                  FOAK_or_NOAK='F'):
+    """
+    First-order and total Sobol indices of the summary rows in accounts with
+    respect to every uncertain input (fixed cost, unit cost or exponent of a
+    cost database row with a distribution).
+
+    The A and B matrices are the two halves of one (n_base_samples, 2 × d)
+    uniform design of the d uncertain inputs (params['Sampling Strategy'],
+    seeded by seed or params['Random Seed']); AB_i is A with its column i from B.
+    The n_base_samples × (d + 2) model evaluations run through the batched cost
+    stages SOBOL_BLOCK_EVALUATIONS at a time. The indices use Saltelli's (2010)
+    first-order and Jansen's total-effect estimators:
+
+        S_i  = mean(f(B) (f(AB_i) - f(A))) / V
+        ST_i = mean((f(A) - f(AB_i))²) / (2 V)
+
+    where V is the variance of f over A and B.
+
+    Returns a DataFrame with one row per uncertain input, ranked by the total
+    index of accounts[0]: 'Account', 'Account Title', 'Input', and for every
+    account A: 'A S1' and 'A ST' with the 95% confidence half-widths of their
+    estimates, 'A S1 conf' and 'A ST conf' (first-order indices of heavy-tailed
+    lognormal costs converge slowly; check them before reading small or
+    negative values). The variances are in attrs['Variance'] and the
+    number of model evaluations in attrs['Evaluations'].
+    """
+    params = copy.deepcopy(params)
+    database, seed = _prepare_unit_curve(cost_database_filename, params, seed)
+    distributions = CostDistributions(database)
+    inputs = distributions.uncertain_inputs()
+    n_inputs = len(inputs)
+    if n_base_samples < 2:
+        raise ValueError("sobol_indices needs at least 2 base samples.")
+
+    points = uniform_design(sampling_strategy(params), n_base_samples, 2 * n_inputs, rng=np.random.default_rng(seed))
+    A, B = points[:, :n_inputs], points[:, n_inputs:]
+
+    # Rows of A, B, AB_1 ... AB_d for a few base samples at a time
+    f_A = np.empty((n_base_samples, len(accounts)))
+    f_B = np.empty_like(f_A)
+    f_AB = np.empty((n_inputs, n_base_samples, len(accounts)))
+    block = max(1, SOBOL_BLOCK_EVALUATIONS // (n_inputs + 2))
+    for start in range(0, n_base_samples, block):
+        a, b = A[start:start + block], B[start:start + block]
+        ab = np.repeat(a[np.newaxis], n_inputs, axis=0)
+        ab[np.arange(n_inputs), :, np.arange(n_inputs)] = b.T
+        design = np.concatenate([a, b, ab.reshape(-1, n_inputs)])
+        values = _evaluate_cases(database, distributions, params, distributions.values(design), accounts, FOAK_or_NOAK)
+        n = len(a)
+        f_A[start:start + n], f_B[start:start + n] = values[:n], values[n:2 * n]
+        f_AB[:, start:start + n] = values[2 * n:].reshape(n_inputs, n, len(accounts))
+
+    variance = np.var(np.concatenate([f_A, f_B]), axis=0)
+    first_order_terms = f_B * (f_AB - f_A)
+    total_terms = 0.5 * (f_A - f_AB) ** 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        first_order = first_order_terms.mean(axis=1) / variance
+        total = total_terms.mean(axis=1) / variance
+        # 95% confidence half-widths of the two Monte Carlo means
+        first_order_conf = 1.96 * first_order_terms.std(axis=1) / np.sqrt(n_base_samples) / variance
+        total_conf = 1.96 * total_terms.std(axis=1) / np.sqrt(n_base_samples) / variance
+
+    rows = np.array([row for _, row in inputs], dtype=int)
+    indices = pd.DataFrame({'Account': database['Account'].to_numpy()[rows],
+                            'Account Title': database['Account Title'].str.strip().to_numpy()[rows],
+                            'Input': [name for name, _ in inputs]})
+    for k, account in enumerate(accounts):
+        indices[f'{account} S1'] = first_order[:, k]
+        indices[f'{account} S1 conf'] = first_order_conf[:, k]
+        indices[f'{account} ST'] = total[:, k]
+        indices[f'{account} ST conf'] = total_conf[:, k]
+    if not indices.empty:
+        indices = indices.sort_values(f'{accounts[0]} ST', ascending=False, kind='stable').reset_index(drop=True)
+    indices.attrs['Variance'] = dict(zip(accounts, variance.tolist()))
+    indices.attrs['Evaluations'] = n_base_samples * (n_inputs + 2)
+    return indices
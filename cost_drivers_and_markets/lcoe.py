@@ -1,8 +1,19 @@
 # Copyright 2025, Battelle Energy Alliance, LLC, ALL RIGHTS RESERVED
 
+import os
+import sys
+
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np 
+
+# Make sure the MOUSE root is on sys.path so 'cost.*' imports resolve
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from cost.levelized_cost import LevelizedCost
+
 # Replace 'file_path' with the path to your Excel file
 file_path = 'LMTR_CGMR_Summary.xlsx'
 
@@ -13,25 +24,17 @@ def is_double_digit_excluding_multiples_of_10(val):
 
 
 def energy_cost_levelized( plant_lifetime_years, capital_cost, ann_cost, discount_rate, power_MWe, capacity_factor  ):
-    
-    sum_cost = 0 # initialization 
-    sum_elec = 0
-    
-    for i in range(  1 + plant_lifetime_years) :
-        
-        if i == 0:
-            cap_cost_per_year = capital_cost
-            annual_cost = 0 # no annual cost at year 0
-            elec_gen = 0 # no electricity generated
-            
-        elif i >0:
-            cap_cost_per_year  = 0
-            annual_cost = ann_cost
-            elec_gen = power_MWe *capacity_factor * 365 * 24       # MW hour. 
-        sum_cost +=  (cap_cost_per_year + annual_cost)/ ((1+ discount_rate)**i) 
-        sum_elec += elec_gen/ ((1 + discount_rate)**i) 
-    LCOE =  sum_cost/ sum_elec
-    return LCOE
+    # Capital cost at year 0, annual cost and electricity in years 1..plant_lifetime_years
+    # (costs may be arrays, e.g. one entry per account)
+    return LevelizedCost(discount_rate, plant_lifetime_years, power_MWe, capacity_factor).lcoe(capital_cost, ann_cost)
+
+
+def lcoe_per_account(df, cost_column, power_MWe, capacity_factor):
+    # Accounts below 70 are one-time capital costs, the others are annual costs
+    is_capital = df['Account ID'] < 70
+    return energy_cost_levelized(plant_lifetime_years, np.where(is_capital, df[cost_column], 0),
+                                 np.where(is_capital, 0, df[cost_column]),
+                                 discount_rate, power_MWe, capacity_factor)
 
 
 plant_lifetime_years = 60
@@ -40,48 +43,9 @@ power_MWe_LMTR = 20*0.31
 capacity_factor_LMTR = 0.93
 
 
-def calculate_LCOE_LMTR_FOAK(row):
-    if row['Account ID'] < 70:
-        return energy_cost_levelized(plant_lifetime_years, row['LTMR [$]'],\
-            0, discount_rate, power_MWe_LMTR, capacity_factor_LMTR)
-    else:
-        return energy_cost_levelized(plant_lifetime_years, 0, row['LTMR [$]'],\
-            discount_rate, power_MWe_LMTR, capacity_factor_LMTR)
-
-def calculate_LCOE_LMTR_NOAK(row):
-    if row['Account ID'] < 70:
-        return energy_cost_levelized(plant_lifetime_years, row['NOAK LRMT [$]'],\
-            0, discount_rate, power_MWe_LMTR, capacity_factor_LMTR)
-    else:
-        return energy_cost_levelized(plant_lifetime_years, 0, row['NOAK LRMT [$]'],\
-            discount_rate, power_MWe_LMTR, capacity_factor_LMTR)
-
-
-
 power_MWe_CGMR = 15*0.4
 capacity_factor_CGMR = 0.93
 
-def calculate_LCOE_CGMR_FOAK(row):
-    if row['Account ID'] < 70:
-        return energy_cost_levelized(plant_lifetime_years, row['GCMR [$]'],\
-            0, discount_rate, power_MWe_CGMR, capacity_factor_CGMR)
-    else:
-        return energy_cost_levelized(plant_lifetime_years, 0, row['GCMR [$]'],\
-            discount_rate, power_MWe_CGMR, capacity_factor_CGMR)
-
-def calculate_LCOE_CGMR_NOAK(row):
-    if row['Account ID'] < 70:
-        return energy_cost_levelized(plant_lifetime_years, row['NOAK GCMR [$]'],\
-            0, discount_rate, power_MWe_CGMR, capacity_factor_CGMR)
-    else:
-        return energy_cost_levelized(plant_lifetime_years, 0, row['NOAK GCMR [$]'],\
-            discount_rate, power_MWe_CGMR, capacity_factor_CGMR)
-
-
-
-
-
-
 # Read the Excel file
 df = pd.read_excel(file_path, sheet_name='Sheet1')  
 
@@ -90,18 +54,18 @@ filtered_df = df[df['Account ID'].apply(is_double_digit_excluding_multiples_of_1
 
 # Assuming your DataFrame is named df
 df1 = filtered_df[(filtered_df['LTMR [$]'] != 0) & (filtered_df['LTMR [$]'].notna())]
-df1['LCOE FOAK LMTR'] = df1.apply(calculate_LCOE_LMTR_FOAK, axis=1)
+df1['LCOE FOAK LMTR'] = lcoe_per_account(df1, 'LTMR [$]', power_MWe_LMTR, capacity_factor_LMTR)
 print("\nSum of LCOE FOAK LMTR:",(df1['LCOE FOAK LMTR']).sum())
 
-df1['LCOE NOAK LMTR'] = df1.apply(calculate_LCOE_LMTR_NOAK, axis=1)
+df1['LCOE NOAK LMTR'] = lcoe_per_account(df1, 'NOAK LRMT [$]', power_MWe_LMTR, capacity_factor_LMTR)
 print("\nSum of LCOE NOAK LMTR:",(df1['LCOE NOAK LMTR']).sum())
 
 
 
-df1['LCOE FOAK CGMR'] = df1.apply(calculate_LCOE_CGMR_FOAK, axis=1)
+df1['LCOE FOAK CGMR'] = lcoe_per_account(df1, 'GCMR [$]', power_MWe_CGMR, capacity_factor_CGMR)
 print("\nSum of LCOE FOAK CGMR:",(df1['LCOE FOAK CGMR']).sum())
 
-df1['LCOE NOAK CGMR'] = df1.apply(calculate_LCOE_CGMR_NOAK, axis=1)
+df1['LCOE NOAK CGMR'] = lcoe_per_account(df1, 'NOAK GCMR [$]', power_MWe_CGMR, capacity_factor_CGMR)
 print("\nSum of LCOE NOAK CGMR:",(df1['LCOE NOAK CGMR']).sum())
 
 
@@ -0,0 +1,304 @@
+# Copyright 2025, Battelle Energy Alliance, LLC, ALL RIGHTS RESERVED
+"""Performance benchmarks of the cost engine on the reference reactor designs.
+
+Run from the repository root (the app's estimate path reads cost/Cost_Database.xlsx
+relative to it):
+
+    python tests/benchmark_cost_engine.py                    # run, compare with the baseline
+    python tests/benchmark_cost_engine.py --update-baseline  # run, and save the results as the baseline
+    python tests/benchmark_cost_engine.py --reactors LTMR --samples 1 10 --output results.json
+
+Every workload runs for the LTMR, GCMR and HPMR cases of test_estimate_service
+(REACTOR_CASES, BASE_INPUTS) at 1, 10, 100 and 1000 samples:
+
+    bottom_up_cost_estimate   the cost engine (Batched engine, one worker, fixed seed)
+    cost_drivers_estimate     the per-account LCOE contributions of the estimate's table
+    run_estimate              the app's estimate path, cold: no estimate cache entry and
+                              no cached stages of the incremental estimate
+
+Params are built with webapp/reactor_config.build_params. Importing
+test_estimate_service installs the OpenMC/WATTS/matplotlib stubs, so the
+benchmarks run offline, like the tests.
+
+A measurement is the median (and minimum) wall time of --repeats runs, after one
+warm-up run. The bottom_up_cost_estimate workloads also keep the stage times of one
+instrumented run (see cost/instrumentation.py), to show where a regression comes
+from. Results are JSON:
+
+    {"Machine": {...}, "Thresholds": {...},
+     "Results": {"LTMR/bottom_up_cost_estimate/100": {"Median (s)": ..., "Min (s)": ..., "Runs": 5, "Stages": {...}}}}
+
+benchmark_baseline.json holds the baseline and its regression thresholds: a
+result regresses when its minimum time exceeds the baseline minimum by more
+than the relative threshold and by more than the absolute one. The minimum is
+compared because the median of a few runs follows the load of the machine, and
+the absolute threshold keeps millisecond workloads from failing on timer noise.
+Regressed results are measured again (CONFIRMATION_ROUNDS) before they are
+reported, so a burst of load on the machine does not fail the check. 'Per Workload' entries override the
+thresholds of a workload. Baselines are machine-specific: regenerate the
+baseline (--update-baseline) on the machine that checks it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import copy
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from collections import OrderedDict
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import test_estimate_service as service_cases  # installs the OpenMC/WATTS stubs
+from cost.cost_drivers import cost_drivers_estimate
+from cost.cost_estimation import bottom_up_cost_estimate, instrumented_cost_estimate
+from cost.estimate_cache import EstimateCache
+from webapp import estimate_service
+from webapp.estimate_service import EstimateInputs, _base_overrides
+from reactor_config import build_params   # the module estimate_service uses (webapp/ is on sys.path)
+
+
+REPO_ROOT = service_cases.REPO_ROOT
+COST_DATABASE = os.path.join(REPO_ROOT, 'cost', 'Cost_Database.xlsx')
+BASELINE_FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+REACTORS = tuple(service_cases.REACTOR_CASES)
+WORKLOADS = ('bottom_up_cost_estimate', 'cost_drivers_estimate', 'run_estimate')
+SAMPLE_COUNTS = (1, 10, 100, 1000)
+SEED = 2025
+REPEATS = 5
+# Times the regressed results are measured again before they are reported
+CONFIRMATION_ROUNDS = 2
+
+DEFAULT_THRESHOLDS = {'Relative': 0.3, 'Absolute (s)': 0.01, 'Per Workload': {'run_estimate': {'Relative': 0.4}}}
+
+
+def _inputs(reactor_type):
+    return EstimateInputs(**service_cases.BASE_INPUTS, **service_cases.REACTOR_CASES[reactor_type]['inputs'])
+
+
+def reference_params(reactor_type):
+    # Params of a reference design, built as the app builds them
+    inputs = _inputs(reactor_type)
+    params = build_params(inputs.reactor_type, inputs.power_mwt, inputs.enrichment, _base_overrides(inputs),
+                          n_rings_per_assembly=inputs.n_rings_per_assembly, active_height=inputs.active_height,
+                          n_assembly_rings=inputs.n_assembly_rings, n_core_rings=inputs.n_core_rings)
+    params['plotting'] = 'N'
+    return params
+
+
+def _estimate_params(params, n_samples):
+    params = copy.deepcopy(params)
+    params.update({'Cost Engine': 'Batched', 'Number of Samples': n_samples, 'Number of Workers': 1,
+                   'Random Seed': SEED})
+    return params
+
+
+# **************************************************************************************************************************
+#                                                Workloads
+# **************************************************************************************************************************
+# A workload is built once per (reactor, samples) point, outside of the timings, and returns
+# the function to time (called with no arguments).
+
+def _bottom_up_cost_estimate_workload(reactor_type, params, n_samples):
+    return lambda: bottom_up_cost_estimate(COST_DATABASE, _estimate_params(params, n_samples))
+
+
+def _cost_drivers_estimate_workload(reactor_type, params, n_samples):
+    estimate_params = _estimate_params(params, n_samples)
+    table = bottom_up_cost_estimate(COST_DATABASE, estimate_params)
+    # cost_drivers_estimate adds its columns to the table it is given
+    return lambda: cost_drivers_estimate(table.copy(), copy.deepcopy(estimate_params))
+
+
+def _run_estimate_workload(reactor_type, params, n_samples):
+    inputs = _inputs(reactor_type)
+    overrides = lambda inputs: dict(_base_overrides(inputs), **{'Number of Samples': n_samples})
+
+    def run():
+        # Cold estimates: an empty estimate cache and no cached stages
+        with tempfile.TemporaryDirectory(prefix='mouse-benchmark-') as cache_directory, \
+                mock.patch.object(estimate_service, '_estimate_cache', EstimateCache(cache_directory)), \
+                mock.patch.object(estimate_service, '_incremental_estimates', OrderedDict()), \
+                mock.patch.object(estimate_service, '_base_overrides', overrides):
+            return estimate_service.run_estimate(inputs)
+    return run
+
+
+WORKLOAD_BUILDERS = {
+    'bottom_up_cost_estimate': _bottom_up_cost_estimate_workload,
+    'cost_drivers_estimate': _cost_drivers_estimate_workload,
+    'run_estimate': _run_estimate_workload,
+}
+
+
+def _stage_times(params, n_samples):
+    # Wall time of every stage of one instrumented estimate
+    _, report = instrumented_cost_estimate(COST_DATABASE, _estimate_params(params, n_samples), quiet=True)
+    return {name: round(record.seconds, 6) for name, record in report.stages.items()}
+
+
+def time_workload(function, repeats=REPEATS):
+    # Median and minimum wall time of repeats calls, after a warm-up call
+    function()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return {'Median (s)': statistics.median(times), 'Min (s)': min(times), 'Runs': repeats}
+
+
+def machine_info():
+    return {'Platform': platform.platform(), 'Processor': platform.processor() or platform.machine(),
+            'CPU Count': os.cpu_count(), 'Python': platform.python_version(),
+            'numpy': np.__version__, 'pandas': pd.__version__}
+
+
+def run_benchmarks(reactors=REACTORS, workloads=WORKLOADS, sample_counts=SAMPLE_COUNTS, repeats=REPEATS):
+    """
+    Times every workload for every reactor and number of samples. Returns
+    {'Machine': ..., 'Results': {'<reactor>/<workload>/<samples>': measurement}}.
+    """
+    results = {}
+    for reactor_type in reactors:
+        params = reference_params(reactor_type)
+        for workload in workloads:
+            for n_samples in sample_counts:
+                key = f'{reactor_type}/{workload}/{n_samples}'
+                results[key] = measure(key, params, repeats=repeats)
+                print(f"{key:45s} median {results[key]['Median (s)']:.4f} s   min {results[key]['Min (s)']:.4f} s")
+    return {'Machine': machine_info(), 'Results': results}
+
+
+def measure(key, params=None, repeats=REPEATS):
+    # Measurement of one result key ('<reactor>/<workload>/<samples>'); params are those of the reactor
+    reactor_type, workload, n_samples = key.split('/')
+    n_samples = int(n_samples)
+    if params is None:
+        params = reference_params(reactor_type)
+    with contextlib.redirect_stdout(io.StringIO()):
+        function = WORKLOAD_BUILDERS[workload](reactor_type, params, n_samples)
+        measurement = time_workload(function, repeats=repeats)
+        if workload == 'bottom_up_cost_estimate':
+            measurement['Stages'] = _stage_times(params, n_samples)
+    return measurement
+
+
+# **************************************************************************************************************************
+#                                                Baselines
+# **************************************************************************************************************************
+
+def _thresholds(thresholds, key):
+    # Relative and absolute thresholds of a result key ('<reactor>/<workload>/<samples>')
+    workload = key.split('/')[1]
+    overrides = thresholds.get('Per Workload', {}).get(workload, {})
+    return (overrides.get('Relative', thresholds['Relative']),
+            overrides.get('Absolute (s)', thresholds['Absolute (s)']))
+
+
+def compare_with_baseline(results, baseline):
+    """
+    Regressions of results (of run_benchmarks) against a baseline, as
+    (key, baseline time, time, ratio) tuples of the minimum times. Results
+    missing from the baseline are not compared.
+    """
+    thresholds = baseline.get('Thresholds', DEFAULT_THRESHOLDS)
+    regressions = []
+    for key, measurement in results['Results'].items():
+        reference = baseline['Results'].get(key)
+        if reference is None:
+            continue
+        relative, absolute = _thresholds(thresholds, key)
+        seconds, baseline_seconds = measurement['Min (s)'], reference['Min (s)']
+        if seconds > baseline_seconds * (1 + relative) and seconds - baseline_seconds > absolute:
+            regressions.append((key, baseline_seconds, seconds, seconds / baseline_seconds))
+    return regressions
+
+
+def confirm_regressions(results, baseline, repeats=REPEATS, rounds=CONFIRMATION_ROUNDS):
+    """
+    Measures the regressed results again, up to rounds times, keeping the
+    fastest run of every result; a slow run caused by the load of the machine
+    is then not reported. Returns the regressions that remain.
+    """
+    regressions = compare_with_baseline(results, baseline)
+    for _ in range(rounds):
+        if not regressions:
+            break
+        for key, *_ in regressions:
+            measurement = measure(key, repeats=repeats)
+            previous = results['Results'][key]
+            measurement['Min (s)'] = min(previous['Min (s)'], measurement['Min (s)'])
+            measurement['Runs'] += previous['Runs']
+            results['Results'][key] = measurement
+        regressions = compare_with_baseline(results, baseline)
+    return regressions
+
+
+def load_baseline(filename=BASELINE_FILENAME):
+    with open(filename) as f:
+        return json.load(f)
+
+
+def save_results(results, filename, thresholds=None):
+    results = dict(results, Thresholds=thresholds if thresholds is not None else DEFAULT_THRESHOLDS)
+    with open(filename, 'w') as f:
+        json.dump(results, f, indent=1)
+        f.write('\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Cost engine benchmarks (see the module docstring).')
+    parser.add_argument('--reactors', nargs='+', default=REACTORS, choices=REACTORS)
+    parser.add_argument('--workloads', nargs='+', default=WORKLOADS, choices=WORKLOADS)
+    parser.add_argument('--samples', nargs='+', type=int, default=SAMPLE_COUNTS)
+    parser.add_argument('--repeats', type=int, default=REPEATS)
+    parser.add_argument('--baseline', default=BASELINE_FILENAME, help='baseline JSON file')
+    parser.add_argument('--output', help='JSON file the results are written to')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='save the results as the baseline (keeping its thresholds)')
+    args = parser.parse_args(argv)
+
+    os.chdir(REPO_ROOT)
+    warnings.filterwarnings('ignore')
+    results = run_benchmarks(args.reactors, args.workloads, args.samples, args.repeats)
+    baseline = load_baseline(args.baseline) if os.path.isfile(args.baseline) else None
+
+    thresholds = baseline.get('Thresholds') if baseline is not None else None
+    if args.update_baseline or baseline is None:
+        if args.output:
+            save_results(results, args.output, thresholds)
+        if not args.update_baseline:
+            print(f"No baseline at {args.baseline}; run with --update-baseline to create it.")
+            return 0
+        if baseline is not None:
+            # Results not rerun keep their baseline
+            results = dict(results, Results=dict(baseline['Results'], **results['Results']))
+        save_results(results, args.baseline, thresholds)
+        print(f"Baseline saved at {args.baseline}")
+        return 0
+
+    if baseline.get('Machine', {}).get('Platform') != results['Machine']['Platform']:
+        print("Note: the baseline was recorded on another machine; timings may not be comparable.")
+    regressions = confirm_regressions(results, baseline, repeats=args.repeats)
+    if args.output:
+        save_results(results, args.output, thresholds)
+    for key, baseline_seconds, seconds, ratio in regressions:
+        print(f"REGRESSION {key}: {seconds:.4f} s vs baseline {baseline_seconds:.4f} s ({ratio:.2f}x)")
+    print(f"{len(regressions)} regression(s) in {len(results['Results'])} benchmarks.")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""Tests for the compiled cost database snapshot (cost/cost_database.py)."""
+
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from cost import cost_database
+from cost.cost_escalation import (CompiledCostSheet, calculate_inflation_multiplier, escalate_cost_database,
+                                   escalate_cost_database_years)
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COST_DATABASE = os.path.join(REPO_ROOT, 'cost', 'Cost_Database.xlsx')
+
+
+@pytest.fixture
+def workbook(tmp_path, monkeypatch):
+    monkeypatch.setenv(cost_database.CACHE_DIR_ENV_VAR, str(tmp_path / 'cache'))
+    cost_database.clear_cost_database_cache()
+    path = tmp_path / 'Cost_Database.xlsx'
+    shutil.copy(COST_DATABASE, path)
+    yield str(path)
+    cost_database.clear_cost_database_cache()
+
+
+def test_snapshot_matches_workbook(workbook):
+    sheet = cost_database.read_cost_database_sheet(workbook, 'Economics Parameters')
+    pd.testing.assert_frame_equal(pd.read_excel(workbook, sheet_name='Economics Parameters'), sheet)
+
+    snapshot = cost_database.snapshot_path(workbook, cost_database.workbook_hash(workbook))
+    assert os.path.exists(snapshot)
+
+
+def test_snapshot_is_reused_by_a_new_process(workbook, monkeypatch):
+    cost_database.load_cost_database(workbook)
+    cost_database.clear_cost_database_cache()
+
+    def fail(*args, **kwargs):
+        raise AssertionError('the workbook should not be parsed again')
+    monkeypatch.setattr(cost_database.pd, 'read_excel', fail)
+    assert 'Cost Database' in cost_database.load_cost_database(workbook)
+
+
+def test_snapshot_is_rebuilt_when_the_workbook_changes(workbook):
+    old_hash = cost_database.cost_database_hash(workbook)
+    old_snapshot = cost_database.snapshot_path(workbook, old_hash)
+
+    sheets = pd.read_excel(workbook, sheet_name=None)
+    sheets['Economics Parameters'].loc[0, 'Value'] = 123.0
+    with pd.ExcelWriter(workbook) as writer:
+        for name, sheet in sheets.items():
+            sheet.to_excel(writer, sheet_name=name, index=False)
+
+    assert cost_database.cost_database_hash(workbook) != old_hash
+    assert cost_database.read_cost_database_sheet(workbook, 'Economics Parameters').loc[0, 'Value'] == 123.0
+    assert not os.path.exists(old_snapshot)
+
+
+def test_sheets_are_returned_as_copies(workbook):
+    params = {}
+    escalated = escalate_cost_database(workbook, 2025, params)
+    escalated.loc[:, 'Fixed Cost ($)'] = -1
+    assert (cost_database.read_cost_database_sheet(workbook, 'Cost Database')['Fixed Cost ($)'] != -1).any()
+    assert params
+
+
+def test_escalation_to_several_years_matches_single_year_calls(workbook):
+    escalated = escalate_cost_database_years(workbook, [2020, 2025], {})
+    for year in [2020, 2025]:
+        pd.testing.assert_frame_equal(escalate_cost_database(workbook, year, {}), escalated[year])
+
+    row = escalated[2020].dropna(subset=['Fixed Cost ($)']).iloc[0]
+    expected = calculate_inflation_multiplier(workbook, row['Dollar Year'], row['Type'], 2020)
+    assert row['inflation_multiplier'] == pytest.approx(expected)
+
+
+def test_param_referenced_cost_cells_are_resolved():
+    sheet = pd.DataFrame({col: [1.0, 'Reactor Cost', None] for col in
+                          ['Fixed Cost ($)', 'Fixed Cost Low End', 'Fixed Cost High End',
+                           'Unit Cost', 'Unit Cost Low End', 'Unit Cost High End']})
+    resolved = CompiledCostSheet(sheet).resolve({'Reactor Cost': 5})
+    assert resolved['Unit Cost'][:2].tolist() == [1.0, 5.0]
+    assert pd.isna(resolved['Unit Cost'][2])
+    with pytest.raises(KeyError):
+        CompiledCostSheet(sheet).resolve({})
@@ -0,0 +1,559 @@
+"""Regression guardrails for the batched Monte Carlo cost engine.
+
+The batched engine (cost/batched_engine.py) must reproduce the table of the
+original per-sample engine. With a single sample no distribution is sampled, so
+both engines are deterministic and must agree to round-off for every reactor.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import copy
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import test_estimate_service as service_cases  # installs the OpenMC/WATTS stubs
+import benchmark_cost_engine as benchmarks
+from cost.batched_engine import SAMPLE_BLOCK_SIZE, _non_standard_cost_samples, sample_block_sizes, scale_cost_samples
+from cost.code_of_account_processing import AccountHierarchy, remove_irrelevant_account
+from cost.cost_escalation import escalate_cost_database
+from cost.cost_scaling import NON_STANDARD_COST_EQUATIONS, non_standard_cost_scale, scale_cost
+from cost.cost_database import load_cost_database
+from cost.estimate_cache import CACHE_DIR_ENV_VAR, CACHE_SIZE_ENV_VAR, EstimateCache
+from cost.cost_estimation import (bottom_up_cost_estimate, bottom_up_cost_estimate_central, bottom_up_cost_estimate_with_central,
+                                  bottom_up_fleet_estimate, bottom_up_learning_curve, instrumented_cost_estimate)
+from cost.incremental_estimate import IncrementalCostEstimate
+from cost.parametric_study import grid_points, run_parametric_study
+from cost.report_writer import write_cost_report
+from cost.results_store import ResultsStore
+from cost.sample_export import load_sample_export
+from cost.sensitivity import sobol_indices, tornado_sensitivity
+from cost.sampling import truncated_normal_ppf, truncated_normal_sample
+from reactor_engineering_evaluation.operation import reactor_operation
+from webapp.estimate_service import EstimateInputs, _base_overrides, _build_app_params
+
+
+COST_DATABASE = os.path.join(service_cases.REPO_ROOT, 'cost', 'Cost_Database.xlsx')
+
+
+def _reactor_params(reactor_type):
+    inputs = EstimateInputs(**service_cases.BASE_INPUTS,
+                            **service_cases.REACTOR_CASES[reactor_type]['inputs'])
+    return _build_app_params(inputs, _base_overrides(inputs))
+
+
+def _central_facility_params(params):
+    # Placeholder sizes for every central facility scaling variable the reactor builders do not set
+    params = dict(params, **{'Estimate Central Facility': True, 'Central Facility Construction Duration': 120,
+                             'Maximum Number of Operating Reactors': 100})
+    sheet = load_cost_database(COST_DATABASE)['Central Facility Database']
+    for name in set(sheet['Scaling Variable'].dropna()) | set(sheet['Count Scaling Variable'].dropna()):
+        params.setdefault(name, 10.0)
+    return params
+
+
+def _estimate(params, cost_engine, number_of_samples, **kwargs):
+    params = copy.deepcopy(params)
+    params['Cost Engine'] = cost_engine
+    params['Number of Samples'] = number_of_samples
+    with contextlib.redirect_stdout(io.StringIO()):
+        return bottom_up_cost_estimate(COST_DATABASE, params, **kwargs)
+
+
+class BatchedCostEngineTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        warnings.filterwarnings('ignore')
+        cls.params = {reactor_type: _reactor_params(reactor_type)
+                      for reactor_type in service_cases.REACTOR_CASES}
+
+    def test_single_sample_matches_per_sample_engine(self):
+        for reactor_type, params in self.params.items():
+            with self.subTest(reactor_type=reactor_type):
+                expected = _estimate(params, 'Per-Sample', 1)
+                actual = _estimate(params, 'Batched', 1)
+
+                self.assertEqual(list(expected.columns), list(actual.columns))
+                self.assertEqual(expected['Account'].tolist(), actual['Account'].tolist())
+                self.assertEqual(expected['Account Title'].tolist(), actual['Account Title'].tolist())
+                for column in expected.columns[2:]:
+                    np.testing.assert_allclose(actual[column].to_numpy(dtype=float),
+                                               expected[column].to_numpy(dtype=float),
+                                               rtol=1e-9, err_msg=f'{reactor_type}: {column}')
+
+    def test_sampled_estimate_has_spread(self):
+        result = _estimate(self.params['LTMR'], 'Batched', 50)
+        lcoe = result[result['Account'] == 'LCOE'].iloc[0]
+        self.assertGreater(lcoe['FOAK Estimated Cost ($2025)'], 0)
+        self.assertGreater(lcoe['FOAK Estimated Cost std ($2025)'], 0)
+        self.assertGreater(lcoe['NOAK Estimated Cost std ($2025)'], 0)
+
+    def test_seeded_estimate_does_not_depend_on_worker_count(self):
+        serial = _estimate(self.params['GCMR'], 'Batched', 250, seed=7, n_workers=1)
+        parallel = _estimate(self.params['GCMR'], 'Batched', 250, seed=7, n_workers=2)
+        other_seed = _estimate(self.params['GCMR'], 'Batched', 250, seed=8, n_workers=1)
+
+        pd.testing.assert_frame_equal(serial, parallel, check_exact=True)
+        self.assertFalse(serial.equals(other_seed))
+
+    def test_cost_percentiles_add_columns(self):
+        params = dict(self.params['LTMR'], **{'Cost Percentiles': [10, 90]})
+        result = _estimate(params, 'Batched', 200, seed=1)
+        lcoe = result[result['Account'] == 'LCOE'].iloc[0]
+        self.assertLess(lcoe['FOAK Estimated Cost P10 ($2025)'], lcoe['FOAK Estimated Cost ($2025)'])
+        self.assertGreater(lcoe['FOAK Estimated Cost P90 ($2025)'], lcoe['FOAK Estimated Cost ($2025)'])
+        self.assertIn('NOAK Estimated Cost P90 ($2025)', result.columns)
+
+    def test_quasi_random_designs_agree_with_random_sampling(self):
+        random = _estimate(self.params['LTMR'], 'Batched', 512, seed=3)
+        lcoe = random[random['Account'] == 'LCOE'].iloc[0]
+        for strategy in ['Sobol', 'Latin Hypercube']:
+            with self.subTest(strategy=strategy):
+                params = dict(self.params['LTMR'], **{'Sampling Strategy': strategy})
+                result = _estimate(params, 'Batched', 256, seed=3)
+                pd.testing.assert_frame_equal(result, _estimate(params, 'Batched', 256, seed=3), check_exact=True)
+                qmc_lcoe = result[result['Account'] == 'LCOE'].iloc[0]
+                self.assertAlmostEqual(qmc_lcoe['FOAK Estimated Cost ($2025)'] / lcoe['FOAK Estimated Cost ($2025)'],
+                                       1, delta=0.02)
+                self.assertAlmostEqual(qmc_lcoe['FOAK Estimated Cost std ($2025)'] / lcoe['FOAK Estimated Cost std ($2025)'],
+                                       1, delta=0.25)
+
+    def test_quasi_random_design_requires_batched_engine(self):
+        params = dict(self.params['LTMR'], **{'Sampling Strategy': 'Sobol'})
+        with self.assertRaises(ValueError):
+            _estimate(params, 'Per-Sample', 10)
+
+    def test_adaptive_run_stops_at_tolerance(self):
+        params = dict(self.params['GCMR'], **{'Sample Relative Tolerance': 0.5})
+        adaptive = _estimate(params, 'Batched', 1000, seed=5)
+        fixed = _estimate(self.params['GCMR'], 'Batched', SAMPLE_BLOCK_SIZE, seed=5)
+
+        # A loose tolerance is met by the first block, which is the first block of a fixed-size run
+        self.assertEqual(SAMPLE_BLOCK_SIZE, adaptive.attrs['Number of Samples'])
+        self.assertNotIn('Number of Samples', set(adaptive['Account']))
+        pd.testing.assert_frame_equal(fixed, adaptive[fixed.columns], check_exact=True)
+        lcoe = adaptive[adaptive['Account'] == 'LCOE'].iloc[0]
+        self.assertAlmostEqual(lcoe['FOAK Estimated Cost std ($2025)'] / np.sqrt(SAMPLE_BLOCK_SIZE),
+                               lcoe['FOAK Estimated Cost SE ($2025)'])
+
+        params['Sample Relative Tolerance'] = 0.004
+        tight = _estimate(params, 'Batched', 1000, seed=5)
+        n_samples = tight.attrs['Number of Samples']
+        self.assertGreater(n_samples, SAMPLE_BLOCK_SIZE)
+
+        # The summary of the run is an engine message, kept in the report of a quiet run
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            _, report = instrumented_cost_estimate(COST_DATABASE, dict(params, **{'Number of Samples': 1000}), seed=5)
+        self.assertNotIn('Adaptive sampling', stdout.getvalue())
+        self.assertTrue(any(text.startswith('Adaptive sampling: ') for text in report.messages))
+
+    def test_sampled_costs_match_scale_cost(self):
+        # Both engines draw a row's inputs from the same uniform stream, so one
+        # Generator gives the same samples to scale_cost and scale_cost_samples
+        params = copy.deepcopy(self.params['GCMR'])
+        params['Number of Samples'] = 10
+        with contextlib.redirect_stdout(io.StringIO()):
+            database = remove_irrelevant_account(
+                escalate_cost_database(COST_DATABASE, params['Escalation Year'], params), params)
+            reactor_operation(params)
+            batched = scale_cost_samples(database, params, 4, rng=np.random.default_rng(11))
+            rng = np.random.default_rng(11)
+            per_sample = np.array([scale_cost(database, params, rng=rng)['FOAK Estimated Cost ($2025)'].to_numpy(dtype=float)
+                                   for _ in range(4)])
+        np.testing.assert_allclose(batched, per_sample, rtol=1e-12)
+
+    def test_nonstandard_cost_kernel_matches_row_equations(self):
+        # Every nonstandard account, with and without the primary loop compressor correlation
+        accounts = np.array(list(NON_STANDARD_COST_EQUATIONS))
+        rng = np.random.default_rng(3)
+        unit_cost = rng.uniform(1e3, 1e6, (5, len(accounts)))
+        exponent = rng.uniform(0.3, 1.0, (5, len(accounts)))
+        scaling_variable_value = rng.uniform(0.5, 50, len(accounts))
+        params = {'Pump Isentropic Efficiency': 0.8, 'Compressor Isentropic Efficiency': 0.85,
+                  'Compressor Pressure Ratio': 2.1, 'Enrichment': 0.15, 'FTEs Per Onsite Operator Per Year': 2.0,
+                  'FTEs Per Offsite Operator (24/7)': 3.0, 'FTEs Per Security Staff (24/7)': 4.0,
+                  'Annual Coolant Supply Frequency': 0.5, 'FTEs Per Operator Per Year Per Refueling': 1.5}
+        for extra in ({}, {'Primary Loop Count': 2, 'Primary Loop Outlet Temperature': 900.0,
+                           'Primary Loop Compressor Power': 3e6}):
+            params.update(extra)
+            rows = np.arange(len(accounts))
+            kernel = _non_standard_cost_samples(rows, accounts, params, unit_cost, scaling_variable_value, exponent)
+            per_row = np.column_stack([non_standard_cost_scale(account, unit_cost[:, j], scaling_variable_value[j],
+                                                               exponent[:, j], params)
+                                       * np.ones(len(unit_cost)) for j, account in enumerate(accounts)])
+            np.testing.assert_array_equal(kernel, per_row)
+
+        with self.assertRaises(ValueError):
+            non_standard_cost_scale(999.9, 1.0, 1.0, 1.0, params)
+
+    def test_learning_curve_matches_regular_noak_estimate(self):
+        params = copy.deepcopy(self.params['LTMR'])
+        params['Number of Samples'] = 40
+        with contextlib.redirect_stdout(io.StringIO()):
+            curve = bottom_up_learning_curve(COST_DATABASE, copy.deepcopy(params), [1, 2, 10], seed=4)
+        self.assertEqual([1, 2, 10], curve['NOAK Unit Number'].tolist())
+        self.assertTrue(np.all(np.diff(curve['LCOE']) < 0))
+
+        # Every unit number reproduces the NOAK column of a regular run with the same seed
+        for unit_number in [2, 10]:
+            with self.subTest(unit_number=unit_number):
+                result = _estimate(dict(params, **{'NOAK Unit Number': unit_number}), 'Batched', 40, seed=4)
+                row = curve[curve['NOAK Unit Number'] == unit_number].iloc[0]
+                for account in ['LCOE', 'TCI']:
+                    expected = result[result['Account'] == account].iloc[0]
+                    self.assertAlmostEqual(row[account] / expected['NOAK Estimated Cost ($2025)'], 1, places=12)
+                    self.assertAlmostEqual(row[f'{account} std'] / expected['NOAK Estimated Cost std ($2025)'], 1,
+                                           places=9)
+
+    def test_fleet_estimate_applies_tax_credit_cutoff(self):
+        params = copy.deepcopy(self.params['LTMR'])
+        params.pop('ITC credit level', None)
+        params.update({'Number of Samples': 30, 'PTC credit value': 30, 'PTC credit period': 10,
+                       'Number of Units Claiming ITC/PTC': 3})
+        with contextlib.redirect_stdout(io.StringIO()):
+            fleet = bottom_up_fleet_estimate(COST_DATABASE, copy.deepcopy(params), 6, seed=2)
+        self.assertEqual(list(range(1, 7)), fleet['Unit Number'].tolist())
+
+        # Unit 1 is the FOAK column, unit 4 the NOAK column of a regular run with the same seed
+        first = _estimate(dict(params, **{'NOAK Unit Number': 4}), 'Batched', 30, seed=2)
+        for unit_number, column in [(1, 'FOAK Estimated Cost ($2025)'), (4, 'NOAK Estimated Cost ($2025)')]:
+            for account in ['LCOE', 'LCOE with PTC', 'TCI']:
+                expected = first[first['Account'] == account].iloc[0][column]
+                self.assertAlmostEqual(fleet.loc[unit_number - 1, account] / expected, 1, places=12)
+
+        # Only the first three units claim the PTC
+        credit = fleet['LCOE'] - fleet['LCOE with PTC']
+        self.assertTrue(np.all(credit[:3] > 0))
+        np.testing.assert_allclose(credit[3:], 0, atol=1e-9)
+        np.testing.assert_allclose(fleet['Cumulative Average LCOE'], fleet['LCOE'].cumsum() / fleet['Unit Number'])
+        self.assertEqual(fleet.loc[0, 'Cumulative Average TCI std'], fleet.loc[0, 'TCI std'])
+
+    def test_incremental_estimate_reruns_only_invalidated_stages(self):
+        params = dict(self.params['GCMR'], **{'Number of Samples': 200, 'Cost Percentiles': [10, 90]})
+        incremental = IncrementalCostEstimate(COST_DATABASE)
+        with contextlib.redirect_stdout(io.StringIO()):
+            first = incremental.estimate(copy.deepcopy(params), seed=6)
+            self.assertIn('FOAK costs', incremental.recomputed)
+            pd.testing.assert_frame_equal(_estimate(params, 'Batched', 200, seed=6), first, check_exact=True)
+
+            pd.testing.assert_frame_equal(first, incremental.estimate(copy.deepcopy(params), seed=6), check_exact=True)
+            self.assertEqual([], incremental.recomputed)
+
+            # A financial input only reruns the stages downstream of the interest cost (account 62)
+            what_if = dict(params, **{'Interest Rate': params['Interest Rate'] + 0.02})
+            result = incremental.estimate(copy.deepcopy(what_if), seed=6)
+        self.assertEqual(['Capital costs', 'Roll-up finance', 'TCI', 'Roll-up annual', 'LCOE', 'Summary'],
+                         incremental.recomputed)
+        self.assertIn('Interest Rate', incremental.dependency_graph()['Capital costs']['params'])
+        pd.testing.assert_frame_equal(_estimate(what_if, 'Batched', 200, seed=6), result, check_exact=True)
+
+    def test_central_facility_estimate_shares_one_pass(self):
+        params = _central_facility_params(self.params['GCMR'])
+        for number_of_samples in (1, 300):
+            with self.subTest(number_of_samples=number_of_samples):
+                separate_params = dict(params, **{'Number of Samples': number_of_samples})
+                joint_params = copy.deepcopy(separate_params)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    reactor = bottom_up_cost_estimate(COST_DATABASE, separate_params, seed=4)
+                    central = bottom_up_cost_estimate_central(COST_DATABASE, separate_params, seed=4)
+                    joint_reactor, joint_central = bottom_up_cost_estimate_with_central(COST_DATABASE, joint_params, seed=4)
+                pd.testing.assert_frame_equal(reactor, joint_reactor, check_exact=True)
+                self.assertEqual(list(central['Account']), list(joint_central['Account']))
+                self.assertEqual(set(separate_params), set(joint_params))
+                if number_of_samples == 1:
+                    pd.testing.assert_frame_equal(central, joint_central, check_exact=True)
+
+    def test_tornado_sensitivity_matches_one_at_a_time_estimates(self):
+        params = self.params['LTMR']
+        factors = [{'Parameter': 'Interest Rate', 'Low': 0.04, 'High': 0.10}, {'Account': 21}, {'Account': 22}]
+        with contextlib.redirect_stdout(io.StringIO()):
+            tornado = tornado_sensitivity(COST_DATABASE, params, factors)
+            high_interest = _estimate(dict(params, **{'Interest Rate': 0.10}), 'Batched', 1)
+        base = _estimate(params, 'Batched', 1).set_index('Account')['FOAK Estimated Cost ($2025)']
+
+        self.assertAlmostEqual(base['LCOE'], tornado.attrs['Base']['LCOE'])
+        self.assertTrue(np.all(np.diff(tornado['LCOE Swing']) <= 0))
+        rows = tornado.set_index('Factor')
+        self.assertAlmostEqual(high_interest.set_index('Account').loc['TCI', 'FOAK Estimated Cost ($2025)'],
+                               rows.loc['Interest Rate', 'TCI High'])
+        # The cost database ranges of the reactor system bracket the base estimate
+        reactor_system = rows.loc[rows.index.str.startswith('22:')].iloc[0]
+        self.assertLess(reactor_system['Delta TCI Low'], 0)
+        self.assertGreater(reactor_system['Delta TCI High'], 0)
+
+        # Sampling settings of the params are not those of the deterministic estimates
+        with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+            sampled_params = dict(params, **{'Sample Export': os.path.join(directory, 'samples')})
+            pd.testing.assert_frame_equal(tornado, tornado_sensitivity(COST_DATABASE, sampled_params, factors))
+            self.assertEqual([], os.listdir(directory))
+        for factor in ({'Parameter': 'Interest Rate', 'Low': 0.04}, {'Account': 21, 'Field': 'Fixed Cost', 'High': 1e6}):
+            with self.subTest(factor=factor), self.assertRaises(ValueError), contextlib.redirect_stdout(io.StringIO()):
+                tornado_sensitivity(COST_DATABASE, params, [factor])
+
+    def test_sobol_indices_rank_uncertain_inputs(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            indices = sobol_indices(COST_DATABASE, self.params['LTMR'], n_base_samples=128, seed=3)
+        n_inputs = len(indices)
+        self.assertEqual(128 * (n_inputs + 2), indices.attrs['Evaluations'])
+        self.assertEqual({'Fixed Cost', 'Unit Cost', 'Exponent'}, set(indices['Input']))
+        self.assertTrue(np.all(indices['LCOE ST'] >= 0))
+        self.assertTrue(np.all(np.diff(indices['LCOE ST']) <= 0))
+        # The turbine-generator scaling exponent dominates the LCOE variance
+        self.assertEqual((232.1, 'Exponent'), (indices.loc[0, 'Account'], indices.loc[0, 'Input']))
+
+    def test_parametric_study_resumes_after_missing_points(self):
+        params = dict(self.params['LTMR'], **{'Number of Samples': 20})
+        points = grid_points({'Interest Rate': [0.04, 0.08], 'Construction Duration': [12, 24]})
+        prepared = []
+        with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+            output = os.path.join(directory, 'study.csv')
+            study = run_parametric_study(COST_DATABASE, params, points, output, ['Power MWe'], seed=5,
+                                         prepare=prepared.append)
+            self.assertEqual(4, len(study))
+            self.assertEqual([0.04, 0.04, 0.08, 0.08], list(study['Interest Rate']))
+
+            # A crash after the first two points: only the last two run again
+            study.iloc[:2].to_csv(output, index=False)
+            del prepared[:]
+            resumed = run_parametric_study(COST_DATABASE, params, points, output, ['Power MWe'], seed=5,
+                                           prepare=prepared.append)
+            direct = _estimate(dict(params, **points[3]), 'Batched', 20, seed=5).set_index('Account')
+            self.assertEqual([points[2]['Interest Rate'], points[3]['Interest Rate']], [p['Interest Rate'] for p in prepared])
+            pd.testing.assert_frame_equal(study, resumed)
+            self.assertAlmostEqual(direct.loc['LCOE', 'FOAK Estimated Cost ($2025)'],
+                                   resumed.loc[3, 'LCOE_FOAK Estimated Cost'])
+
+            # Another base design (or seed) recomputes every point instead of resuming
+            del prepared[:]
+            larger = dict(params, **{'Power MWt': params['Power MWt'] * 2})
+            rerun = run_parametric_study(COST_DATABASE, larger, points, output, ['Power MWe'], seed=5,
+                                         prepare=prepared.append)
+            self.assertEqual(4, len(prepared))
+            self.assertEqual(4, len(rerun))
+            self.assertTrue(set(rerun['Point ID']).isdisjoint(study['Point ID']))
+            self.assertEqual(4, len(run_parametric_study(COST_DATABASE, larger, points, output, ['Power MWe'], seed=6)))
+
+    def test_results_store_deduplicates_points_of_concurrent_writers(self):
+        points = [{'Power MWt': power} for power in (10.0, 15.0, 20.0)]
+        with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+            store = ResultsStore(os.path.join(directory, 'results.sqlite'))
+            for reactor_type in ('LTMR', 'GCMR'):
+                params = dict(self.params[reactor_type], **{'Number of Samples': 1})
+                run_parametric_study(COST_DATABASE, params, points, os.path.join(directory, f'{reactor_type}.csv'),
+                                     n_workers=2, store=store)
+            # A rerun (with the keys in another order) adds no records
+            params = dict(reversed(list(self.params['GCMR'].items())), **{'Number of Samples': 1})
+            study = run_parametric_study(COST_DATABASE, params, points, os.path.join(directory, 'rerun.csv'),
+                                         store=store)
+            self.assertEqual(6, len(store))
+            gcmr = store.query(reactor_type='GCMR', power_mwt=(12.0, None))
+        self.assertEqual([15.0, 20.0], sorted(gcmr['power_mwt']))
+        self.assertEqual(set(study.loc[1:, 'LCOE_FOAK Estimated Cost']), set(gcmr['LCOE_FOAK Estimated Cost']))
+        self.assertTrue(np.all(gcmr['core_rings'] == self.params['GCMR']['Core Rings']))
+
+    def test_estimate_cache_serves_repeated_estimates_without_the_engine(self):
+        params = dict(self.params['HPMR'], **{'Number of Samples': 50, 'Estimate Cache': True})
+        first_params, cached_params = copy.deepcopy(params), copy.deepcopy(params)
+        with (tempfile.TemporaryDirectory() as directory, mock.patch.dict(os.environ, {CACHE_DIR_ENV_VAR: directory}),
+              contextlib.redirect_stdout(io.StringIO())):
+            first = bottom_up_cost_estimate(COST_DATABASE, first_params, seed=8)
+            with mock.patch('cost.cost_estimation._bottom_up_cost_estimate', side_effect=AssertionError) as engine:
+                cached = bottom_up_cost_estimate(COST_DATABASE, cached_params, seed=8, n_workers=2)
+                self.assertFalse(engine.called)
+                # Another seed is another estimate
+                self.assertRaises(AssertionError, _estimate, params, 'Batched', 50, seed=9)
+        pd.testing.assert_frame_equal(first, cached, check_exact=True)
+        # The params the estimate computes are restored too
+        self.assertEqual(first_params['Annual Electricity Production'], cached_params['Annual Electricity Production'])
+
+        # Least recently used entries go first once the cache is full
+        with tempfile.TemporaryDirectory() as directory:
+            cache = EstimateCache(directory, max_bytes=2500)
+            for key in ('a', 'b', 'c'):
+                cache.put(key, bytes(1000))
+            self.assertIsNone(cache.get('a'))
+            self.assertIsNotNone(cache.get('b'))
+            cache.put('d', bytes(1000))
+            self.assertEqual([None, bytes(1000)], [cache.get('c'), cache.get('b')])
+
+            # A size limit of 0 turns the cache off
+            with mock.patch.dict(os.environ, {CACHE_SIZE_ENV_VAR: '0'}):
+                disabled = EstimateCache(os.path.join(directory, 'disabled'))
+            disabled.put('a', bytes(10))
+            self.assertIsNone(disabled.get('a'))
+            self.assertFalse(os.path.exists(disabled.directory))
+
+    def test_sample_export_holds_every_sample_of_the_summary(self):
+        params = _central_facility_params(self.params['GCMR'])
+        with tempfile.TemporaryDirectory() as directory:
+            params = dict(params, **{'Number of Samples': 300, 'Sample Export': directory})
+            with contextlib.redirect_stdout(io.StringIO()):
+                summary, central_summary = bottom_up_cost_estimate_with_central(COST_DATABASE, copy.deepcopy(params),
+                                                                                seed=2, n_workers=2)
+            foak, noak, inputs, metadata = load_sample_export(directory)
+            self.assertEqual((300, len(metadata['Inputs'])), inputs.shape)
+            columns = {column['Account']: column['Column'] for column in metadata['Columns']}
+            for account in ('OCC', 'TCI', 'LCOE'):
+                row = summary.set_index('Account').loc[account]
+                np.testing.assert_allclose(foak[:, columns[account]].mean(), row['FOAK Estimated Cost ($2025)'], rtol=1e-9)
+                np.testing.assert_allclose(noak[:, columns[account]].std(ddof=1), row['NOAK Estimated Cost std ($2025)'],
+                                           rtol=1e-9)
+            # Only uncertain inputs vary from sample to sample
+            self.assertTrue(np.all(np.ptp(inputs, axis=0) > 0))
+            central_foak, _, _, central_metadata = load_sample_export(directory, 'central_facility')
+            self.assertEqual(len(central_summary), len(central_metadata['Columns']))
+            self.assertEqual(300, len(central_foak))
+
+            with self.assertRaises(ValueError):
+                _estimate(params, 'Per-Sample', 300)
+
+    def test_cost_report_stores_long_arrays_columnar(self):
+        params = dict(self.params['LTMR'], **{'keff 2D': list(np.linspace(1.1, 1.0, 40)),
+                                              'PF Summary': {'Step': [0, 1, 2], 'Max_PF': [1.4, 1.5, 1.3]},
+                                              'Some list': [1, 2, 3]})
+        cost_tables = {'cost estimate': _estimate(params, 'Batched', 1)}
+        with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+            write_cost_report(os.path.join(directory, 'report.xlsx'), params, cost_tables)
+            sheets = pd.read_excel(os.path.join(directory, 'report.xlsx'), sheet_name=None)
+            write_cost_report(os.path.join(directory, 'report.json'), params, cost_tables)
+            with open(os.path.join(directory, 'report.json')) as f:
+                report = json.load(f)
+            if importlib.util.find_spec('pyarrow') is None:
+                self.assertRaises(ImportError, write_cost_report, os.path.join(directory, 'report.parquet'), params,
+                                  cost_tables)
+
+        self.assertEqual(['cost estimate', 'Parameters', 'Arrays'], list(sheets))
+        pd.testing.assert_frame_equal(cost_tables['cost estimate'], sheets['cost estimate'], check_dtype=False)
+        np.testing.assert_allclose(params['keff 2D'], sheets['Arrays']['keff 2D'])
+        self.assertEqual([1.4, 1.5, 1.3], list(sheets['Arrays']['PF Summary: Max_PF'].dropna()))
+        parameters = sheets['Parameters'].set_index('Parameter')
+        self.assertEqual(params['Interest Rate'], parameters.loc['Interest Rate', 'Value'])
+        self.assertIn('see the Arrays table', parameters.loc['keff 2D', 'Value'])
+        # Short lists are written as text
+        self.assertEqual('[1, 2, 3]', parameters.loc['Some list', 'Value'])
+
+        self.assertEqual(['cost estimate', 'Parameters', 'Arrays'], list(report))
+        self.assertEqual(list(sheets['Parameters'].columns), report['Parameters']['columns'])
+        self.assertEqual(len(cost_tables['cost estimate']), len(report['cost estimate']['data']))
+        np.testing.assert_allclose(params['keff 2D'], report['Arrays']['keff 2D'])
+
+    def test_instrumented_run_reports_every_stage(self):
+        stages = ['Escalation', 'Scaling', 'FOAK to NOAK', 'Roll-up base', 'Indirect and annualized costs',
+                  'Roll-up finance', 'TCI', 'LCOE', 'Statistics']
+        for cost_engine, number_of_samples in [('Batched', 300), ('Per-Sample', 3)]:
+            with self.subTest(cost_engine=cost_engine):
+                params = dict(self.params['LTMR'], **{'Cost Engine': cost_engine, 'Number of Samples': number_of_samples})
+                stdout = io.StringIO()
+                with contextlib.redirect_stdout(stdout):
+                    table, report = instrumented_cost_estimate(COST_DATABASE, copy.deepcopy(params), seed=2,
+                                                               track_allocations=True)
+                pd.testing.assert_frame_equal(table, _estimate(params, cost_engine, number_of_samples, seed=2))
+                self.assertNotIn('For the cost of the Account', stdout.getvalue())
+                self.assertTrue(any(text.startswith('For the cost of the Account') for text in report.messages))
+
+                self.assertLessEqual(set(stages), set(report.stages))
+                n_calls = len(sample_block_sizes(number_of_samples)) if cost_engine == 'Batched' else number_of_samples
+                self.assertEqual(n_calls, report.stages['LCOE'].calls)
+                self.assertGreater(report.stages['Scaling'].peak_bytes, 0)
+                self.assertLessEqual(sum(record.seconds for record in report.stages.values()), report.wall_time)
+
+        # From the params, the report is written to a JSON file
+        with tempfile.TemporaryDirectory() as folder:
+            filename = os.path.join(folder, 'report.json')
+            _estimate(dict(self.params['LTMR'], **{'Instrumentation Report': filename}), 'Batched', 10)
+            with open(filename) as f:
+                report = json.load(f)
+        self.assertEqual('Batched', report['Cost Engine'])
+        self.assertEqual(1, report['Stages']['TCI']['Calls'])
+        self.assertIsNone(report['Stages']['TCI']['Peak Allocation (bytes)'])
+
+    def test_unknown_cost_engine_is_rejected(self):
+        with self.assertRaises(ValueError):
+            _estimate(self.params['LTMR'], 'Vectorised', 1)
+
+
+class InverseCDFTest(unittest.TestCase):
+    def test_truncated_normal_ppf_stays_within_bounds(self):
+        u = np.linspace(0, 1, 101)[:, np.newaxis]
+        # Bounds around the mean, and bounds far in the upper tail
+        samples = truncated_normal_ppf(u, np.array([0.6, 0.0]), np.array([0.1, 1.0]),
+                                       np.array([0.4, 8.0]), np.array([0.8, 9.0]))
+        self.assertTrue(np.all(samples >= [0.4, 8.0]) and np.all(samples <= [0.8, 9.0]))
+        np.testing.assert_allclose(samples[50, 0], 0.6)
+        self.assertTrue(np.all(np.diff(samples, axis=0) >= 0))
+
+    def test_truncated_normal_sample_shapes(self):
+        rng = np.random.default_rng(0)
+        self.assertIsInstance(truncated_normal_sample(0.6, 0.1, 0.4, 0.8, rng=rng), float)
+        samples = truncated_normal_sample(np.array([0.6, 0.5]), 0.1, 0.4, 0.8, size=(1000, 2), rng=rng)
+        self.assertEqual((1000, 2), samples.shape)
+        self.assertTrue(np.all((samples >= 0.4) & (samples <= 0.8)))
+        self.assertTrue(np.isnan(truncated_normal_sample(np.nan, 0.1, 0.4, 0.8, rng=rng)))
+
+
+class AccountHierarchyTest(unittest.TestCase):
+    def setUp(self):
+        # 20 ─┬─ 21 ─┬─ 211 ── 211.1
+        #     │      └─ 212
+        #     └─ 22
+        self.hierarchy = AccountHierarchy([20, 21, 211, 211.1, 212, 22], [1, 2, 3, 4, 3, 2])
+
+    def test_children_skip_deeper_rows(self):
+        self.assertEqual([-1, 0, 1, 2, 1, 0], self.hierarchy.parent.tolist())
+        self.assertEqual([1, 5], self.hierarchy.children(0).tolist())
+        self.assertEqual([2, 4], self.hierarchy.children(1).tolist())
+        self.assertEqual([2, 3, 4], self.hierarchy.descendants(1).tolist())
+
+    def test_account_rows_come_from_the_account_map(self):
+        self.assertEqual([3], self.hierarchy.account_rows(211.1).tolist())
+        self.assertEqual([], self.hierarchy.account_rows(23).tolist())
+        self.assertEqual([1, 5], self.hierarchy.rows_in([22, 21]).tolist())
+
+    def test_roll_up_sums_children_and_zeroes_empty_leaves(self):
+        nan = np.nan
+        foak = np.array([[nan, nan, nan, 5.0, 2.0, nan],
+                         [nan, 7.0, nan, 1.0, 3.0, 4.0]])
+        noak = foak / 2
+        no_subaccounts = self.hierarchy.roll_up(foak, noak, 'base')
+
+        np.testing.assert_allclose([[7.0, 7.0, 5.0, 5.0, 2.0, 0.0],
+                                    [11.0, 7.0, 1.0, 1.0, 3.0, 4.0]], foak)
+        np.testing.assert_allclose(foak / 2, noak)
+        self.assertEqual([22, 22], no_subaccounts)
+
+
+class BenchmarkSuiteTest(unittest.TestCase):
+    def test_baseline_flags_regressions_beyond_thresholds(self):
+        baseline = benchmarks.load_baseline()
+        self.assertEqual(len(benchmarks.REACTORS) * len(benchmarks.WORKLOADS) * len(benchmarks.SAMPLE_COUNTS),
+                         len(baseline['Results']))
+
+        key = 'GCMR/bottom_up_cost_estimate/1000'
+        reference = baseline['Results'][key]['Min (s)']
+        results = {'Results': {key: {'Min (s)': 2 * reference + 0.02},
+                               'LTMR/bottom_up_cost_estimate/1': {'Min (s)': 0.002},   # fast, but not a slowdown
+                               'LTMR/run_estimate/99': {'Min (s)': 100.0}}}           # not in the baseline
+        self.assertEqual([key], [regression[0] for regression in benchmarks.compare_with_baseline(results, baseline)])
+
+    def test_workloads_run_offline(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            for workload in benchmarks.WORKLOADS:
+                with self.subTest(workload=workload):
+                    measurement = benchmarks.measure(f'LTMR/{workload}/1', repeats=1)
+                    self.assertGreater(measurement['Min (s)'], 0)
+        self.assertIn('LCOE', benchmarks.measure('HPMR/bottom_up_cost_estimate/10', repeats=1)['Stages'])
+
+
+if __name__ == '__main__':
+    unittest.main()
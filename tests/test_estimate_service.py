@@ -12,9 +12,12 @@ import json
 import math
 import os
 import sys
+import tempfile
 import unittest
 import warnings
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
 
 
 REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -112,11 +115,13 @@ def _install_material_density_lookup():
 _install_runtime_stubs()
 MATERIAL_DENSITIES_RAW = _install_material_density_lookup()
 
+from cost.estimate_cache import EstimateCache  # noqa: E402
+from webapp import estimate_service  # noqa: E402
 from webapp.estimate_service import (  # noqa: E402
     EstimateInputs,
-    LcoeAtNoakInputs,
+    clear_incremental_estimates,
     run_estimate,
-    run_lcoe_at_noak_unit,
+    run_lcoe_learning_curve,
 )
 
 
@@ -176,6 +181,14 @@ class EstimateServiceTest(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         warnings.filterwarnings('ignore')
+        # An empty estimate cache, so the estimates below run the cost engine
+        # instead of loading the entries of earlier runs
+        cls.cache_directory = tempfile.TemporaryDirectory(prefix='mouse-estimate-cache-')
+        cls.addClassCleanup(cls.cache_directory.cleanup)
+        cache_patch = patch.object(estimate_service, '_estimate_cache',
+                                   EstimateCache(cls.cache_directory.name))
+        cache_patch.start()
+        cls.addClassCleanup(cache_patch.stop)
         cls.results = {}
         for reactor_type, case in REACTOR_CASES.items():
             inputs = EstimateInputs(**BASE_INPUTS, **case['inputs'])
@@ -230,33 +243,63 @@ class EstimateServiceTest(unittest.TestCase):
                 self.assertGreater(params['Radial Reflector Mass'], 0.0)
                 self.assertGreater(params['Axial Reflector Mass'], 0.0)
 
-    def test_noak_lcoe_anchor_returns_diagnostics(self):
-        anchor = run_lcoe_at_noak_unit(LcoeAtNoakInputs(
-            **BASE_INPUTS,
-            **REACTOR_CASES['LTMR']['inputs'],
-            noak_unit_number=10,
-            include_diagnostics=True,
-        ))
-
-        self.assertTrue(math.isfinite(anchor.mean))
-        self.assertGreater(anchor.mean, 0)
-        self.assertTrue(math.isfinite(anchor.std))
-        self.assertGreaterEqual(anchor.std, 0)
-        self.assertIsNotNone(anchor.diag_df)
-        self.assertFalse(anchor.diag_df.empty)
-        self.assertEqual(10, anchor.diag_params['NOAK Unit Number'])
-
-    def test_noak_lcoe_anchor_omits_diagnostics_by_default(self):
-        anchor = run_lcoe_at_noak_unit(LcoeAtNoakInputs(
+    def test_designs_keep_their_own_incremental_estimates(self):
+        ltmr = EstimateInputs(**BASE_INPUTS, **REACTOR_CASES['LTMR']['inputs'])
+        gcmr = EstimateInputs(**BASE_INPUTS, **REACTOR_CASES['GCMR']['inputs'])
+        what_if = EstimateInputs(**dict(BASE_INPUTS, interest_rate=0.08),
+                                 **REACTOR_CASES['LTMR']['inputs'])
+        incremental_estimate = estimate_service._incremental_estimate(
+            estimate_service._design_key(ltmr))
+        self.assertIs(incremental_estimate, estimate_service._incremental_estimate(
+            estimate_service._design_key(what_if)))
+        self.assertIsNot(incremental_estimate, estimate_service._incremental_estimate(
+            estimate_service._design_key(gcmr)))
+
+        clear_incremental_estimates()
+        self.assertEqual({}, incremental_estimate[0].records)
+        self.assertEqual(0, len(estimate_service._incremental_estimates))
+
+    def test_noak_lcoe_learning_curve_returns_every_unit(self):
+        anchors = run_lcoe_learning_curve(EstimateInputs(
             **BASE_INPUTS,
             **REACTOR_CASES['LTMR']['inputs'],
-            noak_unit_number=10,
-        ))
-
-        self.assertTrue(math.isfinite(anchor.mean))
-        self.assertIsNone(anchor.diag_df)
-        self.assertEqual(10, anchor.diag_params['NOAK Unit Number'])
-
+        ), (2, 10))
+
+        self.assertEqual([2, 10], sorted(anchors))
+        for mean, std in anchors.values():
+            self.assertTrue(math.isfinite(mean))
+            self.assertGreater(mean, 0)
+            self.assertTrue(math.isfinite(std))
+            self.assertGreaterEqual(std, 0)
+        # Learning makes the 10th unit cheaper than the 2nd
+        self.assertLess(anchors[10][0], anchors[2][0])
+
+    def test_noak_lcoe_learning_curve_reads_the_tax_credit_lcoe(self):
+        curve = pd.DataFrame({
+            'NOAK Unit Number': [2, 10],
+            'LCOE': [100.0, 90.0],
+            'LCOE std': [5.0, 4.0],
+            'LCOE with PTC': [80.0, 70.0],
+            'LCOE with PTC std': [3.0, 2.0],
+            'LCOE (ITC-adjusted)': [60.0, 50.0],
+            'LCOE (ITC-adjusted) std': [float('nan'), 1.0],
+        })
+        expected = {
+            'None': {2: (100.0, 5.0), 10: (90.0, 4.0)},
+            'PTC': {2: (80.0, 3.0), 10: (70.0, 2.0)},
+            # A NaN std (e.g. a single sample) is reported as 0
+            'ITC': {2: (60.0, 0.0), 10: (50.0, 1.0)},
+        }
+        for tax_credit_type, anchors in expected.items():
+            with self.subTest(tax_credit_type=tax_credit_type):
+                inputs = EstimateInputs(**dict(
+                    BASE_INPUTS, tax_credit_type=tax_credit_type,
+                    tax_credit_value=None if tax_credit_type == 'None' else 0.30,
+                ), **REACTOR_CASES['LTMR']['inputs'])
+                with patch.object(estimate_service, 'bottom_up_learning_curve',
+                                  return_value=curve) as learning_curve:
+                    self.assertEqual(anchors, run_lcoe_learning_curve(inputs, (2, 10)))
+                self.assertEqual((2, 10), learning_curve.call_args.args[2])
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,42 @@
+"""Tests for the levelized cost kernel (cost/levelized_cost.py)."""
+
+import numpy as np
+import pytest
+
+from cost.levelized_cost import LevelizedCost, annuity_factor
+
+
+def _loop_lcoe(capital_cost, ann_cost, discount_rate, plant_lifetime_years, power_MWe, capacity_factor):
+    # Year-by-year discounted cash flows, as the cost engines used to compute them
+    sum_cost = capital_cost
+    sum_elec = 0
+    for i in range(1, 1 + plant_lifetime_years):
+        sum_cost += ann_cost / (1 + discount_rate) ** i
+        sum_elec += power_MWe * capacity_factor * 365 * 24 / (1 + discount_rate) ** i
+    return sum_cost / sum_elec
+
+
+def test_lcoe_matches_year_by_year_sum():
+    levelized = LevelizedCost(0.07, 40, 15.0, 0.9)
+    assert levelized.lcoe(3.0e8, 1.2e7) == pytest.approx(_loop_lcoe(3.0e8, 1.2e7, 0.07, 40, 15.0, 0.9), rel=1e-12)
+
+
+def test_lcoe_broadcasts_over_samples_accounts_and_scenarios():
+    rng = np.random.default_rng(0)
+    capital = rng.uniform(1e6, 1e8, size=(5, 3, 1))      # samples × accounts × 1
+    annual = rng.uniform(1e5, 1e6, size=(5, 3, 1))
+    discount_rate = np.array([0.0, 0.05, 0.1])           # scenarios
+    lcoe = LevelizedCost(discount_rate, 30, 10.0, 0.95).lcoe(capital, annual)
+
+    assert lcoe.shape == (5, 3, 3)
+    for k, rate in enumerate(discount_rate):
+        assert lcoe[2, 1, k] == pytest.approx(_loop_lcoe(capital[2, 1, 0], annual[2, 1, 0], rate, 30, 10.0, 0.95), rel=1e-12)
+
+
+def test_ptc_credit_covers_the_credit_period_only():
+    levelized = LevelizedCost(0.06, 20, 10.0, 0.9)
+    annual_elec = 10.0 * 0.9 * 365 * 24
+    expected = (annual_elec * 30 / (1 - 0.21) * annuity_factor(0.06, 10)) / (annual_elec * annuity_factor(0.06, 20))
+    assert levelized.ptc_credit(30, 10, 0.21) == pytest.approx(expected)
+    # A credit period longer than the levelization period is capped
+    assert levelized.ptc_credit(30, 50, 0.21) == pytest.approx(30 / (1 - 0.21))
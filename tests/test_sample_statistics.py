@@ -0,0 +1,54 @@
+"""Tests for the streaming Monte Carlo statistics (cost/sample_statistics.py)."""
+
+import numpy as np
+
+from cost.sample_statistics import SampleStatistics
+
+
+def _samples():
+    rng = np.random.default_rng(3)
+    samples = rng.lognormal(10, 0.5, size=(1000, 4))
+    samples[::7, 1] = np.nan      # an account that is sometimes empty
+    samples[:, 3] = np.nan        # an account that is always empty
+    return samples
+
+
+def test_blockwise_updates_match_numpy():
+    samples = _samples()
+    statistics = SampleStatistics(4)
+    for block in np.array_split(samples, 13):
+        statistics.update(block)
+
+    np.testing.assert_allclose(np.nanmean(samples[:, :3], axis=0), statistics.mean[:3], rtol=1e-12)
+    np.testing.assert_allclose(np.nanstd(samples[:, :3], axis=0, ddof=1), statistics.std(ddof=1)[:3], rtol=1e-10)
+    assert np.isnan(statistics.mean[3]) and np.isnan(statistics.std()[3])
+    assert statistics.n_samples == 1000
+
+
+def test_merge_matches_a_single_pass():
+    samples = _samples()
+    merged = SampleStatistics(4).update(samples[:300]).merge(SampleStatistics(4).update(samples[300:]))
+    single = SampleStatistics(4).update(samples)
+    np.testing.assert_allclose(single.mean, merged.mean, rtol=1e-12)
+    np.testing.assert_allclose(single.std(), merged.std(), rtol=1e-10)
+
+
+def test_reservoir_is_bounded_and_independent_of_merge_order():
+    samples = _samples()
+    blocks = np.array_split(samples, 10)
+    rngs = [np.random.default_rng(k) for k in range(10)]
+    block_statistics = [SampleStatistics(4, reservoir_size=200).update(block, rng=rng)
+                        for block, rng in zip(blocks, rngs)]
+
+    forward = SampleStatistics(4, reservoir_size=200)
+    for block in block_statistics:
+        forward.merge(block)
+    backward = SampleStatistics(4, reservoir_size=200)
+    for block in reversed(block_statistics):
+        backward.merge(block)
+
+    assert len(forward.reservoir) == 200
+    np.testing.assert_array_equal(forward.percentiles([10, 50, 90]), backward.percentiles([10, 50, 90]))
+    p10, p50, p90 = forward.percentiles([10, 50, 90])[:, 0]
+    assert p10 < np.median(samples[:, 0]) < p90
+    assert abs(p50 / np.median(samples[:, 0]) - 1) < 0.1
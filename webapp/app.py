@@ -210,9 +210,10 @@ from webapp.design_constraints import (
 )
 from webapp.estimate_service import (
     EstimateInputs,
-    LcoeAtNoakInputs,
+    clear_design_params_cache,
+    clear_incremental_estimates,
     run_estimate,
-    run_lcoe_at_noak_unit,
+    run_lcoe_learning_curve,
 )
 from cost.cost_drivers import energy_cost_levelized_per_acct
 from webapp.irradiated_transport import (
@@ -227,33 +228,11 @@ from webapp.display_formatting import (
 )
 
 # ---------------------------------------------------------------------------
-# Performance patches: cache Excel reads that would otherwise repeat on every run.
+# Cost database: the engine reads Cost_Database.xlsx through the compiled
+# snapshot in cost/cost_database.py (parsed once, shared across reruns and
+# processes), so no Excel-read caching is needed here.
 # ---------------------------------------------------------------------------
-import functools
-import cost.cost_escalation as _ce
-
-_orig_inflation = _ce.calculate_inflation_multiplier
-
-@functools.lru_cache(maxsize=128)
-def _cached_inflation_multiplier(file_path, base_dollar_year, cost_type, escalation_year):
-    return _orig_inflation(file_path, base_dollar_year, cost_type, escalation_year)
-
-_ce.calculate_inflation_multiplier = _cached_inflation_multiplier
-
-import pandas as _pd_orig
-_orig_read_excel = _pd_orig.read_excel
-
-@functools.lru_cache(maxsize=8)
-def _cached_read_excel(file_path, sheet_name):
-    return _orig_read_excel(file_path, sheet_name=sheet_name)
-
-def _patched_read_excel(file_path, sheet_name=0, **kwargs):
-    if isinstance(file_path, str) and file_path.endswith('Cost_Database.xlsx') and not kwargs:
-        return _cached_read_excel(file_path, sheet_name).copy()
-    return _orig_read_excel(file_path, sheet_name=sheet_name, **kwargs)
-
-_pd_orig.read_excel = _patched_read_excel
-_ce.pd.read_excel = _patched_read_excel
+from cost.cost_database import clear_cost_database_cache
 
 # ---------------------------------------------------------------------------
 # Memory monitor
@@ -271,8 +250,11 @@ _ce.pd.read_excel = _patched_read_excel
 #
 #   At 600 MB (sweep — clears every cache we own + dumps diagnostics):
 #     - st.cache_data (cost engine + anchors)
-#     - functools.lru_cache instances (_cached_inflation_multiplier,
-#       _cached_read_excel) — st.cache_data.clear() does NOT touch these
+#     - the in-memory cost database sheets (clear_cost_database_cache),
+#       the cached cost stages of the incremental estimates
+#       (clear_incremental_estimates) and the reactor builder params
+#       (clear_design_params_cache) — st.cache_data.clear() does NOT
+#       touch these
 #     (the former bounded OrderedDict _materials_cache is gone now that
 #     collect_materials_data is a flat JSON lookup with no runtime build)
 #     - Logs tracemalloc top 10 allocation sites, gc top object types,
@@ -408,14 +390,9 @@ def _run_memory_monitor():
 
     if _rss_mb > 600:
         st.cache_data.clear()
-        try:
-            _cached_inflation_multiplier.cache_clear()
-        except Exception:
-            pass
-        try:
-            _cached_read_excel.cache_clear()
-        except Exception:
-            pass
+        clear_cost_database_cache()
+        clear_incremental_estimates()
+        clear_design_params_cache()
         # Triple gc pass breaks reference cycles that a single collect
         # leaves untouched. (Was originally added for matplotlib Figure
         # <-> Axes <-> Artist mutual refs; now matplotlib is fully gone
@@ -784,27 +761,23 @@ def _run_estimate(reactor_type, power_mwt, enrichment, interest_rate, discount_r
             result.detailed_sorted_df, result.params)
 
 
-# Single-point cost-engine call for the Costs-in-Perspective plot.
-# Used to add an intermediate anchor (e.g. NOAK Unit Number = 10)
-# between the headline FOAK (N=1) and NOAK (N=user_setting). Delegates
-# to estimate_service so the app keeps one cost-engine execution path;
-# the service still skips full enrichment for this anchor to save work.
+# Cost-engine call for the Costs-in-Perspective plot.
+# Adds intermediate anchors (e.g. NOAK Unit Number = 2 and 10) between
+# the headline FOAK (N=1) and NOAK (N=user_setting). All unit numbers come
+# from one engine pass over a shared FOAK sample set (only the learning
+# multipliers differ), delegated to estimate_service so the app keeps one
+# cost-engine execution path.
 @st.cache_data(show_spinner=False, max_entries=2)
-def _lcoe_at_noak_unit(reactor_type, power_mwt, enrichment, interest_rate, discount_rate,
-                       construction_duration, debt_to_equity, operation_mode,
-                       emergency_shutdowns, startup_duration, startup_duration_refueling,
-                       tax_credit_type, tax_credit_value, plant_lifetime,
-                       n_rings_per_assembly=None, active_height=None,
-                       n_assembly_rings=None, n_core_rings=None,
-                       noak_unit_number=10,
-                       tax_credit_units=None):
-    """Returns (mean, std, per_account_df) for one NOAK Unit Number.
-
-    The per_account_df includes Account, Account Title, FOAK and NOAK
-    columns for all rows useful for diagnosing which account drives
-    a wild LCOE value.
-    """
-    result = run_lcoe_at_noak_unit(LcoeAtNoakInputs(
+def _lcoe_at_noak_units(reactor_type, power_mwt, enrichment, interest_rate, discount_rate,
+                        construction_duration, debt_to_equity, operation_mode,
+                        emergency_shutdowns, startup_duration, startup_duration_refueling,
+                        tax_credit_type, tax_credit_value, plant_lifetime,
+                        n_rings_per_assembly=None, active_height=None,
+                        n_assembly_rings=None, n_core_rings=None,
+                        noak_unit_numbers=(10,),
+                        tax_credit_units=None):
+    """Returns {NOAK Unit Number: (mean, std)} of the NOAK LCOE."""
+    return run_lcoe_learning_curve(EstimateInputs(
         reactor_type=reactor_type,
         power_mwt=power_mwt,
         enrichment=enrichment,
@@ -824,9 +797,7 @@ def _lcoe_at_noak_unit(reactor_type, power_mwt, enrichment, interest_rate, disco
         n_assembly_rings=n_assembly_rings,
         n_core_rings=n_core_rings,
         tax_credit_units=tax_credit_units,
-        noak_unit_number=noak_unit_number,
-    ))
-    return result.mean, result.std, result.diag_df, result.diag_params
+    ), noak_unit_numbers)
 
 
 # ---------------------------------------------------------------------------
@@ -3249,11 +3220,10 @@ with streamlit_analytics.track():
         _N_user_pre = 100
     _N_mids_pre = [2, 10]
     _mid_results = {}
-    for _N in _N_mids_pre:
-        if _N <= 1 or _N >= _N_user_pre:
-            continue
+    _N_mids_run = tuple(_N for _N in _N_mids_pre if 1 < _N < _N_user_pre)
+    if _N_mids_run:
         try:
-            _m_i, _s_i, _, _ = _lcoe_at_noak_unit(
+            _mid_results = _lcoe_at_noak_units(
                 reactor_type, power_mwt, enrichment,
                 interest_rate / 100.0, discount_rate / 100.0,
                 construction_duration,
@@ -3264,12 +3234,11 @@ with streamlit_analytics.track():
                 active_height=active_height,
                 n_assembly_rings=n_assembly_rings,
                 n_core_rings=n_core_rings,
-                noak_unit_number=_N,
+                noak_unit_numbers=_N_mids_run,
                 tax_credit_units=tax_credit_units,
             )
-            _mid_results[_N] = (_m_i, _s_i)
         except Exception as _e:
-            st.warning(f'Could not compute N={_N} anchor: {_e}')
+            st.warning(f'Could not compute N={", ".join(map(str, _N_mids_run))} anchors: {_e}')
     _precompute_slot.empty()
 
     # ── Result hero banner (rendered AFTER all computation finishes) ────────
@@ -9,16 +9,41 @@ engine run path used by the app.
 
 from __future__ import annotations
 
+from collections import OrderedDict
 from contextlib import redirect_stdout
+import copy
 from dataclasses import dataclass
+import functools
 import io
-from typing import Any, Optional, Tuple
+import threading
+from typing import Any, Dict, Optional, Tuple
 
 import pandas as pd
 
 from reactor_config import ESCALATION_YEAR, build_params
+from cost.cost_database import cost_database_hash
 from cost.cost_drivers import cost_drivers_estimate
-from cost.cost_estimation import bottom_up_cost_estimate, transform_dataframe
+from cost.estimate_cache import ESTIMATE_CODE, EstimateCache, estimate_key
+from cost.cost_estimation import bottom_up_cost_estimate, bottom_up_learning_curve, transform_dataframe
+from cost.incremental_estimate import IncrementalCostEstimate
+
+# Cost estimates of the committed inputs only rerun the cost stages whose
+# inputs changed since the previous estimate of the same design (e.g. only the
+# financing and LCOE stages after a change of the Interest Rate). There is one
+# incremental estimate per design, the most recently used ones kept, so
+# sessions looking at different designs do not replace each other's stages.
+# An incremental estimate busy in another session is not waited for: that
+# estimate runs without it. _incremental_estimates_lock only guards the dict.
+_INCREMENTAL_ESTIMATES_SIZE = 8
+_incremental_estimates = OrderedDict()   # design key -> (IncrementalCostEstimate, lock)
+_incremental_estimates_lock = threading.Lock()
+
+# Committed estimates also go to the on-disk estimate cache, so popular input
+# sets are served without running the engine in other sessions, processes and
+# after restarts. The app's builders and post-processing are part of the key.
+# MOUSE_ESTIMATE_CACHE moves the cache; MOUSE_ESTIMATE_CACHE_SIZE=0 turns it off.
+_estimate_cache = EstimateCache.for_database('cost/Cost_Database.xlsx')
+_ESTIMATE_CODE = ESTIMATE_CODE + ('webapp/estimate_service.py', 'webapp/reactor_config.py')
 
 
 @dataclass(frozen=True)
@@ -52,20 +77,6 @@ class EstimateResult:
     params: dict
 
 
-@dataclass(frozen=True)
-class LcoeAtNoakInputs(EstimateInputs):
-    noak_unit_number: int = 10
-    include_diagnostics: bool = False
-
-
-@dataclass
-class LcoeAtNoakResult:
-    mean: float
-    std: float
-    diag_df: Optional[pd.DataFrame]
-    diag_params: dict
-
-
 def _base_overrides(inputs: EstimateInputs) -> dict:
     overrides = {
         'Interest Rate': inputs.interest_rate,
@@ -90,109 +101,132 @@ def _base_overrides(inputs: EstimateInputs) -> dict:
     return overrides
 
 
-def _build_app_params(inputs: EstimateInputs, overrides: dict) -> dict:
+@functools.lru_cache(maxsize=8)
+def _design_params(reactor_type, power_mwt, enrichment, n_rings_per_assembly,
+                   active_height, n_assembly_rings, n_core_rings) -> dict:
+    # The reactor builders only depend on the design inputs, so financial
+    # what-ifs reuse them; callers get a deep copy (see _build_app_params).
     return build_params(
+        reactor_type,
+        power_mwt,
+        enrichment,
+        {},
+        n_rings_per_assembly=n_rings_per_assembly,
+        active_height=active_height,
+        n_assembly_rings=n_assembly_rings,
+        n_core_rings=n_core_rings,
+    )
+
+
+def _design_key(inputs: EstimateInputs) -> tuple:
+    # The design inputs: those the reactor builders depend on
+    return (
         inputs.reactor_type,
         inputs.power_mwt,
         inputs.enrichment,
-        overrides,
-        n_rings_per_assembly=inputs.n_rings_per_assembly,
-        active_height=inputs.active_height,
-        n_assembly_rings=inputs.n_assembly_rings,
-        n_core_rings=inputs.n_core_rings,
+        inputs.n_rings_per_assembly,
+        inputs.active_height,
+        inputs.n_assembly_rings,
+        inputs.n_core_rings,
     )
 
 
+def _build_app_params(inputs: EstimateInputs, overrides: dict) -> dict:
+    # Same as build_params(..., overrides): the overrides are applied on top of
+    # the builders' params
+    params = copy.deepcopy(_design_params(*_design_key(inputs)))
+    params.update(overrides)
+    return params
+
+
+def _incremental_estimate(design_key) -> Tuple[IncrementalCostEstimate, threading.Lock]:
+    # The incremental estimate of a design (and its lock), created on first use
+    with _incremental_estimates_lock:
+        entry = _incremental_estimates.get(design_key)
+        if entry is None:
+            entry = (IncrementalCostEstimate('cost/Cost_Database.xlsx'), threading.Lock())
+            _incremental_estimates[design_key] = entry
+            while len(_incremental_estimates) > _INCREMENTAL_ESTIMATES_SIZE:
+                _incremental_estimates.popitem(last=False)
+        else:
+            _incremental_estimates.move_to_end(design_key)
+        return entry
+
+
+def _raw_estimate(inputs: EstimateInputs, params: dict) -> pd.DataFrame:
+    # Cost engine table of the committed inputs, through the design's
+    # incremental estimate unless another session is running it
+    incremental_estimate, lock = _incremental_estimate(_design_key(inputs))
+    if not lock.acquire(blocking=False):
+        return bottom_up_cost_estimate('cost/Cost_Database.xlsx', params)
+    try:
+        return incremental_estimate.estimate(params)
+    finally:
+        lock.release()
+
+
+def clear_incremental_estimates() -> None:
+    """Drop the cached cost stages of every design (memory sweep hook)."""
+    with _incremental_estimates_lock:
+        for incremental_estimate, _ in _incremental_estimates.values():
+            incremental_estimate.clear()
+        _incremental_estimates.clear()
+
+
+def clear_design_params_cache() -> None:
+    """Drop the cached reactor builder params (memory sweep hook)."""
+    _design_params.cache_clear()
+
+
 def run_estimate(inputs: EstimateInputs) -> EstimateResult:
     """Run the app's full cost-estimate path for one committed input set."""
     params = _build_app_params(inputs, _base_overrides(inputs))
+    key = estimate_key(params, cost_database_hash('cost/Cost_Database.xlsx'), params.get('Random Seed'),
+                       code=_ESTIMATE_CODE)
+    cached = _estimate_cache.get(key)
+    if cached is not None:
+        return EstimateResult(*cached)
 
     # Silence the cost engine's per-account print spam ("For the cost of the
     # Account ..."). Those lines flood Streamlit Cloud's log panel and make
     # actual diagnostics like [mem] hard to find.
     with redirect_stdout(io.StringIO()):
-        raw_df = bottom_up_cost_estimate('cost/Cost_Database.xlsx', params)
+        raw_df = _raw_estimate(inputs, params)
         enriched_df, detailed_sorted_df = cost_drivers_estimate(raw_df, params)
 
-    return EstimateResult(
+    result = EstimateResult(
         display_df=transform_dataframe(enriched_df),
         enriched_df=enriched_df,
         detailed_sorted_df=detailed_sorted_df,
         params=params,
     )
+    # Stored as plain values, so entries do not depend on how the app imports this module
+    _estimate_cache.put(key, (result.display_df, result.enriched_df, result.detailed_sorted_df, dict(params)))
+    return result
 
 
-def _get_mean_std(df: pd.DataFrame, account, which='FOAK') -> Tuple[float, float]:
-    mask = df['Account'].astype(str).str.strip() == str(account)
-    mean_col = next(
-        (c for c in df.columns
-         if c.startswith(f'{which} Estimated Cost (') and 'std' not in c),
-        None,
-    )
-    std_col = next(
-        (c for c in df.columns if f'{which} Estimated Cost std' in c),
-        None,
-    )
-    if mean_col is None or not mask.any():
-        return float('nan'), float('nan')
-    mean_vals = pd.to_numeric(df.loc[mask, mean_col], errors='coerce').dropna()
-    if mean_vals.empty:
-        return float('nan'), float('nan')
-    mean = float(mean_vals.iloc[0])
-    if std_col is None:
-        return mean, 0.0
-    std_vals = pd.to_numeric(df.loc[mask, std_col], errors='coerce').fillna(0)
-    std = float(std_vals.iloc[0]) if not std_vals.empty else 0.0
-    return mean, std
-
-
-def run_lcoe_at_noak_unit(inputs: LcoeAtNoakInputs) -> LcoeAtNoakResult:
-    """Run one NOAK-unit anchor for the Costs-in-Perspective plot."""
-    overrides = _base_overrides(inputs)
-    overrides['NOAK Unit Number'] = int(inputs.noak_unit_number)
+def _lcoe_account(tax_credit_type: str) -> str:
+    if tax_credit_type == 'PTC':
+        return 'LCOE with PTC'
+    if tax_credit_type == 'ITC':
+        return 'LCOE (ITC-adjusted)'
+    return 'LCOE'
 
-    if inputs.tax_credit_type == 'PTC':
-        lcoe_account = 'LCOE with PTC'
-    elif inputs.tax_credit_type == 'ITC':
-        lcoe_account = 'LCOE (ITC-adjusted)'
-    else:
-        lcoe_account = 'LCOE'
 
-    params = _build_app_params(inputs, overrides)
-    with redirect_stdout(io.StringIO()):
-        raw_df = bottom_up_cost_estimate('cost/Cost_Database.xlsx', params)
-
-    # Read mean / std directly from the cost engine's raw output.
-    # cost_drivers_estimate enriches with per-account LCOE columns we don't use
-    # here, and transform_dataframe only int-truncates floats, so both are
-    # skipped to save one full enrichment pass per anchor.
-    mean, std = _get_mean_std(raw_df, lcoe_account, 'NOAK')
-
-    diag_params = {
-        'NOAK Unit Number': params.get('NOAK Unit Number'),
-        'Power MWt': params.get('Power MWt'),
-        'Power MWe': params.get('Power MWe'),
-        'Thermal Efficiency': params.get('Thermal Efficiency'),
-        'Capacity Factor': params.get('Capacity Factor'),
-        'Construction Duration': params.get('Construction Duration'),
-        'Interest Rate': params.get('Interest Rate'),
-        'Discount Rate': params.get('Discount Rate'),
-        'Debt To Equity Ratio': params.get('Debt To Equity Ratio'),
-        'Levelization Period': params.get('Levelization Period'),
-        'Annual Electricity Production': params.get('Annual Electricity Production'),
-    }
+def run_lcoe_learning_curve(inputs: EstimateInputs, unit_numbers) -> Dict[int, Tuple[float, float]]:
+    """NOAK LCOE (mean, std) of several unit numbers in one cost-engine pass.
 
-    diag_df = None
-    if inputs.include_diagnostics:
-        _foak_cols = [c for c in raw_df.columns if c.startswith('FOAK Estimated Cost (')]
-        _noak_cols = [c for c in raw_df.columns if c.startswith('NOAK Estimated Cost (')]
-        _keep = [c for c in (['Account', 'Account Title'] + _foak_cols + _noak_cols)
-                 if c in raw_df.columns]
-        diag_df = raw_df[_keep].copy() if _keep else None
-
-    return LcoeAtNoakResult(
-        mean=float(mean) if mean == mean else float('nan'),
-        std=float(std) if std == std else 0.0,
-        diag_df=diag_df,
-        diag_params=diag_params,
-    )
+    All unit numbers share one set of FOAK samples; each only re-applies its
+    learning multipliers, so the anchors of the Costs-in-Perspective plot cost
+    one engine run instead of one per unit number.
+    """
+    params = _build_app_params(inputs, _base_overrides(inputs))
+    with redirect_stdout(io.StringIO()):
+        curve = bottom_up_learning_curve('cost/Cost_Database.xlsx', params, unit_numbers)
+
+    lcoe_account = _lcoe_account(inputs.tax_credit_type)
+    results = {}
+    for _, row in curve.iterrows():
+        mean, std = float(row[lcoe_account]), float(row[f'{lcoe_account} std'])
+        results[int(row['NOAK Unit Number'])] = (mean, std if std == std else 0.0)
+    return results